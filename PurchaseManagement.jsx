@@ -11,6 +11,14 @@ import { ShoppingCart, Plus, Edit, Trash2, Eye } from 'lucide-react'
 
 export default function PurchaseManagement() {
   const [purchases, setPurchases] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const [filters, setFilters] = useState({
+    supplier_id: 'all',
+    status: 'all',
+    start_date: '',
+    end_date: ''
+  })
   const [suppliers, setSuppliers] = useState([])
   const [products, setProducts] = useState([])
   const [loading, setLoading] = useState(false)
@@ -27,23 +35,55 @@ export default function PurchaseManagement() {
   })
 
   useEffect(() => {
-    fetchPurchases()
     fetchSuppliers()
     fetchProducts()
   }, [])
 
-  const fetchPurchases = async () => {
+  // إعادة تحميل الصفحة الأولى عند تغيير الفلاتر
+  useEffect(() => {
+    fetchPurchases()
+  }, [filters])
+
+  // القائمة مرقمة بالمؤشر: بدون cursor تُستبدل القائمة بالصفحة الأولى، ومعه تُضاف الصفحة التالية
+  const fetchPurchases = async (cursor = null) => {
+    const params = new URLSearchParams()
+    Object.entries(filters).forEach(([key, value]) => {
+      if (value && value !== 'all') {
+        params.append(key, value)
+      }
+    })
+    if (cursor) {
+      params.append('cursor', cursor)
+    }
+
     try {
-      const response = await fetch('/api/purchases')
+      const response = await fetch(`/api/purchases?${params.toString()}`)
       if (response.ok) {
         const data = await response.json()
-        setPurchases(data)
+        setPurchases(prev => cursor ? [...prev, ...data.purchases] : data.purchases)
+        setNextCursor(data.next_cursor)
       }
     } catch (error) {
       console.error('Error fetching purchases:', error)
     }
   }
 
+  const loadMore = async () => {
+    setLoadingMore(true)
+    try {
+      await fetchPurchases(nextCursor)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
+  const handleFilterChange = (name, value) => {
+    setFilters(prev => ({
+      ...prev,
+      [name]: value
+    }))
+  }
+
   const fetchSuppliers = async () => {
     try {
       const response = await fetch('/api/suppliers')
@@ -382,6 +422,56 @@ export default function PurchaseManagement() {
           </CardDescription>
         </CardHeader>
         <CardContent>
+          <div className="grid grid-cols-4 gap-4 mb-4">
+            <div>
+              <Label>المورد</Label>
+              <Select value={filters.supplier_id} onValueChange={(value) => handleFilterChange('supplier_id', value)}>
+                <SelectTrigger>
+                  <SelectValue placeholder="كل الموردين" />
+                </SelectTrigger>
+                <SelectContent>
+                  <SelectItem value="all">كل الموردين</SelectItem>
+                  {suppliers.map((supplier) => (
+                    <SelectItem key={supplier.id} value={supplier.id.toString()}>
+                      {supplier.name}
+                    </SelectItem>
+                  ))}
+                </SelectContent>
+              </Select>
+            </div>
+            <div>
+              <Label>الحالة</Label>
+              <Select value={filters.status} onValueChange={(value) => handleFilterChange('status', value)}>
+                <SelectTrigger>
+                  <SelectValue placeholder="كل الحالات" />
+                </SelectTrigger>
+                <SelectContent>
+                  <SelectItem value="all">كل الحالات</SelectItem>
+                  <SelectItem value="pending">معلق</SelectItem>
+                  <SelectItem value="completed">مكتمل</SelectItem>
+                  <SelectItem value="cancelled">ملغي</SelectItem>
+                </SelectContent>
+              </Select>
+            </div>
+            <div>
+              <Label htmlFor="filter_start_date">من تاريخ</Label>
+              <Input
+                id="filter_start_date"
+                type="date"
+                value={filters.start_date}
+                onChange={(e) => handleFilterChange('start_date', e.target.value)}
+              />
+            </div>
+            <div>
+              <Label htmlFor="filter_end_date">إلى تاريخ</Label>
+              <Input
+                id="filter_end_date"
+                type="date"
+                value={filters.end_date}
+                onChange={(e) => handleFilterChange('end_date', e.target.value)}
+              />
+            </div>
+          </div>
           <Table>
             <TableHeader>
               <TableRow>
@@ -422,6 +512,13 @@ export default function PurchaseManagement() {
               ))}
             </TableBody>
           </Table>
+          {nextCursor && (
+            <div className="flex justify-center mt-4">
+              <Button variant="outline" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? 'جاري التحميل...' : 'تحميل المزيد'}
+              </Button>
+            </div>
+          )}
         </CardContent>
       </Card>
 
@@ -11,6 +11,15 @@ import { ShoppingBag, Plus, Edit, Trash2, Eye } from 'lucide-react'
 
 export default function SalesManagement() {
   const [sales, setSales] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const [filters, setFilters] = useState({
+    customer_id: 'all',
+    status: 'all',
+    invoice_type: 'all',
+    start_date: '',
+    end_date: ''
+  })
   const [customers, setCustomers] = useState([])
   const [products, setProducts] = useState([])
   const [loading, setLoading] = useState(false)
@@ -27,23 +36,55 @@ export default function SalesManagement() {
   })
 
   useEffect(() => {
-    fetchSales()
     fetchCustomers()
     fetchProducts()
   }, [])
 
-  const fetchSales = async () => {
+  // إعادة تحميل الصفحة الأولى عند تغيير الفلاتر
+  useEffect(() => {
+    fetchSales()
+  }, [filters])
+
+  // القائمة مرقمة بالمؤشر: بدون cursor تُستبدل القائمة بالصفحة الأولى، ومعه تُضاف الصفحة التالية
+  const fetchSales = async (cursor = null) => {
+    const params = new URLSearchParams()
+    Object.entries(filters).forEach(([key, value]) => {
+      if (value && value !== 'all') {
+        params.append(key, value)
+      }
+    })
+    if (cursor) {
+      params.append('cursor', cursor)
+    }
+
     try {
-      const response = await fetch('/api/sales')
+      const response = await fetch(`/api/sales?${params.toString()}`)
       if (response.ok) {
         const data = await response.json()
-        setSales(data)
+        setSales(prev => cursor ? [...prev, ...data.sales] : data.sales)
+        setNextCursor(data.next_cursor)
       }
     } catch (error) {
       console.error('Error fetching sales:', error)
     }
   }
 
+  const loadMore = async () => {
+    setLoadingMore(true)
+    try {
+      await fetchSales(nextCursor)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
+  const handleFilterChange = (name, value) => {
+    setFilters(prev => ({
+      ...prev,
+      [name]: value
+    }))
+  }
+
   const fetchCustomers = async () => {
     try {
       const response = await fetch('/api/customers')
@@ -389,6 +430,69 @@ export default function SalesManagement() {
           </CardDescription>
         </CardHeader>
         <CardContent>
+          <div className="grid grid-cols-5 gap-4 mb-4">
+            <div>
+              <Label>العميل</Label>
+              <Select value={filters.customer_id} onValueChange={(value) => handleFilterChange('customer_id', value)}>
+                <SelectTrigger>
+                  <SelectValue placeholder="كل العملاء" />
+                </SelectTrigger>
+                <SelectContent>
+                  <SelectItem value="all">كل العملاء</SelectItem>
+                  {customers.map((customer) => (
+                    <SelectItem key={customer.id} value={customer.id.toString()}>
+                      {customer.name}
+                    </SelectItem>
+                  ))}
+                </SelectContent>
+              </Select>
+            </div>
+            <div>
+              <Label>الحالة</Label>
+              <Select value={filters.status} onValueChange={(value) => handleFilterChange('status', value)}>
+                <SelectTrigger>
+                  <SelectValue placeholder="كل الحالات" />
+                </SelectTrigger>
+                <SelectContent>
+                  <SelectItem value="all">كل الحالات</SelectItem>
+                  <SelectItem value="pending">معلق</SelectItem>
+                  <SelectItem value="completed">مكتمل</SelectItem>
+                  <SelectItem value="cancelled">ملغي</SelectItem>
+                </SelectContent>
+              </Select>
+            </div>
+            <div>
+              <Label>النوع</Label>
+              <Select value={filters.invoice_type} onValueChange={(value) => handleFilterChange('invoice_type', value)}>
+                <SelectTrigger>
+                  <SelectValue placeholder="كل الأنواع" />
+                </SelectTrigger>
+                <SelectContent>
+                  <SelectItem value="all">كل الأنواع</SelectItem>
+                  <SelectItem value="regular">عادية</SelectItem>
+                  <SelectItem value="tax">ضريبية</SelectItem>
+                </SelectContent>
+              </Select>
+            </div>
+            <div>
+              <Label htmlFor="filter_start_date">من تاريخ</Label>
+              <Input
+                id="filter_start_date"
+                type="date"
+                value={filters.start_date}
+                onChange={(e) => handleFilterChange('start_date', e.target.value)}
+              />
+            </div>
+            <div>
+              <Label htmlFor="filter_end_date">إلى تاريخ</Label>
+              <Input
+                id="filter_end_date"
+                type="date"
+                value={filters.end_date}
+                onChange={(e) => handleFilterChange('end_date', e.target.value)}
+              />
+            </div>
+          </div>
           <Table>
             <TableHeader>
               <TableRow>
@@ -427,6 +531,13 @@ export default function SalesManagement() {
               ))}
             </TableBody>
           </Table>
+          {nextCursor && (
+            <div className="flex justify-center mt-4">
+              <Button variant="outline" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? 'جاري التحميل...' : 'تحميل المزيد'}
+              </Button>
+            </div>
+          )}
         </CardContent>
       </Card>
 
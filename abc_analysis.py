@@ -0,0 +1,215 @@
+from collections import Counter
+from datetime import date, datetime
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import Float, func, select
+from src.models.models import db, Sale, SaleItem, Product, ProductClassification
+from src.utils.top_products import month_bounds, sales_months
+
+# NumPy اختيارية: بدونها تُقرأ التصنيفات المحفوظة فقط ولا يمكن حسابها
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+CLASS_COLUMNS = ('revenue', 'quantity')
+# حدود النسبة التراكمية: A حتى 80% من الإجمالي، B حتى 95%، والباقي C
+ABC_LIMITS = (0.80, 0.95)
+# حدود معامل اختلاف الطلب الأسبوعي: X مستقر، Y متذبذب، Z غير منتظم
+XYZ_LIMITS = (0.5, 1.0)
+
+
+def _sales_by_product_day(start_date, end_date):
+    """الكمية والإيراد لكل (صنف، يوم) من الفواتير المكتملة في الفترة بتجميع واحد في SQL"""
+    rows = db.session.connection().execute(select(
+        SaleItem.product_id, Sale.sale_date,
+        func.coalesce(func.sum(SaleItem.quantity), 0),
+        func.coalesce(func.sum(SaleItem.total_price), 0, type_=Float)
+    ).join(Sale, SaleItem.sale_id == Sale.id).where(
+        Sale.status == 'completed', Sale.sale_date >= start_date, Sale.sale_date <= end_date
+    ).group_by(SaleItem.product_id, Sale.sale_date)).all()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+    product_ids, days, quantities, revenues = zip(*rows)
+    offsets = (np.array(days, dtype='datetime64[D]') - np.datetime64(start_date, 'D')).astype(np.int64)
+    return (np.array(product_ids, dtype=np.int64), offsets,
+            np.array(quantities, dtype=np.float64), np.array(revenues, dtype=np.float64))
+
+
+def abc_classes(values):
+    """
+    تصنيف ABC متجه: ترتيب تنازلي ثم النسبة التراكمية، ويأخذ كل صنف فئة النقطة التي تبدأ عندها حصته.
+    يعيد (الفئات، النسبة التراكمية حتى الصنف).
+    """
+    order = np.argsort(-values, kind='stable')
+    total = values.sum()
+    shares = np.zeros(len(values))
+    before = np.zeros(len(values))
+    if total > 0:
+        cumulative = np.cumsum(values[order]) / total
+        shares[order] = cumulative
+        before[order] = cumulative - values[order] / total
+    classes = np.where(before < ABC_LIMITS[0], 'A', np.where(before < ABC_LIMITS[1], 'B', 'C'))
+    classes[values <= 0] = 'C'
+    return classes, shares
+
+
+def classify_products(month):
+    """
+    تصنيف الأصناف النشطة والمباعة في الشهر: ABC حسب الإيراد وحسب الكمية، و XYZ حسب معامل اختلاف
+    معدل الطلب اليومي في أسابيع الشهر (الأيام الزائدة تُضم إلى الأسبوع الأخير).
+    """
+    start_date, end_date = month_bounds(month)
+    days = (end_date - start_date).days + 1
+    weeks = days // 7
+
+    product_ids, offsets, quantities, revenues = _sales_by_product_day(start_date, end_date)
+    active_ids = np.array(db.session.execute(
+        select(Product.id).where(Product.is_active == True)
+    ).scalars().all(), dtype=np.int64)
+    ids = np.union1d(active_ids, product_ids)
+    count = len(ids)
+    if not count:
+        return []
+
+    positions = np.searchsorted(ids, product_ids)
+    total_revenue = np.bincount(positions, weights=revenues, minlength=count)
+    total_quantity = np.bincount(positions, weights=quantities, minlength=count)
+
+    buckets = np.minimum(offsets // 7, weeks - 1)
+    weekly = np.bincount(positions * weeks + buckets, weights=quantities, minlength=count * weeks).reshape(count, weeks)
+    lengths = np.full(weeks, 7.0)
+    lengths[-1] = days - 7 * (weeks - 1)
+    rates = weekly / lengths
+    mean = rates.mean(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cv = np.where(mean > 0, rates.std(axis=1) / mean, np.nan)
+    xyz = np.where(cv <= XYZ_LIMITS[0], 'X', np.where(cv <= XYZ_LIMITS[1], 'Y', 'Z'))
+
+    revenue_class, revenue_share = abc_classes(total_revenue)
+    quantity_class, _ = abc_classes(total_quantity)
+
+    has_demand = (mean > 0).tolist()
+    return [{
+        'period': month,
+        'product_id': product_id,
+        'total_quantity': int(quantity),
+        'total_revenue': round(revenue, 2),
+        'revenue_share': round(share, 6),
+        'revenue_class': by_revenue,
+        'quantity_class': by_quantity,
+        'demand_cv': round(variation, 4) if demand else None,
+        'xyz_class': variability if demand else None
+    } for product_id, quantity, revenue, share, by_revenue, by_quantity, variation, variability, demand in zip(
+        ids.tolist(), total_quantity.tolist(), total_revenue.tolist(), revenue_share.tolist(),
+        revenue_class.tolist(), quantity_class.tolist(), cv.tolist(), xyz.tolist(), has_demand
+    )]
+
+
+def refresh_classification(month):
+    """إعادة حساب تصنيف الشهر وحفظه (داخل المعاملة الحالية)"""
+    rows = classify_products(month)
+    now = datetime.utcnow()
+    db.session.query(ProductClassification).filter(
+        ProductClassification.period == month
+    ).delete(synchronize_session=False)
+    if rows:
+        db.session.execute(ProductClassification.__table__.insert(), [dict(row, refreshed_at=now) for row in rows])
+    return len(rows)
+
+
+def _summary(abc_counts, xyz_counts):
+    return {
+        'abc': {name: abc_counts.get(name, 0) for name in 'ABC'},
+        'xyz': {name: xyz_counts.get(name, 0) for name in 'XYZ'}
+    }
+
+
+def classification_report(month, class_by='revenue', abc_class=None, xyz_class=None):
+    """
+    تصنيف الشهر من الجدول المحفوظ (التصفية والعد في SQL)، أو محسوباً مباشرة إذا لم يُحفظ بعد.
+    يعيد (محفوظ أم لا، ملخص عدد الأصناف في كل فئة، الصفوف مرتبة تنازلياً حسب class_by).
+    """
+    class_column = getattr(ProductClassification, f'{class_by}_class')
+    total_column = getattr(ProductClassification, f'total_{class_by}')
+    stored = db.session.query(ProductClassification.id).filter(ProductClassification.period == month).first() is not None
+
+    if stored:
+        period = ProductClassification.period == month
+        summary = _summary(
+            dict(db.session.query(class_column, func.count()).filter(period).group_by(class_column).all()),
+            dict(db.session.query(ProductClassification.xyz_class, func.count()).filter(
+                period, ProductClassification.xyz_class.isnot(None)
+            ).group_by(ProductClassification.xyz_class).all())
+        )
+        query = db.session.query(
+            ProductClassification.product_id, Product.name.label('product_name'), Product.code.label('product_code'),
+            ProductClassification.total_quantity, ProductClassification.total_revenue,
+            ProductClassification.revenue_share, ProductClassification.revenue_class,
+            ProductClassification.quantity_class, ProductClassification.demand_cv, ProductClassification.xyz_class
+        ).outerjoin(Product, Product.id == ProductClassification.product_id).filter(period)
+        if abc_class:
+            query = query.filter(class_column == abc_class)
+        if xyz_class:
+            query = query.filter(ProductClassification.xyz_class == xyz_class)
+        rows = [dict(row._mapping, total_revenue=float(row.total_revenue or 0))
+                for row in query.order_by(total_column.desc(), ProductClassification.product_id)]
+        return True, summary, rows
+
+    rows = classify_products(month)
+    summary = _summary(
+        Counter(row[f'{class_by}_class'] for row in rows),
+        Counter(row['xyz_class'] for row in rows if row['xyz_class'])
+    )
+    rows = [row for row in rows if (not abc_class or row[f'{class_by}_class'] == abc_class)
+            and (not xyz_class or row['xyz_class'] == xyz_class)]
+    rows.sort(key=lambda row: (-row[f'total_{class_by}'], row['product_id']))
+
+    names = db.session.query(Product.id, Product.name, Product.code)
+    if len(rows) <= 1000:
+        # القوائم الكبيرة تُقرأ أسماؤها كاملة بدلاً من IN بعدد كبير من المعاملات
+        names = names.filter(Product.id.in_([row['product_id'] for row in rows]))
+    names = {product_id: (name, code) for product_id, name, code in names}
+    for row in rows:
+        del row['period']
+        row['product_name'], row['product_code'] = names.get(row['product_id'], (None, None))
+    return False, summary, rows
+
+
+def latest_classes(month=None):
+    """فئات الأصناف من تصنيف الشهر المحدد أو آخر شهر محسوب: {معرف الصنف: (فئة الإيراد، فئة XYZ)}"""
+    if not month:
+        month = db.session.query(func.max(ProductClassification.period)).scalar()
+        if not month:
+            return None, {}
+    rows = db.session.query(
+        ProductClassification.product_id, ProductClassification.revenue_class, ProductClassification.xyz_class
+    ).filter(ProductClassification.period == month).all()
+    return month, {product_id: (revenue_class, xyz_class) for product_id, revenue_class, xyz_class in rows}
+
+
+@click.command('refresh-abc-classification')
+@click.option('--month', 'months', multiple=True, help='YYYY-MM (الافتراضي الشهر الحالي)')
+@click.option('--all', 'all_months', is_flag=True, help='جميع الأشهر التي تحتوي على مبيعات')
+@with_appcontext
+def refresh_classification_command(months, all_months):
+    """حساب تصنيف ABC/XYZ للأصناف وحفظه لكل شهر"""
+    if not NUMPY_AVAILABLE:
+        raise click.ClickException('حساب التصنيف يتطلب تثبيت numpy')
+    if all_months:
+        months = sales_months()
+    elif not months:
+        months = [date.today().strftime('%Y-%m')]
+
+    try:
+        for month in months:
+            refresh_classification(month)
+        db.session.commit()
+    except ValueError:
+        db.session.rollback()
+        raise click.BadParameter('صيغة الشهر يجب أن تكون YYYY-MM')
+    except Exception:
+        db.session.rollback()
+        raise
+    click.echo(f'تم تحديث تصنيف الأصناف لعدد {len(months)} شهر')
@@ -0,0 +1,265 @@
+"""
+قياس زمن جميع نقاط GET في كل المخططات (blueprints) مع إنشاء فاتورة بيع وفاتورة شراء
+على قاعدة مولدة بـ synthetic_data.py، وإخراج النتائج بصيغة JSON للمقارنة بين الإصدارات.
+
+النقاط تُكتشف من خريطة المسارات في التطبيق، فالنقاط الجديدة تدخل القياس تلقائياً.
+معاملات المسار (مثل sale_id) تأخذ معرفاً موجوداً، والنقاط التي تحتاج معاملات استعلام تأخذها من PARAMS.
+لكل نقطة: زمن أول طلب (قبل امتلاء الذاكرة المؤقتة داخل العملية)، ثم الوسيط و p95 لـ --repeat طلب،
+وعدد استعلامات SQL وحجم الاستجابة.
+
+التشغيل من جذر المشروع:
+    python benchmarks/synthetic_data.py --database /tmp/hra.db --scale medium
+    python benchmarks/endpoints.py --database /tmp/hra.db --output before.json
+    (بعد التعديل) python benchmarks/endpoints.py --database /tmp/hra.db --output after.json --compare before.json
+
+بدون --database تُنشأ قاعدة مؤقتة بالحجم المحدد بـ --scale (نفس خيارات synthetic_data.py).
+مع --compare يُطبع الفرق لكل نقطة ويكون رمز الخروج 1 إذا تباطأت نقطة أكثر من --tolerance.
+قاعدة البيانات تتغير بإنشاء الفواتير، فالمقارنة الدقيقة تكون على نسخة جديدة من نفس القاعدة المولدة.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# معاملات الاستعلام للنقاط التي تتطلبها أو التي تصدّر الجدول كاملاً بدونها
+PARAMS = {
+    'search.search': lambda: {'q': 'صنف 1'},
+    'inventory.get_stock_as_of': lambda: {'date': (date.today() - timedelta(days=30)).isoformat()},
+    'exports.export_sales': lambda: _last_month(),
+    'exports.export_purchases': lambda: _last_month(),
+    'exports.export_sale_items': lambda: _last_month(),
+    'exports.export_purchase_items': lambda: _last_month(),
+    'exports.export_stock_movements': lambda: _last_month(),
+}
+# نقاط لا تُقاس: ملفات الواجهة الثابتة
+SKIPPED_ENDPOINTS = {'static', 'serve'}
+
+
+def _last_month():
+    return {'start_date': (date.today() - timedelta(days=30)).isoformat(), 'end_date': date.today().isoformat()}
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class QueryCounter:
+    """عدد استعلامات SQL المنفذة منذ آخر reset"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+    def reset(self):
+        count, self.count = self.count, 0
+        return count
+
+
+def _measure(request, repeat, queries):
+    """زمن أول طلب ثم إحصاءات الطلبات المتكررة، مع حالة وحجم وعدد استعلامات آخر طلب"""
+    timings = []
+    for index in range(repeat + 1):
+        queries.reset()
+        started = time.perf_counter()
+        response = request()
+        body = response.get_data()
+        timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            break
+    return {
+        'status': response.status_code,
+        'first_ms': round(timings[0], 2),
+        'median_ms': round(statistics.median(timings[1:] or timings), 2),
+        'p95_ms': round(_percentile(timings[1:] or timings, 0.95), 2),
+        'min_ms': round(min(timings), 2),
+        'queries': queries.reset(),
+        'bytes': len(body)
+    }
+
+
+def _sample_ids(db):
+    """معرفات موجودة لمعاملات المسارات"""
+    from src.models.models import Customer, Supplier, Employee, Product, Sale, Purchase
+    return {
+        f'{name}_id': db.session.query(db.func.max(model.id)).scalar()
+        for name, model in (('customer', Customer), ('supplier', Supplier), ('employee', Employee),
+                            ('product', Product), ('sale', Sale), ('purchase', Purchase))
+    }
+
+
+def _submit_job(client):
+    """مهمة تقرير منتهية لقياس نقاط حالة المهمة ونتيجتها"""
+    job = client.post('/api/reports/jobs', json={'report': 'inventory-valuation'}).get_json()
+    while job.get('status') in ('queued', 'running'):
+        time.sleep(0.05)
+        job = client.get(f"/api/reports/jobs/{job['job_id']}").get_json()
+    return job['job_id']
+
+
+def _get_endpoints(app, path_values):
+    endpoints = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.endpoint):
+        if 'GET' not in rule.methods or rule.endpoint in SKIPPED_ENDPOINTS:
+            continue
+        missing = [argument for argument in rule.arguments if argument not in path_values]
+        if missing:
+            print(f'تخطي {rule.endpoint}: لا توجد قيمة لـ {", ".join(missing)}', file=sys.stderr)
+            continue
+        endpoints.append((rule.endpoint, rule.build({name: path_values[name] for name in rule.arguments})[1]))
+    return endpoints
+
+
+def _invoice_payloads(db, count):
+    """أجسام فواتير بيع وشراء بأصناف لديها رصيد يكفي لكل الطلبات المتكررة"""
+    from src.models.models import Product
+    products = db.session.query(Product.id, Product.selling_price, Product.purchase_price).filter(
+        Product.is_active == True, Product.current_stock >= count * 3
+    ).order_by(Product.current_stock.desc()).limit(3).all()
+    if len(products) < 3:
+        raise RuntimeError('لا توجد أصناف برصيد كافٍ لقياس إنشاء فواتير البيع')
+    sale = {
+        'customer_id': 1, 'employee_id': 1, 'invoice_type': 'tax',
+        'items': [{'product_id': product.id, 'quantity': 1, 'unit_price': float(product.selling_price)} for product in products]
+    }
+    purchase = {
+        'supplier_id': 1, 'employee_id': 1,
+        'items': [{'product_id': product.id, 'quantity': 10, 'unit_price': float(product.purchase_price)} for product in products]
+    }
+    return sale, purchase
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(app, repeat):
+    from sqlalchemy import event
+    from src.models.models import db, Product, Sale, SaleItem, StockMovement
+
+    client = app.test_client()
+    queries = QueryCounter()
+    results = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', queries)
+        counts = {
+            model.__tablename__: db.session.query(model).count()
+            for model in (Product, Sale, SaleItem, StockMovement)
+        }
+        path_values = _sample_ids(db)
+        sale, purchase = _invoice_payloads(db, repeat + 1)
+        db.session.remove()
+
+    path_values['job_id'] = _submit_job(client)
+    for endpoint, path in _get_endpoints(app, path_values):
+        params = PARAMS.get(endpoint, dict)()
+        result = _measure(lambda: client.get(path, query_string=params), repeat, queries)
+        results.append(dict(name=endpoint, method='GET', path=path, params=params, **result))
+        print(json.dumps(results[-1], ensure_ascii=False), file=sys.stderr)
+
+    for endpoint, path, payload in (('sales_purchases.create_sale', '/api/sales', sale),
+                                    ('sales_purchases.create_purchase', '/api/purchases', purchase)):
+        result = _measure(lambda: client.post(path, json=payload), repeat, queries)
+        results.append(dict(name=endpoint, method='POST', path=path, params={}, **result))
+        print(json.dumps(results[-1], ensure_ascii=False), file=sys.stderr)
+
+    with app.app_context():
+        event.remove(db.engine, 'before_cursor_execute', queries)
+
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'repeat': repeat,
+            'rows': counts
+        },
+        'results': results
+    }
+
+
+def compare(current, baseline, tolerance, min_ms):
+    """
+    مقارنة الوسيط لكل نقطة بالقياس السابق. التباطؤ يُعد تراجعاً إذا زاد عن النسبة tolerance
+    وعن min_ms معاً (حتى لا تُحسب تقلبات النقاط السريعة جداً)، أو إذا زاد عدد الاستعلامات.
+    """
+    previous = {result['name']: result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = previous.get(result['name'])
+        if before is None:
+            print(f"{result['name']}: جديدة {result['median_ms']} ms", file=sys.stderr)
+            continue
+        ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+        slower = ratio > 1 + tolerance and result['median_ms'] - before['median_ms'] > min_ms
+        more_queries = result['queries'] > before['queries']
+        marker = ' <- تراجع' if slower or more_queries else ''
+        print(f"{result['name']}: {before['median_ms']} -> {result['median_ms']} ms (x{ratio:.2f}), "
+              f"استعلامات {before['queries']} -> {result['queries']}{marker}", file=sys.stderr)
+        if marker:
+            regressions.append(result['name'])
+    return regressions
+
+
+def main():
+    from synthetic_data import add_scale_arguments, generate, scale_from_args
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', help='قاعدة مولدة بـ synthetic_data.py (الافتراضي: توليد قاعدة مؤقتة)')
+    add_scale_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--output', help='ملف نتائج JSON (الافتراضي: المخرج القياسي)')
+    parser.add_argument('--compare', help='ملف نتائج سابق للمقارنة')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='نسبة التباطؤ المقبولة (0.25 = 25%%)')
+    parser.add_argument('--min-ms', type=float, default=2.0, help='أقل فرق بالمللي ثانية يُعد تراجعاً')
+    args = parser.parse_args()
+
+    database = args.database or os.path.join(tempfile.mkdtemp(prefix='endpoints-bench-'), 'bench.db')
+    if args.database and not os.path.exists(database):
+        parser.error(f'الملف غير موجود: {database}')
+    # قاعدة البيانات يجب تحديدها قبل استيراد التطبيق، وسجل الاستعلامات البطيئة معطل حتى لا يؤثر على القياس
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.abspath(database)
+    os.environ['SLOW_QUERY_THRESHOLD_MS'] = '0'
+    from src.main import app
+
+    if not args.database:
+        with app.app_context():
+            generate(scale_from_args(args), days=args.days, seed=args.seed,
+                     log=lambda message: print(message, file=sys.stderr))
+
+    report = run(app, args.repeat)
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.tolerance, args.min_ms)
+        if regressions:
+            print(f'تراجع في {len(regressions)} نقطة: {", ".join(regressions)}', file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+قياس زمن الملخص المالي مع نمو عدد الفواتير: الطريقة القديمة (تحميل كل الفواتير والأصناف ككائنات ORM
+وجمعها في Python) مقابل نقطة /api/reports/financial-summary الحالية (استعلام واحد من استعلامات فرعية تجميعية).
+
+ينشئ قاعدة SQLite مؤقتة ويضيف الفواتير على مراحل حتى يصل إلى كل حجم في --sizes،
+ثم يعيد بناء جداول التجميع اليومي ويقيس الطريقتين (الطريقة القديمة حتى --legacy-max فقط لاستهلاكها للذاكرة).
+
+التشغيل من جذر المشروع:
+    python benchmarks/financial_summary.py --sizes 10000,100000,1000000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# قاعدة البيانات المؤقتة يجب تحديدها قبل استيراد التطبيق
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='financial-bench-'), 'bench.db')
+
+from src.main import app
+from src.models.models import db, Customer, Supplier, Product, Sale, Purchase
+from src.utils.rollups import rebuild_rollups
+
+BATCH_SIZE = 50000
+FIRST_DAY = date(2023, 1, 1)
+
+
+def _seed_reference(products):
+    db.session.execute(Customer.__table__.insert(), [{'name': 'عميل'}])
+    db.session.execute(Supplier.__table__.insert(), [{'name': 'مورد'}])
+    db.session.execute(Product.__table__.insert(), [{
+        'name': f'Product {i}', 'code': f'B{i}', 'is_active': True,
+        'current_stock': random.randint(0, 500), 'purchase_price': random.randint(1, 100)
+    } for i in range(1, products + 1)])
+    db.session.commit()
+
+
+def _add_invoices(model, prefix, date_column, party_column, start, end):
+    """إضافة فواتير مكتملة بمعرفات من start إلى end على دفعات (موزعة على ثلاث سنوات)"""
+    for first in range(start, end, BATCH_SIZE):
+        rows = []
+        for number in range(first, min(first + BATCH_SIZE, end)):
+            net = random.randint(10, 5000)
+            rows.append({
+                'invoice_number': f'{prefix}-{number}', party_column: 1,
+                date_column: FIRST_DAY + timedelta(days=number % 1095),
+                'total_amount': net, 'net_amount': net, 'status': 'completed'
+            })
+        db.session.execute(model.__table__.insert(), rows)
+        db.session.commit()
+
+
+def _legacy_summary():
+    """الطريقة القديمة كما كانت في reports.py: تحميل الفواتير والأصناف ككائنات وجمعها"""
+    sales = Sale.query.filter_by(status='completed').all()
+    purchases = Purchase.query.filter_by(status='completed').all()
+    products = Product.query.filter_by(is_active=True).all()
+    result = {
+        'sales': sum(sale.net_amount for sale in sales if sale.net_amount),
+        'purchases': sum(purchase.net_amount for purchase in purchases if purchase.net_amount),
+        'inventory': sum(product.current_stock * product.purchase_price for product in products if product.purchase_price)
+    }
+    db.session.expunge_all()
+    return result
+
+
+def _measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='أعداد فواتير المبيعات مفصولة بفواصل')
+    parser.add_argument('--purchases-ratio', type=float, default=0.25, help='نسبة فواتير المشتريات إلى المبيعات')
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--legacy-max', type=int, default=200000, help='أكبر حجم تُقاس عنده الطريقة القديمة')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+
+    random.seed(42)
+    client = app.test_client()
+    results = []
+    with app.app_context():
+        _seed_reference(args.products)
+        sales = purchases = 0
+        for size in sizes:
+            purchases_target = int(size * args.purchases_ratio)
+            _add_invoices(Sale, 'S', 'sale_date', 'customer_id', sales, size)
+            _add_invoices(Purchase, 'P', 'purchase_date', 'supplier_id', purchases, purchases_target)
+            sales, purchases = size, purchases_target
+            rebuild_rollups()
+            db.session.commit()
+
+            def endpoint():
+                response = client.get('/api/reports/financial-summary')
+                assert response.status_code == 200
+
+            results.append({
+                'sales': sales,
+                'purchases': purchases,
+                'products': args.products,
+                'legacy_ms': _measure(_legacy_summary, max(1, args.repeat // 10)) if size <= args.legacy_max else None,
+                'single_query_ms': _measure(endpoint, args.repeat)
+            })
+            print(json.dumps(results[-1]), file=sys.stderr)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+مقارنة إنتاجية SQLite بالإعدادات الافتراضية مقابل ملف الإعدادات المحسن (WAL وغيره).
+
+يشغل عدة خيوط تنفذ عمليات بيع متزامنة (إدراج فاتورة + خصم مخزون مشروط + حركة مخزون)
+مع خيوط تقرأ قائمة الفواتير، ثم يطبع عدد العمليات في الثانية والأخطاء لكل ملف إعدادات.
+
+التشغيل من جذر المشروع:
+    python benchmarks/sqlite_profile.py --seconds 10 --writers 4 --readers 4
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+from src.config import Config, configure_sqlite
+from src.models.models import db, Product, Sale, StockMovement
+
+
+def _make_engine(path, tuned):
+    if not tuned:
+        return create_engine(f'sqlite:///{path}')
+    engine = create_engine(f'sqlite:///{path}', **{
+        key: value for key, value in Config.SQLALCHEMY_ENGINE_OPTIONS.items() if key != 'pool_recycle'
+    })
+    configure_sqlite(engine, Config.SQLITE_PRAGMAS)
+    return engine
+
+
+def _seed(engine, products):
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(Product.__table__.insert(), [
+            {'name': f'Product {i}', 'code': f'B{i}', 'current_stock': 10 ** 9, 'is_active': True}
+            for i in range(1, products + 1)
+        ])
+
+
+def _checkout(connection, product_id):
+    with connection.begin():
+        sale_id = connection.execute(Sale.__table__.insert().values(
+            customer_id=1, status='completed', net_amount=10, created_at=datetime.utcnow()
+        )).inserted_primary_key[0]
+        connection.execute(Product.__table__.update().where(
+            Product.__table__.c.id == product_id,
+            Product.__table__.c.current_stock >= 1
+        ).values(current_stock=Product.__table__.c.current_stock - 1))
+        connection.execute(StockMovement.__table__.insert().values(
+            product_id=product_id, movement_type='out', quantity=1,
+            reference_type='sale', reference_id=sale_id, movement_date=datetime.utcnow()
+        ))
+
+
+def _list_sales(connection):
+    table = Sale.__table__
+    connection.execute(
+        select(table).order_by(table.c.created_at.desc(), table.c.id.desc()).limit(50)
+    ).fetchall()
+
+
+def run_profile(name, tuned, seconds, writers, readers, products):
+    directory = tempfile.mkdtemp(prefix='sqlite-bench-')
+    path = os.path.join(directory, 'bench.db')
+    engine = _make_engine(path, tuned)
+    _seed(engine, products)
+
+    counters = {'writes': 0, 'reads': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(index, write):
+        done = errors = 0
+        with engine.connect() as connection:
+            while time.perf_counter() < deadline:
+                try:
+                    if write:
+                        _checkout(connection, 1 + (done + index) % products)
+                    else:
+                        _list_sales(connection)
+                        connection.rollback()
+                    done += 1
+                except OperationalError:
+                    errors += 1
+        with lock:
+            counters['writes' if write else 'reads'] += done
+            counters['errors'] += errors
+
+    threads = [threading.Thread(target=worker, args=(i, True)) for i in range(writers)]
+    threads += [threading.Thread(target=worker, args=(i, False)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    return {
+        'profile': name,
+        'writes_per_sec': round(counters['writes'] / seconds, 1),
+        'reads_per_sec': round(counters['reads'] / seconds, 1),
+        'errors': counters['errors']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--products', type=int, default=100)
+    args = parser.parse_args()
+
+    results = [
+        run_profile('default', False, args.seconds, args.writers, args.readers, args.products),
+        run_profile('tuned', True, args.seconds, args.writers, args.readers, args.products)
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
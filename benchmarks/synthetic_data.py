@@ -0,0 +1,293 @@
+"""
+مولد بيانات اصطناعية بأحجام قريبة من الإنتاج لقياس الأداء.
+
+يملأ جداول models.py في قاعدة فارغة بإدراج مجمع على دفعات: الشركة والموظفين والتصنيفات والأصناف
+والعملاء والموردين، ثم فواتير مبيعات ومشتريات مكتملة موزعة على --days يوماً حتى اليوم مع أصنافها
+وحركات المخزون المطابقة لكل صنف، ورصيد افتتاحي لكل صنف بحركة تعديل حتى يساوي الرصيد الحالي مجموع الحركات.
+بعد الإدراج تُبنى الجداول المشتقة كما في الإنتاج: جداول التجميع اليومي، قوائم أفضل الأصناف الشهرية،
+لقطة رصيد المخزون وتصنيف ABC/XYZ (إذا كانت numpy مثبتة).
+
+النتائج قابلة للتكرار: نفس --seed ونفس الأحجام تعطي نفس البيانات.
+الطلب على الأصناف غير متساوٍ (قلة من الأصناف تأخذ معظم المبيعات) حتى تشبه التقارير بيانات حقيقية.
+
+التشغيل من جذر المشروع (الحجم الكبير: 100 ألف صنف، 50 ألف عميل، 2 مليون فاتورة و8 ملايين صنف مباع):
+    python benchmarks/synthetic_data.py --database /tmp/hra-large.db --scale large
+    python benchmarks/synthetic_data.py --database /tmp/hra.db --scale small --sales 50000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import bindparam
+from src.models.models import (
+    db, Company, Employee, Category, Product, Customer, Supplier, Sale, SaleItem, Purchase, PurchaseItem,
+    StockMovement, ExpenseCategory, Expense, InvoiceSequence
+)
+from src.utils.rollups import rebuild_rollups
+from src.utils.top_products import refresh_top_products, sales_months
+from src.utils.stock_checkpoints import create_checkpoint
+from src.utils.abc_analysis import NUMPY_AVAILABLE, refresh_classification
+
+BATCH_SIZE = 50000
+TAX_RATE = 0.14
+
+# الأحجام الجاهزة، ويمكن تغيير أي قيمة منها بخيار مستقل
+SCALES = {
+    'small': {
+        'products': 2000, 'customers': 1000, 'suppliers': 50, 'employees': 10,
+        'sales': 20000, 'items_per_sale': 4, 'purchases': 2000, 'items_per_purchase': 10
+    },
+    'medium': {
+        'products': 20000, 'customers': 10000, 'suppliers': 300, 'employees': 30,
+        'sales': 200000, 'items_per_sale': 4, 'purchases': 20000, 'items_per_purchase': 10
+    },
+    'large': {
+        'products': 100000, 'customers': 50000, 'suppliers': 2000, 'employees': 100,
+        'sales': 2000000, 'items_per_sale': 4, 'purchases': 200000, 'items_per_purchase': 10
+    },
+}
+
+
+def _insert(table, rows):
+    for first in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(table.insert(), rows[first:first + BATCH_SIZE])
+    db.session.commit()
+
+
+def _popular_product(products):
+    """صنف عشوائي بتوزيع منحرف: الأصناف ذات المعرفات الصغيرة أكثر طلباً"""
+    return int(products * random.random() ** 3) + 1
+
+
+def _seed_reference(scale, created_at):
+    """
+    البيانات المرجعية، ويعيد أسعار الشراء والبيع لكل صنف (الفهرس = المعرف - 1).
+    الأصناف والعملاء والموردون منشأون في created_at (بداية الفترة) حتى تظهر في الاستعلامات حسب التاريخ.
+    """
+    _insert(Company.__table__, [{'name': 'شركة القياس', 'address': 'القاهرة', 'phone': '0100000000'}])
+    _insert(Employee.__table__, [{
+        'name': f'موظف {i}', 'position': 'مبيعات', 'username': f'employee{i}',
+        'role': 'admin' if i == 1 else 'employee', 'salary': random.randint(4000, 20000), 'is_active': True
+    } for i in range(1, scale['employees'] + 1)])
+    categories = max(1, scale['products'] // 2000)
+    _insert(Category.__table__, [{'name': f'تصنيف {i}'} for i in range(1, categories + 1)])
+    _insert(ExpenseCategory.__table__, [{'name': name} for name in ('إيجار', 'كهرباء', 'رواتب', 'نقل')])
+
+    purchase_prices, selling_prices, rows = [], [], []
+    for i in range(1, scale['products'] + 1):
+        purchase_price = round(random.uniform(5, 500), 2)
+        selling_price = round(purchase_price * random.uniform(1.1, 1.6), 2)
+        purchase_prices.append(purchase_price)
+        selling_prices.append(selling_price)
+        rows.append({
+            'name': f'صنف {i}', 'code': f'P{i:07d}', 'unit': 'قطعة',
+            'purchase_price': purchase_price, 'selling_price': selling_price,
+            'min_stock': random.randint(0, 50), 'current_stock': 0,
+            'category_id': random.randint(1, categories), 'is_active': random.random() > 0.02,
+            'created_at': created_at, 'updated_at': created_at
+        })
+    _insert(Product.__table__, rows)
+
+    _insert(Customer.__table__, [{
+        'name': f'عميل {i}', 'phone': f'01{i:09d}',
+        'customer_type': 'dealer' if random.random() < 0.1 else 'customer', 'is_active': True,
+        'created_at': created_at, 'updated_at': created_at
+    } for i in range(1, scale['customers'] + 1)])
+    _insert(Supplier.__table__, [{
+        'name': f'مورد {i}', 'phone': f'02{i:09d}', 'is_active': True,
+        'created_at': created_at, 'updated_at': created_at
+    } for i in range(1, scale['suppliers'] + 1)])
+    return purchase_prices, selling_prices
+
+
+def _add_invoices(kind, scale, prices, first_day, days, stock_changes):
+    """
+    فواتير مكتملة بمعرفات متتالية وتواريخ متزايدة مع المعرف، مع أصنافها وحركات المخزون المطابقة.
+    التغير في رصيد كل صنف يُجمع في stock_changes. أوقات فواتير اليوم الحالي لا تتجاوز الوقت الحالي.
+    """
+    if kind == 'sale':
+        model, item_model, prefix, date_column, party_column = Sale, SaleItem, 'INV', 'sale_date', 'customer_id'
+        count, parties, items_per_invoice = scale['sales'], scale['customers'], scale['items_per_sale']
+        movement_type, sign = 'out', -1
+    else:
+        model, item_model, prefix, date_column, party_column = Purchase, PurchaseItem, 'PUR', 'purchase_date', 'supplier_id'
+        count, parties, items_per_invoice = scale['purchases'], scale['suppliers'], scale['items_per_purchase']
+        movement_type, sign = 'in', 1
+    foreign_key = f'{kind}_id'
+    products = scale['products']
+    now = datetime.utcnow()
+
+    for first in range(1, count + 1, BATCH_SIZE):
+        invoices, items, movements = [], [], []
+        for invoice_id in range(first, min(first + BATCH_SIZE, count + 1)):
+            day = first_day + timedelta(days=(invoice_id - 1) * days // count)
+            moment = datetime.combine(day, datetime.min.time()) + timedelta(seconds=random.randint(28800, 79200))
+            moment = min(moment, now)
+            employee_id = random.randint(1, scale['employees'])
+            total = 0.0
+            for _ in range(random.randint(1, 2 * items_per_invoice - 1)):
+                product_id = _popular_product(products) if kind == 'sale' else random.randint(1, products)
+                quantity = random.randint(1, 5) if kind == 'sale' else random.randint(10, 100)
+                unit_price = prices[product_id - 1]
+                total_price = round(quantity * unit_price, 2)
+                total += total_price
+                stock_changes[product_id - 1] += sign * quantity
+                items.append({
+                    foreign_key: invoice_id, 'product_id': product_id, 'quantity': quantity,
+                    'unit_price': unit_price, 'total_price': total_price
+                })
+                movements.append({
+                    'product_id': product_id, 'movement_type': movement_type, 'quantity': quantity,
+                    'quantity_change': sign * quantity, 'reference_type': kind, 'reference_id': invoice_id,
+                    'movement_date': moment, 'employee_id': employee_id
+                })
+
+            invoice = {
+                'id': invoice_id, 'invoice_number': f'{prefix}-{invoice_id:06d}',
+                party_column: random.randint(1, parties), 'employee_id': employee_id, date_column: day,
+                'total_amount': round(total, 2), 'discount_amount': 0, 'tax_amount': 0,
+                'net_amount': round(total, 2), 'status': 'completed', 'created_at': moment
+            }
+            if kind == 'sale':
+                invoice['invoice_type'] = 'regular'
+                if random.random() < 0.2:
+                    invoice['invoice_type'] = 'tax'
+                    invoice['tax_amount'] = round(total * TAX_RATE, 2)
+                    invoice['net_amount'] = round(total + invoice['tax_amount'], 2)
+            invoices.append(invoice)
+
+        _insert(model.__table__, invoices)
+        _insert(item_model.__table__, items)
+        _insert(StockMovement.__table__, movements)
+
+
+def _set_opening_stock(opening_moment, stock_changes):
+    """رصيد افتتاحي بحركة تعديل قبل أول فاتورة، بحيث لا يكون الرصيد الحالي سالباً"""
+    movements, stocks = [], []
+    for index, change in enumerate(stock_changes):
+        opening = max(0, -change) + random.randint(0, 200)
+        if opening:
+            movements.append({
+                'product_id': index + 1, 'movement_type': 'adjustment', 'quantity': opening,
+                'quantity_change': opening, 'reference_type': 'adjustment', 'notes': 'رصيد افتتاحي',
+                'movement_date': opening_moment
+            })
+        stocks.append({'product_id': index + 1, 'stock': opening + change})
+    _insert(StockMovement.__table__, movements)
+
+    table = Product.__table__
+    update = table.update().where(table.c.id == bindparam('product_id')).values(current_stock=bindparam('stock'))
+    connection = db.session.connection()
+    for first in range(0, len(stocks), BATCH_SIZE):
+        connection.execute(update, stocks[first:first + BATCH_SIZE])
+    db.session.commit()
+
+
+def _add_expenses(first_day, days):
+    _insert(Expense.__table__, [{
+        'description': 'مصروف تشغيل', 'amount': round(random.uniform(50, 5000), 2),
+        'expense_date': first_day + timedelta(days=day), 'category_id': random.randint(1, 4)
+    } for day in range(days) for _ in range(random.randint(0, 3))])
+
+
+def _set_invoice_sequences(scale):
+    """بدء عدادات أرقام الفواتير بعد الفواتير المولدة حتى تستمر إضافة الفواتير من النقاط بدون تعارض"""
+    db.session.query(InvoiceSequence).filter(InvoiceSequence.name.in_(['INV', 'PUR'])).delete(synchronize_session=False)
+    _insert(InvoiceSequence.__table__, [
+        {'name': 'INV', 'next_value': scale['sales'] + 1, 'updated_at': datetime.utcnow()},
+        {'name': 'PUR', 'next_value': scale['purchases'] + 1, 'updated_at': datetime.utcnow()}
+    ])
+
+
+def _refresh_derived():
+    """الجداول المشتقة التي تحدثها أوامر CLI في الإنتاج"""
+    rebuild_rollups()
+    db.session.commit()
+    months = sales_months()
+    for month in months:
+        refresh_top_products(month)
+        if NUMPY_AVAILABLE:
+            refresh_classification(month)
+        db.session.commit()
+    create_checkpoint()
+    db.session.commit()
+
+
+def generate(scale, days=730, seed=42, log=print):
+    """
+    ملء قاعدة البيانات الحالية (يجب أن تكون فارغة) بالأحجام المحددة في scale داخل سياق التطبيق.
+    يعيد عدد الصفوف في كل جدول مولد.
+    """
+    if db.session.query(Product.id).first() is not None or db.session.query(Sale.id).first() is not None:
+        raise RuntimeError('قاعدة البيانات تحتوي على بيانات، استخدم قاعدة فارغة')
+
+    random.seed(seed)
+    # التواريخ بتوقيت UTC مثل أوقات الحركات والفواتير التي تسجلها النقاط (datetime.utcnow)
+    first_day = datetime.utcnow().date() - timedelta(days=days - 1)
+    opening_moment = datetime.combine(first_day, datetime.min.time())
+    stock_changes = [0] * scale['products']
+
+    def step(name, function, *args):
+        started = time.perf_counter()
+        result = function(*args)
+        log(f'{name}: {time.perf_counter() - started:.1f} ث')
+        return result
+
+    purchase_prices, selling_prices = step('البيانات المرجعية', _seed_reference, scale, opening_moment)
+    step('المبيعات', _add_invoices, 'sale', scale, selling_prices, first_day, days, stock_changes)
+    step('المشتريات', _add_invoices, 'purchase', scale, purchase_prices, first_day, days, stock_changes)
+    step('الرصيد الافتتاحي', _set_opening_stock, opening_moment, stock_changes)
+    step('المصروفات', _add_expenses, first_day, days)
+    step('عدادات الفواتير', _set_invoice_sequences, scale)
+    step('الجداول المشتقة', _refresh_derived)
+
+    return {
+        model.__tablename__: db.session.query(model).count()
+        for model in (Product, Sale, SaleItem, Purchase, PurchaseItem, StockMovement)
+    }
+
+
+def scale_from_args(args):
+    scale = dict(SCALES[args.scale])
+    for key in scale:
+        value = getattr(args, key, None)
+        if value is not None:
+            scale[key] = value
+    return scale
+
+
+def add_scale_arguments(parser):
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    for key in SCALES['small']:
+        parser.add_argument(f'--{key.replace("_", "-")}', dest=key, type=int, help=f'تغيير {key} في الحجم المختار')
+    parser.add_argument('--days', type=int, default=730, help='عدد الأيام حتى اليوم التي توزع عليها الفواتير')
+    parser.add_argument('--seed', type=int, default=42)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', required=True, help='مسار ملف SQLite جديد')
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+    if os.path.exists(args.database):
+        parser.error(f'الملف موجود بالفعل: {args.database}')
+
+    # قاعدة البيانات يجب تحديدها قبل استيراد التطبيق (الترحيلات تُطبق عند الاستيراد)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.abspath(args.database)
+    os.environ.setdefault('SLOW_QUERY_THRESHOLD_MS', '0')
+    from src.main import app
+
+    with app.app_context():
+        counts = generate(scale_from_args(args), days=args.days, seed=args.seed,
+                          log=lambda message: print(message, file=sys.stderr))
+    print(json.dumps(counts, indent=2))
+
+
+if __name__ == '__main__':
+    main()
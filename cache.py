@@ -0,0 +1,111 @@
+import threading
+import time
+from flask import current_app
+from src.models.models import db, Company, Category
+from src.utils.table_versions import table_version
+
+# مدة صلاحية القيم المخزنة بالثواني عند عدم تحديدها في الإعدادات
+DEFAULT_CACHE_TTL = 300
+
+_registry = {}
+
+
+class CachedValue:
+    """
+    قيمة مخزنة في ذاكرة العملية تُحمّل عند أول استخدام وتُمسح صراحة عند الكتابة.
+    مدة الصلاحية (TTL) احتياطية للنشر بعدة عمليات، حيث لا يصل المسح إلا للعملية التي نفذت الكتابة.
+    مع version (دالة تعيد إصدار البيانات في قاعدة البيانات) يُعاد التحميل كلما تغير الإصدار،
+    فتبقى القيمة متسقة بين العمليات مع ETag المبني على نفس الإصدار.
+    القيمة المعادة مشتركة بين الطلبات ويجب عدم تعديلها.
+    """
+
+    def __init__(self, name, loader, ttl=None, version=None):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self.version = version
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self._value = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+        _registry[name] = self
+
+    def _ttl(self):
+        if self.ttl is not None:
+            return self.ttl
+        return current_app.config.get('REFERENCE_CACHE_TTL', DEFAULT_CACHE_TTL)
+
+    def _fresh(self, version):
+        return time.monotonic() < self._expires_at and version == self._version
+
+    def get(self):
+        # الإصدار يُقرأ قبل البيانات حتى لا تُخزن بيانات قديمة بإصدار أحدث
+        version = self.version() if self.version else None
+        if self._fresh(version):
+            self.hits += 1
+            return self._value
+
+        with self._lock:
+            # عملية أخرى ربما حمّلت القيمة أثناء الانتظار
+            if self._fresh(version):
+                self.hits += 1
+                return self._value
+            self.misses += 1
+            value = self.loader()
+            self._value = value
+            self._version = version
+            self._expires_at = time.monotonic() + self._ttl()
+            return value
+
+    def invalidate(self):
+        """مسح القيمة (يُستدعى بعد commit الكتابة حتى لا تُحمّل بيانات غير مؤكدة)"""
+        with self._lock:
+            self._value = None
+            self._version = None
+            self._expires_at = 0
+
+
+def cache_stats():
+    """عدادات الإصابة والإخفاق لكل قيمة مخزنة"""
+    return {
+        name: {
+            'hits': cached.hits,
+            'misses': cached.misses,
+            'hit_ratio': round(cached.hits / (cached.hits + cached.misses), 4) if cached.hits + cached.misses else None
+        }
+        for name, cached in _registry.items()
+    }
+
+
+def _load_company():
+    company = Company.query.first()
+    if not company:
+        return None
+    return {
+        'id': company.id,
+        'name': company.name,
+        'address': company.address,
+        'phone': company.phone,
+        'email': company.email,
+        'tax_number': company.tax_number,
+        'commercial_register': company.commercial_register,
+        'logo_path': company.logo_path,
+        'manager_signature_path': company.manager_signature_path,
+        'accountant_signature_path': company.accountant_signature_path
+    }
+
+
+def _load_category_names():
+    return dict(db.session.query(Category.id, Category.name).all())
+
+
+# بيانات الشركة (سجل واحد) تُقرأ في كل طباعة فاتورة
+company_cache = CachedValue('company', _load_company)
+
+# أسماء الفئات حسب المعرف، تُستخدم في قوائم الأصناف بدلاً من ربط جدول الفئات لكل صنف.
+# مربوطة بإصدار جدول الفئات لأن قوائم الأصناف تُرسل بـ ETag مبني عليه
+category_names_cache = CachedValue(
+    'category_names', _load_category_names, version=lambda: table_version('categories')
+)
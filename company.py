@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from src.models.models import db, Company
+from src.utils.cache import company_cache, cache_stats
 from datetime import datetime
 
 company_bp = Blueprint('company', __name__)
@@ -7,22 +8,11 @@ company_bp = Blueprint('company', __name__)
 @company_bp.route('/company', methods=['GET'])
 def get_company():
     """الحصول على بيانات الشركة"""
-    company = Company.query.first()
+    company = company_cache.get()
     if not company:
         return jsonify({'message': 'لم يتم العثور على بيانات الشركة'}), 404
     
-    return jsonify({
-        'id': company.id,
-        'name': company.name,
-        'address': company.address,
-        'phone': company.phone,
-        'email': company.email,
-        'tax_number': company.tax_number,
-        'commercial_register': company.commercial_register,
-        'logo_path': company.logo_path,
-        'manager_signature_path': company.manager_signature_path,
-        'accountant_signature_path': company.accountant_signature_path
-    })
+    return jsonify(company)
 
 @company_bp.route('/company', methods=['POST'])
 def create_or_update_company():
@@ -59,7 +49,13 @@ def create_or_update_company():
     
     try:
         db.session.commit()
+        company_cache.invalidate()
         return jsonify({'message': 'تم حفظ بيانات الشركة بنجاح'}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'حدث خطأ أثناء حفظ البيانات'}), 500
+
+@company_bp.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """عدادات الإصابة والإخفاق للبيانات المخزنة في ذاكرة العملية"""
+    return jsonify(cache_stats())
@@ -0,0 +1,111 @@
+import os
+from sqlalchemy import event
+
+BASE_DIR = os.path.dirname(__file__)
+
+
+def _env_bool(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def _database_url():
+    """رابط قاعدة البيانات من متغير البيئة DATABASE_URL، وإلا SQLite المحلية"""
+    url = os.environ.get('DATABASE_URL')
+    if not url:
+        return f"sqlite:///{os.path.join(BASE_DIR, 'database', 'app.db')}"
+    # بعض خدمات الاستضافة ما زالت تستخدم البادئة القديمة postgres://
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+class Config:
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT')
+    DEBUG = False
+
+    SQLALCHEMY_DATABASE_URI = _database_url()
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # إعدادات مجمع الاتصالات (تُطبق على SQLite و PostgreSQL)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        # فحص الاتصال قبل استخدامه مفيد لخوادم قواعد البيانات فقط
+        'pool_pre_ping': not SQLALCHEMY_DATABASE_URI.startswith('sqlite')
+    }
+
+    # أوامر PRAGMA التي تُنفذ على كل اتصال SQLite جديد:
+    # WAL يسمح للقراءة بالتزامن مع الكتابة، و busy_timeout ينتظر القفل بدلاً من الفشل الفوري
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 268435456)),  # 256MB
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -65536)),  # 64MB (القيمة السالبة بالكيلوبايت)
+        'temp_store': 'MEMORY'
+    }
+
+    # ترقيم الفواتير: فصل العداد حسب السنة، وحجم الكتلة المحجوزة مسبقاً لكل عملية (1 = بدون كتل)
+    INVOICE_SEQUENCE_PER_YEAR = _env_bool('INVOICE_SEQUENCE_PER_YEAR')
+    INVOICE_SEQUENCE_BLOCK_SIZE = int(os.environ.get('INVOICE_SEQUENCE_BLOCK_SIZE', 1))
+
+    # مدة صلاحية البيانات المرجعية المخزنة في ذاكرة العملية (الشركة، أسماء الفئات) بالثواني؛
+    # المسح الصريح عند الكتابة يصل للعملية الحالية فقط، والمدة تحد من قدم بيانات الشركة في العمليات الأخرى
+    # (أسماء الفئات تُعاد قراءتها أيضاً عند تغير إصدار جدول الفئات)
+    REFERENCE_CACHE_TTL = int(os.environ.get('REFERENCE_CACHE_TTL', 300))
+
+    # عدد الأصناف المحفوظة لكل شهر في قوائم أفضل الأصناف المحسوبة مسبقاً
+    TOP_PRODUCTS_K = int(os.environ.get('TOP_PRODUCTS_K', 50))
+
+    # فواتير PDF: خط TrueType يدعم العربية (يتم البحث عن خط شائع إذا لم يحدد)، ومجلد حفظ الملفات المولدة
+    INVOICE_PDF_FONT = os.environ.get('INVOICE_PDF_FONT')
+    INVOICE_PDF_CACHE_DIR = os.environ.get('INVOICE_PDF_CACHE_DIR', os.path.join(BASE_DIR, 'database', 'invoice_pdfs'))
+    # أقصى عدد من الفواتير في طلب دفعة واحد عبر الواجهة؛ الدفعات الأكبر بالأمر flask render-invoices
+    INVOICE_BATCH_MAX = int(os.environ.get('INVOICE_BATCH_MAX', 200))
+
+    # مهام التقارير في الخلفية: عدد الخيوط، أقصى عدد من المهام المنتظرة، ومدة الاحتفاظ بالنتيجة بالثواني
+    REPORT_JOB_WORKERS = int(os.environ.get('REPORT_JOB_WORKERS', 2))
+    REPORT_JOB_MAX_QUEUED = int(os.environ.get('REPORT_JOB_MAX_QUEUED', 100))
+    REPORT_JOB_TTL = int(os.environ.get('REPORT_JOB_TTL', 300))
+
+    # سجل الاستعلامات البطيئة: الحد بالمللي ثانية (0 يعطل التسجيل)، ومسار الملف الدوار وحجمه وعدد نسخه
+    SLOW_QUERY_THRESHOLD_MS = int(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 500))
+    SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', os.path.join(BASE_DIR, 'database', 'slow_queries.log'))
+    SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', 5 * 1024 * 1024))
+    SLOW_QUERY_LOG_BACKUPS = int(os.environ.get('SLOW_QUERY_LOG_BACKUPS', 3))
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+
+
+class ProductionConfig(Config):
+    pass
+
+
+config_by_name = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig
+}
+
+
+def get_config(name=None):
+    """اختيار ملف الإعدادات حسب APP_ENV (development افتراضياً)"""
+    return config_by_name.get(name or os.environ.get('APP_ENV', 'development'), DevelopmentConfig)
+
+
+def configure_sqlite(engine, pragmas):
+    """تسجيل مستمع يطبق أوامر PRAGMA على كل اتصال جديد بقاعدة بيانات SQLite"""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
@@ -1,49 +1,26 @@
 from flask import Blueprint, request, jsonify
 from src.models.models import db, Customer, Supplier
+from src.models.serializers import customer_serializer, supplier_serializer
+from src.utils.table_versions import conditional_get
 from datetime import datetime
 
 customers_suppliers_bp = Blueprint('customers_suppliers', __name__)
 
 # العملاء
 @customers_suppliers_bp.route('/customers', methods=['GET'])
+@conditional_get('customers')
 def get_customers():
     """الحصول على قائمة العملاء"""
     customers = Customer.query.filter_by(is_active=True).all()
     
-    customers_list = []
-    for customer in customers:
-        customers_list.append({
-            'id': customer.id,
-            'name': customer.name,
-            'contact_person': customer.contact_person,
-            'address': customer.address,
-            'phone': customer.phone,
-            'email': customer.email,
-            'tax_number': customer.tax_number,
-            'customer_type': customer.customer_type,
-            'is_active': customer.is_active,
-            'created_at': customer.created_at.isoformat() if customer.created_at else None
-        })
-    
-    return jsonify(customers_list)
+    return jsonify(customer_serializer.many(customers))
 
 @customers_suppliers_bp.route('/customers/<int:customer_id>', methods=['GET'])
 def get_customer(customer_id):
     """الحصول على بيانات عميل محدد"""
     customer = Customer.query.get_or_404(customer_id)
     
-    return jsonify({
-        'id': customer.id,
-        'name': customer.name,
-        'contact_person': customer.contact_person,
-        'address': customer.address,
-        'phone': customer.phone,
-        'email': customer.email,
-        'tax_number': customer.tax_number,
-        'customer_type': customer.customer_type,
-        'is_active': customer.is_active,
-        'created_at': customer.created_at.isoformat() if customer.created_at else None
-    })
+    return jsonify(customer_serializer.dump(customer))
 
 @customers_suppliers_bp.route('/customers', methods=['POST'])
 def create_customer():
@@ -107,44 +84,19 @@ def delete_customer(customer_id):
 
 # الموردين
 @customers_suppliers_bp.route('/suppliers', methods=['GET'])
+@conditional_get('suppliers')
 def get_suppliers():
     """الحصول على قائمة الموردين"""
     suppliers = Supplier.query.filter_by(is_active=True).all()
     
-    suppliers_list = []
-    for supplier in suppliers:
-        suppliers_list.append({
-            'id': supplier.id,
-            'name': supplier.name,
-            'contact_person': supplier.contact_person,
-            'address': supplier.address,
-            'phone': supplier.phone,
-            'email': supplier.email,
-            'tax_number': supplier.tax_number,
-            'commercial_register': supplier.commercial_register,
-            'is_active': supplier.is_active,
-            'created_at': supplier.created_at.isoformat() if supplier.created_at else None
-        })
-    
-    return jsonify(suppliers_list)
+    return jsonify(supplier_serializer.many(suppliers))
 
 @customers_suppliers_bp.route('/suppliers/<int:supplier_id>', methods=['GET'])
 def get_supplier(supplier_id):
     """الحصول على بيانات مورد محدد"""
     supplier = Supplier.query.get_or_404(supplier_id)
     
-    return jsonify({
-        'id': supplier.id,
-        'name': supplier.name,
-        'contact_person': supplier.contact_person,
-        'address': supplier.address,
-        'phone': supplier.phone,
-        'email': supplier.email,
-        'tax_number': supplier.tax_number,
-        'commercial_register': supplier.commercial_register,
-        'is_active': supplier.is_active,
-        'created_at': supplier.created_at.isoformat() if supplier.created_at else None
-    })
+    return jsonify(supplier_serializer.dump(supplier))
 
 @customers_suppliers_bp.route('/suppliers', methods=['POST'])
 def create_supplier():
@@ -0,0 +1,15 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from src.models.models import db
+
+
+def upsert_insert(table):
+    """
+    إرجاع جملة INSERT تدعم ON CONFLICT حسب نوع قاعدة البيانات الحالية،
+    أو None إذا كانت قاعدة البيانات لا تدعمها.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        return sqlite.insert(table)
+    if dialect == 'postgresql':
+        return postgresql.insert(table)
+    return None
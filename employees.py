@@ -1,49 +1,26 @@
 from flask import Blueprint, request, jsonify
 from src.models.models import db, Employee
+from src.models.serializers import employee_serializer
+from src.utils.table_versions import conditional_get
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
 employees_bp = Blueprint('employees', __name__)
 
 @employees_bp.route('/employees', methods=['GET'])
+@conditional_get('employees')
 def get_employees():
     """الحصول على قائمة الموظفين"""
     employees = Employee.query.filter_by(is_active=True).all()
     
-    employees_list = []
-    for employee in employees:
-        employees_list.append({
-            'id': employee.id,
-            'name': employee.name,
-            'position': employee.position,
-            'phone': employee.phone,
-            'email': employee.email,
-            'salary': float(employee.salary) if employee.salary else None,
-            'username': employee.username,
-            'role': employee.role,
-            'is_active': employee.is_active,
-            'created_at': employee.created_at.isoformat() if employee.created_at else None
-        })
-    
-    return jsonify(employees_list)
+    return jsonify(employee_serializer.many(employees))
 
 @employees_bp.route('/employees/<int:employee_id>', methods=['GET'])
 def get_employee(employee_id):
     """الحصول على بيانات موظف محدد"""
     employee = Employee.query.get_or_404(employee_id)
     
-    return jsonify({
-        'id': employee.id,
-        'name': employee.name,
-        'position': employee.position,
-        'phone': employee.phone,
-        'email': employee.email,
-        'salary': float(employee.salary) if employee.salary else None,
-        'username': employee.username,
-        'role': employee.role,
-        'is_active': employee.is_active,
-        'created_at': employee.created_at.isoformat() if employee.created_at else None
-    })
+    return jsonify(employee_serializer.dump(employee))
 
 @employees_bp.route('/employees', methods=['POST'])
 def create_employee():
@@ -0,0 +1,188 @@
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from src.models.models import (
+    db, Sale, SaleItem, Purchase, PurchaseItem, Product, Customer, Supplier, StockMovement, Employee
+)
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+from sqlalchemy import select
+import csv
+import json
+
+exports_bp = Blueprint('exports', __name__)
+
+# عدد الصفوف التي تُجلب من المؤشر في كل دفعة
+EXPORT_BATCH_SIZE = 1000
+
+
+class _Echo:
+    """كائن كتابة يعيد السطر بدلاً من تخزينه حتى يكتب csv.writer سطراً واحداً في كل مرة"""
+
+    def write(self, value):
+        return value
+
+
+def _format_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _date_range(column, is_datetime=False):
+    """
+    شروط الفترة من start_date و end_date (يوم النهاية مشمول بالكامل للأعمدة الزمنية).
+    ترفع ValueError إذا كانت صيغة التاريخ غير صالحة.
+    """
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+
+    filters = []
+    if start_date:
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        filters.append(column >= (start if is_datetime else start.date()))
+    if end_date:
+        end = datetime.strptime(end_date, '%Y-%m-%d')
+        if is_datetime:
+            filters.append(column < end + timedelta(days=1))
+        else:
+            filters.append(column <= end.date())
+    return filters
+
+
+def _stream(statement, filename):
+    """
+    بث نتائج الاستعلام مباشرة من مؤشر قاعدة البيانات بصيغة CSV أو NDJSON
+    دون تحميل النتائج كاملة في الذاكرة.
+    """
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'message': 'صيغة التصدير غير مدعومة (csv أو ndjson)'}), 400
+
+    columns = [column.name for column in statement.selected_columns]
+    statement = statement.execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    def generate_csv():
+        writer = csv.writer(_Echo())
+        # BOM حتى يتعرف Excel على الترميز العربي
+        yield '\ufeff' + writer.writerow(columns)
+        for row in db.session.execute(statement):
+            yield writer.writerow([_format_value(value) for value in row])
+
+    def generate_ndjson():
+        for row in db.session.execute(statement):
+            yield json.dumps(
+                {name: _format_value(value) for name, value in zip(columns, row)},
+                ensure_ascii=False
+            ) + '\n'
+
+    if export_format == 'csv':
+        body, content_type = generate_csv(), 'text/csv; charset=utf-8'
+    else:
+        body, content_type = generate_ndjson(), 'application/x-ndjson; charset=utf-8'
+
+    return Response(
+        stream_with_context(body),
+        content_type=content_type,
+        headers={'Content-Disposition': f'attachment; filename={filename}.{export_format}'}
+    )
+
+
+@exports_bp.route('/exports/sales', methods=['GET'])
+def export_sales():
+    """تصدير فواتير المبيعات"""
+    try:
+        filters = _date_range(Sale.sale_date)
+    except ValueError:
+        return jsonify({'message': 'صيغة التاريخ غير صالحة'}), 400
+
+    statement = select(
+        Sale.id, Sale.invoice_number, Sale.sale_date, Sale.customer_id,
+        Customer.name.label('customer_name'), Sale.employee_id, Sale.invoice_type, Sale.status,
+        Sale.total_amount, Sale.tax_amount, Sale.discount_amount, Sale.net_amount,
+        Sale.notes, Sale.created_at
+    ).outerjoin(Customer, Sale.customer_id == Customer.id).where(
+        *filters
+    ).order_by(Sale.id)
+
+    return _stream(statement, 'sales')
+
+
+@exports_bp.route('/exports/purchases', methods=['GET'])
+def export_purchases():
+    """تصدير فواتير المشتريات"""
+    try:
+        filters = _date_range(Purchase.purchase_date)
+    except ValueError:
+        return jsonify({'message': 'صيغة التاريخ غير صالحة'}), 400
+
+    statement = select(
+        Purchase.id, Purchase.invoice_number, Purchase.purchase_date, Purchase.supplier_id,
+        Supplier.name.label('supplier_name'), Purchase.employee_id, Purchase.status,
+        Purchase.total_amount, Purchase.tax_amount, Purchase.discount_amount, Purchase.net_amount,
+        Purchase.notes, Purchase.created_at
+    ).outerjoin(Supplier, Purchase.supplier_id == Supplier.id).where(
+        *filters
+    ).order_by(Purchase.id)
+
+    return _stream(statement, 'purchases')
+
+
+@exports_bp.route('/exports/sale-items', methods=['GET'])
+def export_sale_items():
+    """تصدير عناصر فواتير المبيعات"""
+    try:
+        filters = _date_range(Sale.sale_date)
+    except ValueError:
+        return jsonify({'message': 'صيغة التاريخ غير صالحة'}), 400
+
+    statement = select(
+        SaleItem.id, SaleItem.sale_id, Sale.invoice_number, Sale.sale_date, Sale.status,
+        SaleItem.product_id, Product.code.label('product_code'), Product.name.label('product_name'),
+        SaleItem.quantity, SaleItem.unit_price, SaleItem.total_price
+    ).join(Sale, SaleItem.sale_id == Sale.id).outerjoin(
+        Product, SaleItem.product_id == Product.id
+    ).where(*filters).order_by(SaleItem.id)
+
+    return _stream(statement, 'sale_items')
+
+
+@exports_bp.route('/exports/purchase-items', methods=['GET'])
+def export_purchase_items():
+    """تصدير عناصر فواتير المشتريات"""
+    try:
+        filters = _date_range(Purchase.purchase_date)
+    except ValueError:
+        return jsonify({'message': 'صيغة التاريخ غير صالحة'}), 400
+
+    statement = select(
+        PurchaseItem.id, PurchaseItem.purchase_id, Purchase.invoice_number, Purchase.purchase_date,
+        Purchase.status, PurchaseItem.product_id, Product.code.label('product_code'),
+        Product.name.label('product_name'), PurchaseItem.quantity, PurchaseItem.unit_price,
+        PurchaseItem.total_price
+    ).join(Purchase, PurchaseItem.purchase_id == Purchase.id).outerjoin(
+        Product, PurchaseItem.product_id == Product.id
+    ).where(*filters).order_by(PurchaseItem.id)
+
+    return _stream(statement, 'purchase_items')
+
+
+@exports_bp.route('/exports/stock-movements', methods=['GET'])
+def export_stock_movements():
+    """تصدير حركات المخزون"""
+    try:
+        filters = _date_range(StockMovement.movement_date, is_datetime=True)
+    except ValueError:
+        return jsonify({'message': 'صيغة التاريخ غير صالحة'}), 400
+
+    statement = select(
+        StockMovement.id, StockMovement.movement_date, StockMovement.product_id,
+        Product.code.label('product_code'), Product.name.label('product_name'),
+        StockMovement.movement_type, StockMovement.quantity, StockMovement.reference_type,
+        StockMovement.reference_id, StockMovement.employee_id, Employee.name.label('employee_name'),
+        StockMovement.notes
+    ).outerjoin(Product, StockMovement.product_id == Product.id).outerjoin(
+        Employee, StockMovement.employee_id == Employee.id
+    ).where(*filters).order_by(StockMovement.id)
+
+    return _stream(statement, 'stock_movements')
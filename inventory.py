@@ -1,6 +1,12 @@
 from flask import Blueprint, request, jsonify
-from src.models.models import db, Product, StockMovement, Employee
-from datetime import datetime, date
+from src.models.models import db, Product, StockMovement, Employee, ProductClassification
+from src.models.serializers import product_serializer, stock_movement_serializer
+from src.utils.cache import category_names_cache
+from src.utils.stock_checkpoints import stock_as_of
+from src.utils.reorder import NUMPY_AVAILABLE, MAX_LOOKBACK_DAYS, reorder_suggestions
+from src.utils.abc_analysis import CLASS_COLUMNS, classification_report, latest_classes
+from src.utils.top_products import month_bounds
+from datetime import datetime, date, timedelta
 from sqlalchemy import func
 
 inventory_bp = Blueprint('inventory', __name__)
@@ -13,7 +19,7 @@ def get_stock_movements():
     product_id = request.args.get('product_id', type=int)
     movement_type = request.args.get('movement_type')
     
-    query = StockMovement.query
+    query = stock_movement_serializer.apply(StockMovement.query)
     
     if product_id:
         query = query.filter_by(product_id=product_id)
@@ -24,20 +30,7 @@ def get_stock_movements():
         page=page, per_page=per_page, error_out=False
     )
     
-    movements_list = []
-    for movement in movements.items:
-        movements_list.append({
-            'id': movement.id,
-            'product_id': movement.product_id,
-            'product_name': movement.product.name if movement.product else None,
-            'movement_type': movement.movement_type,
-            'quantity': movement.quantity,
-            'reference_type': movement.reference_type,
-            'reference_id': movement.reference_id,
-            'notes': movement.notes,
-            'movement_date': movement.movement_date.isoformat() if movement.movement_date else None,
-            'employee_name': movement.employee.name if movement.employee else None
-        })
+    movements_list = stock_movement_serializer.many(movements.items)
     
     return jsonify({
         'movements': movements_list,
@@ -68,6 +61,7 @@ def stock_adjustment():
             product_id=product.id,
             movement_type='adjustment',
             quantity=abs(difference),
+            quantity_change=difference,
             reference_type='adjustment',
             notes=data.get('notes', f'تعديل المخزون من {old_stock} إلى {new_stock}'),
             employee_id=data.get('employee_id')
@@ -90,10 +84,11 @@ def stock_adjustment():
 @inventory_bp.route('/inventory/low-stock', methods=['GET'])
 def get_low_stock_products():
     """الحصول على الأصناف تحت الحد الأدنى"""
-    products = Product.query.filter(
+    products = product_serializer.apply(Product.query).filter(
         Product.current_stock <= Product.min_stock,
         Product.is_active == True
     ).all()
+    category_names = category_names_cache.get()
     
     low_stock_list = []
     for product in products:
@@ -104,7 +99,7 @@ def get_low_stock_products():
             'current_stock': product.current_stock,
             'min_stock': product.min_stock,
             'max_stock': product.max_stock,
-            'category_name': product.category.name if product.category else None,
+            'category_name': category_names.get(product.category_id),
             'shortage': product.min_stock - product.current_stock if product.current_stock < product.min_stock else 0
         })
     
@@ -112,8 +107,19 @@ def get_low_stock_products():
 
 @inventory_bp.route('/inventory/stock-report', methods=['GET'])
 def get_stock_report():
-    """تقرير المخزون الشامل"""
-    products = Product.query.filter_by(is_active=True).all()
+    """
+    تقرير المخزون الشامل مع فئة ABC (حسب الإيراد) و XYZ لكل صنف من تصنيف الشهر abc_month
+    أو آخر شهر محسوب، والتصفية حسب abc_class و xyz_class.
+    """
+    products = product_serializer.apply(Product.query).filter_by(is_active=True).all()
+    category_names = category_names_cache.get()
+    classification_month, classes = latest_classes(request.args.get('abc_month'))
+    abc_class = request.args.get('abc_class')
+    xyz_class = request.args.get('xyz_class')
+    if abc_class:
+        products = [product for product in products if classes.get(product.id, (None, None))[0] == abc_class]
+    if xyz_class:
+        products = [product for product in products if classes.get(product.id, (None, None))[1] == xyz_class]
     
     total_products = len(products)
     low_stock_count = 0
@@ -148,7 +154,9 @@ def get_stock_report():
             'selling_price': float(product.selling_price) if product.selling_price else 0,
             'stock_value': float(product_value),
             'stock_status': stock_status,
-            'category_name': product.category.name if product.category else None
+            'category_name': category_names.get(product.category_id),
+            'abc_class': classes.get(product.id, (None, None))[0],
+            'xyz_class': classes.get(product.id, (None, None))[1]
         })
     
     return jsonify({
@@ -157,7 +165,8 @@ def get_stock_report():
             'low_stock_count': low_stock_count,
             'out_of_stock_count': out_of_stock_count,
             'overstock_count': overstock_count,
-            'total_value': float(total_value)
+            'total_value': float(total_value),
+            'classification_month': classification_month
         },
         'products': products_list
     })
@@ -195,7 +204,8 @@ def get_inventory_valuation():
     """تقييم المخزون"""
     method = request.args.get('method', 'purchase_price')  # purchase_price or selling_price
     
-    products = Product.query.filter_by(is_active=True).all()
+    products = product_serializer.apply(Product.query).filter_by(is_active=True).all()
+    category_names = category_names_cache.get()
     
     total_value = 0
     categories_value = {}
@@ -210,7 +220,7 @@ def get_inventory_valuation():
         product_value = product.current_stock * unit_price
         total_value += product_value
         
-        category_name = product.category.name if product.category else 'غير مصنف'
+        category_name = category_names.get(product.category_id, 'غير مصنف')
         if category_name not in categories_value:
             categories_value[category_name] = 0
         categories_value[category_name] += product_value
@@ -234,11 +244,38 @@ def get_inventory_valuation():
 
 @inventory_bp.route('/inventory/reorder-suggestions', methods=['GET'])
 def get_reorder_suggestions():
-    """اقتراحات إعادة الطلب"""
-    products = Product.query.filter(
+    """
+    اقتراحات إعادة الطلب حسب معدل الطلب الفعلي (متوسط الطلب اليومي وتذبذبه ومدة التوريد).
+    المعاملات: lookback_days (حتى 3650)، recent_days (لا تتجاوز lookback_days)، lead_time_days،
+    review_days، service_level، و all=1 لكامل الأصناف.
+    """
+    if not NUMPY_AVAILABLE:
+        return _min_stock_reorder_suggestions()
+    
+    try:
+        options = {
+            'lookback_days': request.args.get('lookback_days', 90, type=int),
+            'recent_days': request.args.get('recent_days', 28, type=int),
+            'lead_time_days': request.args.get('lead_time_days', 7, type=int),
+            'review_days': request.args.get('review_days', 7, type=int),
+            'service_level': request.args.get('service_level', 0.95, type=float)
+        }
+        if not 1 <= options['recent_days'] <= options['lookback_days'] <= MAX_LOOKBACK_DAYS \
+                or options['lead_time_days'] < 0 or options['review_days'] < 0 \
+                or not 0.5 <= options['service_level'] < 1:
+            raise ValueError
+    except ValueError:
+        return jsonify({'message': 'قيم المعاملات غير صالحة'}), 400
+    
+    return jsonify(reorder_suggestions(include_all=request.args.get('all') == '1', **options))
+
+def _min_stock_reorder_suggestions():
+    """القاعدة البسيطة عند عدم توفر NumPy: الأصناف تحت الحد الأدنى حتى الحد الأعلى أو ضعف الحد الأدنى"""
+    products = product_serializer.apply(Product.query).filter(
         Product.current_stock <= Product.min_stock,
         Product.is_active == True
     ).all()
+    category_names = category_names_cache.get()
     
     suggestions = []
     for product in products:
@@ -253,7 +290,79 @@ def get_reorder_suggestions():
             'max_stock': product.max_stock,
             'suggested_quantity': suggested_quantity,
             'estimated_cost': float((suggested_quantity * product.purchase_price) if product.purchase_price else 0),
-            'category_name': product.category.name if product.category else None
+            'category_name': category_names.get(product.category_id)
         })
     
     return jsonify(suggestions)
+
+@inventory_bp.route('/inventory/abc-classification', methods=['GET'])
+def get_abc_classification():
+    """
+    تصنيف ABC/XYZ للأصناف في شهر (month=YYYY-MM، الافتراضي الشهر الحالي) من التصنيف المحفوظ إن وجد،
+    مع التصفية حسب الفئة (class) وفئة التذبذب (xyz) والترتيب حسب class_by (revenue أو quantity).
+    """
+    month = request.args.get('month') or date.today().strftime('%Y-%m')
+    class_by = request.args.get('class_by', 'revenue')
+    abc_class = request.args.get('class')
+    xyz_class = request.args.get('xyz')
+    
+    if class_by not in CLASS_COLUMNS:
+        return jsonify({'message': 'قيمة class_by غير صالحة (revenue أو quantity)'}), 400
+    
+    try:
+        month_bounds(month)
+    except ValueError:
+        return jsonify({'message': 'صيغة الشهر يجب أن تكون YYYY-MM'}), 400
+    
+    if not NUMPY_AVAILABLE and not ProductClassification.query.filter_by(period=month).first():
+        return jsonify({'message': 'لم يتم حساب تصنيف هذا الشهر، وحسابه يتطلب تثبيت numpy'}), 501
+    
+    stored, summary, products = classification_report(month, class_by, abc_class, xyz_class)
+    
+    return jsonify({
+        'month': month,
+        'class_by': class_by,
+        'stored': stored,
+        'summary': summary,
+        'products': products
+    })
+
+@inventory_bp.route('/inventory/stock-as-of', methods=['GET'])
+def get_stock_as_of():
+    """
+    رصيد المخزون في تاريخ سابق (نهاية اليوم المحدد في date، أو لحظة محددة في at بصيغة ISO)
+    محسوباً من أقرب لقطة مخزون والحركات التالية لها فقط.
+    """
+    date_value = request.args.get('date')
+    at_value = request.args.get('at')
+    
+    try:
+        if at_value:
+            at = datetime.fromisoformat(at_value)
+        elif date_value:
+            at = datetime.strptime(date_value, '%Y-%m-%d') + timedelta(days=1) - timedelta(microseconds=1)
+        else:
+            return jsonify({'message': 'يجب تحديد date أو at'}), 400
+        product_ids = [int(value) for value in request.args.get('product_id', '').split(',') if value.strip()]
+    except ValueError:
+        return jsonify({'message': 'قيم التاريخ أو معرفات الأصناف غير صالحة'}), 400
+    
+    checkpoint, stock = stock_as_of(at, product_ids or None)
+    
+    products = db.session.query(Product.id, Product.name, Product.code).filter(
+        Product.id.in_(list(stock))
+    ).order_by(Product.id).all() if stock else []
+    
+    return jsonify({
+        'as_of': at.isoformat(),
+        'checkpoint': {
+            'id': checkpoint.id,
+            'taken_at': checkpoint.taken_at.isoformat()
+        } if checkpoint else None,
+        'products': [{
+            'product_id': product.id,
+            'product_name': product.name,
+            'product_code': product.code,
+            'stock': stock[product.id]
+        } for product in products]
+    })
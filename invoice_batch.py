@@ -0,0 +1,171 @@
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from src.models.models import Sale, Purchase
+from src.models.serializers import sale_detail_serializer, purchase_detail_serializer
+from src.utils.cache import company_cache
+from src.utils.invoices import (
+    PDF_AVAILABLE, sale_invoice_data, purchase_invoice_data, find_font, company_images,
+    cache_path, write_cached, render_invoice_pdf
+)
+
+# نوع الفاتورة: (النموذج، المُحوِّل مع التحميل المسبق، عمود التاريخ، دالة بناء البيانات)
+INVOICE_KINDS = {
+    'sale': (Sale, sale_detail_serializer, Sale.sale_date, sale_invoice_data),
+    'purchase': (Purchase, purchase_detail_serializer, Purchase.purchase_date, purchase_invoice_data),
+}
+
+
+def _invoice_query(kind, ids=None, start_date=None, end_date=None):
+    model, _, date_column, _ = INVOICE_KINDS[kind]
+    query = model.query
+    if ids:
+        query = query.filter(model.id.in_(ids))
+    if start_date:
+        query = query.filter(date_column >= start_date)
+    if end_date:
+        query = query.filter(date_column <= end_date)
+    return query
+
+
+def count_invoices(kind, ids=None, start_date=None, end_date=None):
+    """عدد الفواتير المطابقة دون تحميلها (للتحقق من حد الدفعة قبل التوليد)"""
+    return _invoice_query(kind, ids, start_date, end_date).count()
+
+
+def load_invoices(kind, ids=None, start_date=None, end_date=None):
+    """
+    تحميل الفواتير مع العميل/المورد والعناصر والأصناف باستعلامات مجمعة قليلة
+    (joinedload للطرف، و selectinload للعناصر على دفعات IN).
+    """
+    model, serializer, _, _ = INVOICE_KINDS[kind]
+    return serializer.apply(_invoice_query(kind, ids, start_date, end_date)).order_by(model.id).all()
+
+
+def _render_task(task):
+    """تُنفذ في عملية منفصلة: توليد ملف الفاتورة إذا لم يكن موجوداً في ذاكرة القرص"""
+    path, invoice_data, font_path, images = task
+    if not os.path.exists(path):
+        write_cached(path, render_invoice_pdf(invoice_data, font_path, images))
+    return path
+
+
+def _pool_context():
+    """
+    سياق العمليات بدون fork: _render_task يأخذ بيانات عادية فقط ولا يستخدم التطبيق أو قاعدة البيانات،
+    فتكفيه عمليات جديدة. forkserver يستورد وحدات التوليد مرة واحدة في خادمه ويتفرع منها، وإلا spawn.
+    هذه العمليات تعيد استيراد وحدة __main__، لذا يُستخدم المجمع من أمر render-invoices فقط
+    (__main__ فيه هو سكربت flask) وليس من الخادم حيث قد تكون main.py التي تنشئ التطبيق وتطبق الترحيلات.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def render_invoices(kind, invoices, workers=None, progress=None):
+    """
+    توليد ملفات PDF لعدة فواتير مع تخطي الملفات الموجودة، على مجمع عمليات بعدد الأنوية
+    أو في العملية الحالية إذا كان workers = 0.
+    يعيد قائمة (اسم الملف، المسار). progress(عدد المنجز، الإجمالي) يُستدعى بعد كل فاتورة.
+    """
+    if not PDF_AVAILABLE:
+        raise RuntimeError('توليد PDF غير متاح: يجب تثبيت reportlab و arabic-reshaper و python-bidi')
+    font_path = find_font(current_app.config.get('INVOICE_PDF_FONT'))
+    if not font_path:
+        raise RuntimeError('لم يتم العثور على خط يدعم العربية، حدد المسار في INVOICE_PDF_FONT')
+
+    build_data = INVOICE_KINDS[kind][3]
+    company = company_cache.get()
+    images = company_images(company, current_app.static_folder)
+    cache_dir = current_app.config['INVOICE_PDF_CACHE_DIR']
+
+    files = []
+    tasks = []
+    for invoice in invoices:
+        path = cache_path(cache_dir, kind, invoice.id, invoice.updated_at, company, images)
+        files.append((f'{invoice.invoice_number or f"{kind}-{invoice.id}"}.pdf', path))
+        if not os.path.exists(path):
+            tasks.append((path, build_data(invoice, company), font_path, images))
+
+    total = len(files)
+    done = total - len(tasks)
+    if progress:
+        progress(done, total)
+
+    if tasks and workers == 0:
+        for task in tasks:
+            _render_task(task)
+            done += 1
+            if progress:
+                progress(done, total)
+    elif tasks:
+        workers = workers or os.cpu_count() or 1
+        # تجميع عدة فواتير في كل رسالة بين العمليات لتقليل تكلفة النقل
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as executor:
+            for _ in executor.map(_render_task, tasks, chunksize=chunksize):
+                done += 1
+                if progress:
+                    progress(done, total)
+
+    return files
+
+
+def write_zip(files, target):
+    """تجميع الملفات في أرشيف ZIP (بدون ضغط لأن ملفات PDF مضغوطة أصلاً)"""
+    with zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for name, path in files:
+            archive.write(path, arcname=name)
+
+
+def parse_ids(value):
+    """تحويل قائمة المعرفات من نص مفصول بفواصل أو من قائمة JSON"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = [part for part in value.split(',') if part.strip()]
+    return [int(part) for part in value]
+
+
+@click.command('render-invoices')
+@click.option('--type', 'kind', type=click.Choice(list(INVOICE_KINDS)), default='sale')
+@click.option('--ids', help='معرفات الفواتير مفصولة بفواصل')
+@click.option('--start-date', help='YYYY-MM-DD')
+@click.option('--end-date', help='YYYY-MM-DD')
+@click.option('--workers', type=int, help='عدد العمليات (الافتراضي عدد الأنوية)')
+@click.option('--output', required=True, help='مسار ملف ZIP الناتج')
+@with_appcontext
+def render_invoices_command(kind, ids, start_date, end_date, workers, output):
+    """توليد فواتير PDF لفترة أو لقائمة معرفات وتجميعها في ملف ZIP"""
+    try:
+        ids = parse_ids(ids)
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    invoices = load_invoices(kind, ids, start_date, end_date)
+    if not invoices:
+        raise click.ClickException('لا توجد فواتير مطابقة')
+
+    with click.progressbar(length=len(invoices), label='توليد الفواتير') as bar:
+        reported = [0]
+
+        def progress(done, total):
+            bar.update(done - reported[0])
+            reported[0] = done
+
+        try:
+            files = render_invoices(kind, invoices, workers=workers, progress=progress)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+
+    write_zip(files, output)
+    click.echo(f'تم توليد {len(files)} فاتورة في {output}')
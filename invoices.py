@@ -0,0 +1,284 @@
+import hashlib
+import json
+import os
+import threading
+from io import BytesIO
+
+# مكتبات توليد PDF اختيارية: reportlab للرسم، و arabic_reshaper + python-bidi لتشكيل النص العربي من اليمين لليسار
+try:
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.pdfgen import canvas
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+
+# خطوط شائعة تحتوي على الحروف العربية، تُستخدم إذا لم يتم تحديد INVOICE_PDF_FONT
+FONT_CANDIDATES = (
+    '/usr/share/fonts/truetype/noto/NotoNaskhArabic-Regular.ttf',
+    '/usr/share/fonts/truetype/noto/NotoSansArabic-Regular.ttf',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/dejavu/DejaVuSans.ttf',
+    'C:\\Windows\\Fonts\\arial.ttf',
+)
+
+
+def sale_invoice_data(sale, company):
+    """بيانات طباعة فاتورة مبيعات (نفس الشكل المستخدم في JSON و PDF)"""
+    return {
+        'company': _company_header(company),
+        'invoice': {
+            'number': sale.invoice_number,
+            'date': sale.sale_date.strftime('%Y-%m-%d') if sale.sale_date else '',
+            'type': 'فاتورة ضريبية' if sale.invoice_type == 'tax' else 'فاتورة عادية'
+        },
+        'customer': {
+            'name': sale.customer.name if sale.customer else 'عميل نقدي',
+            'address': sale.customer.address if sale.customer else '',
+            'phone': sale.customer.phone if sale.customer else '',
+            'tax_number': sale.customer.tax_number if sale.customer else ''
+        },
+        'items': _invoice_items(sale.items),
+        'totals': {
+            'subtotal': float(sale.total_amount or 0),
+            'discount': float(sale.discount_amount or 0),
+            'tax': float(sale.tax_amount or 0),
+            'total': float(sale.net_amount or 0)
+        },
+        'notes': sale.notes or ''
+    }
+
+
+def purchase_invoice_data(purchase, company):
+    """بيانات طباعة فاتورة مشتريات"""
+    return {
+        'company': _company_header(company),
+        'invoice': {
+            'number': purchase.invoice_number,
+            'date': purchase.purchase_date.strftime('%Y-%m-%d') if purchase.purchase_date else '',
+            'type': 'فاتورة مشتريات'
+        },
+        'supplier': {
+            'name': purchase.supplier.name if purchase.supplier else 'مورد غير محدد',
+            'address': purchase.supplier.address if purchase.supplier else '',
+            'phone': purchase.supplier.phone if purchase.supplier else '',
+            'tax_number': purchase.supplier.tax_number if purchase.supplier else ''
+        },
+        'items': _invoice_items(purchase.items),
+        'totals': {
+            'subtotal': float(purchase.total_amount or 0),
+            'discount': float(purchase.discount_amount or 0),
+            'tax': float(purchase.tax_amount or 0),
+            'total': float(purchase.net_amount or 0)
+        },
+        'notes': purchase.notes or ''
+    }
+
+
+def _company_header(company):
+    return {
+        'name': company['name'] if company else 'اسم الشركة',
+        'address': company['address'] if company else 'عنوان الشركة',
+        'phone': company['phone'] if company else 'رقم الهاتف',
+        'email': company['email'] if company else 'البريد الإلكتروني',
+        'tax_number': company['tax_number'] if company else 'الرقم الضريبي'
+    }
+
+
+def _invoice_items(items):
+    return [{
+        'name': item.product.name if item.product else 'منتج محذوف',
+        'quantity': item.quantity,
+        'unit_price': float(item.unit_price),
+        'total_price': float(item.total_price)
+    } for item in items]
+
+
+def find_font(configured=None):
+    """مسار الخط العربي: من الإعدادات أو أول خط متوفر من القائمة الشائعة"""
+    if configured:
+        return configured if os.path.exists(configured) else None
+    return next((path for path in FONT_CANDIDATES if os.path.exists(path)), None)
+
+
+class InvoiceTemplate:
+    """
+    قالب الفاتورة الجاهز: الخط المسجل وصور الشعار والتوقيعات محملة مرة واحدة،
+    ويبقى في الذاكرة طالما لم تتغير بيانات الشركة أو الخط.
+    """
+
+    MARGIN = 40
+    ROW_HEIGHT = 20
+
+    def __init__(self, font_path, images):
+        self.font = 'InvoiceFont-' + hashlib.sha1(font_path.encode('utf-8')).hexdigest()[:8]
+        if self.font not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(TTFont(self.font, font_path))
+        self.images = {}
+        for name, path in images.items():
+            if path and os.path.exists(path):
+                try:
+                    self.images[name] = ImageReader(path)
+                except Exception:
+                    # صورة تالفة أو غير مدعومة لا تمنع طباعة الفاتورة
+                    pass
+
+    @staticmethod
+    def shape(text):
+        """تشكيل الحروف العربية وترتيبها للعرض من اليمين لليسار"""
+        return get_display(arabic_reshaper.reshape(str(text if text is not None else '')))
+
+    def render(self, invoice_data):
+        buffer = BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        pdf.setTitle(invoice_data['invoice']['number'] or '')
+        width, height = A4
+        right = width - self.MARGIN
+
+        def text(x, y, value, size=10, align='right'):
+            pdf.setFont(self.font, size)
+            value = self.shape(value)
+            if align == 'right':
+                pdf.drawRightString(x, y, value)
+            elif align == 'center':
+                pdf.drawCentredString(x, y, value)
+            else:
+                pdf.drawString(x, y, value)
+
+        def header():
+            y = height - self.MARGIN
+            company = invoice_data['company']
+            if 'logo' in self.images:
+                pdf.drawImage(self.images['logo'], self.MARGIN, y - 60, width=90, height=60,
+                              preserveAspectRatio=True, mask='auto')
+            text(right, y - 14, company['name'], size=16)
+            text(right, y - 32, company['address'])
+            text(right, y - 46, f"هاتف: {company['phone'] or ''}    بريد: {company['email'] or ''}")
+            text(right, y - 60, f"الرقم الضريبي: {company['tax_number'] or ''}")
+            pdf.line(self.MARGIN, y - 72, right, y - 72)
+            return y - 72
+
+        # أعمدة جدول الأصناف من اليمين: الصنف، الكمية، سعر الوحدة، الإجمالي
+        columns = [('الصنف', right), ('الكمية', right - 250), ('سعر الوحدة', right - 340), ('الإجمالي', right - 430)]
+
+        def table_header(y):
+            for title, x in columns:
+                text(x, y, title, size=11)
+            pdf.line(self.MARGIN, y - 6, right, y - 6)
+            return y - self.ROW_HEIGHT
+
+        y = header()
+        invoice = invoice_data['invoice']
+        text(width / 2, y - 24, invoice['type'], size=14, align='center')
+        text(right, y - 46, f"رقم الفاتورة: {invoice['number'] or ''}")
+        # التاريخ يُكتب منفصلاً عن العنوان حتى لا يعكس ترتيب الاتجاه أجزاءه
+        date_label = self.shape('التاريخ: ')
+        text(self.MARGIN + 150, y - 46, 'التاريخ: ')
+        pdf.drawRightString(self.MARGIN + 150 - pdf.stringWidth(date_label, self.font, 10), y - 46, invoice['date'])
+
+        party_label, party = ('العميل', invoice_data['customer']) if 'customer' in invoice_data \
+            else ('المورد', invoice_data['supplier'])
+        text(right, y - 66, f"{party_label}: {party['name']}")
+        text(right, y - 80, f"العنوان: {party['address'] or ''}    هاتف: {party['phone'] or ''}")
+        if party['tax_number']:
+            text(right, y - 94, f"الرقم الضريبي: {party['tax_number']}")
+
+        y = table_header(y - 124)
+        for item in invoice_data['items']:
+            if y < self.MARGIN + 120:
+                pdf.showPage()
+                y = table_header(header() - 24)
+            text(columns[0][1], y, item['name'])
+            text(columns[1][1], y, item['quantity'])
+            text(columns[2][1], y, f"{item['unit_price']:,.2f}")
+            text(columns[3][1], y, f"{item['total_price']:,.2f}")
+            y -= self.ROW_HEIGHT
+
+        pdf.line(self.MARGIN, y + 8, right, y + 8)
+        totals = invoice_data['totals']
+        for label, value in (('المجموع', totals['subtotal']), ('الخصم', totals['discount']),
+                             ('الضريبة', totals['tax']), ('الصافي', totals['total'])):
+            y -= 16
+            text(columns[2][1], y, label, size=11)
+            text(columns[3][1], y, f'{value:,.2f}', size=11)
+
+        if invoice_data['notes']:
+            text(right, y - 30, f"ملاحظات: {invoice_data['notes']}")
+
+        # التوقيعات أسفل الصفحة الأخيرة
+        for name, label, x in (('manager_signature', 'المدير', right - 120),
+                               ('accountant_signature', 'المحاسب', self.MARGIN)):
+            if name in self.images:
+                pdf.drawImage(self.images[name], x, self.MARGIN + 20, width=120, height=50,
+                              preserveAspectRatio=True, mask='auto')
+            text(x + 60, self.MARGIN + 8, label, align='center')
+
+        pdf.showPage()
+        pdf.save()
+        return buffer.getvalue()
+
+
+_template = None
+_template_key = None
+_template_lock = threading.Lock()
+
+
+def get_template(font_path, images):
+    """القالب المحفوظ في الذاكرة، ويُعاد بناؤه فقط عند تغير الخط أو صور الشركة"""
+    global _template, _template_key
+    key = (font_path, tuple(sorted(images.items())))
+    with _template_lock:
+        if _template is None or _template_key != key:
+            _template = InvoiceTemplate(font_path, images)
+            _template_key = key
+        return _template
+
+
+def render_invoice_pdf(invoice_data, font_path, images):
+    """
+    توليد ملف PDF لفاتورة من بياناتها (دالة مستقلة عن Flask وقاعدة البيانات
+    حتى يمكن استدعاؤها من عمليات منفصلة). images: مسارات logo و manager_signature و accountant_signature.
+    """
+    return get_template(font_path, images).render(invoice_data)
+
+
+def company_images(company, static_folder):
+    """مسارات صور الشركة كملفات على القرص (المسارات النسبية تُحسب من مجلد الملفات الثابتة)"""
+    def resolve(path):
+        if not path:
+            return None
+        if os.path.isabs(path) and os.path.exists(path):
+            return path
+        return os.path.join(static_folder or '', path.lstrip('/\\'))
+
+    company = company or {}
+    return {
+        'logo': resolve(company.get('logo_path')),
+        'manager_signature': resolve(company.get('manager_signature_path')),
+        'accountant_signature': resolve(company.get('accountant_signature_path'))
+    }
+
+
+def cache_path(cache_dir, kind, invoice_id, updated_at, company, images):
+    """
+    مسار الملف المخزن للفاتورة: يتغير مع updated_at للفاتورة ومع بيانات الشركة وصورها،
+    فلا يُعاد استخدام ملف قديم بعد أي تعديل.
+    """
+    fingerprint = hashlib.sha1(
+        json.dumps([_company_header(company), images], sort_keys=True, ensure_ascii=False).encode('utf-8')
+    ).hexdigest()[:12]
+    stamp = updated_at.strftime('%Y%m%d%H%M%S%f') if updated_at else '0'
+    return os.path.join(cache_dir, f'{kind}_{invoice_id}_{stamp}_{fingerprint}.pdf')
+
+
+def write_cached(path, content):
+    """كتابة الملف بشكل ذري حتى لا يقرأ طلب آخر ملفاً غير مكتمل"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(content)
+    os.replace(temp_path, path)
@@ -0,0 +1,59 @@
+from datetime import datetime
+from flask import Blueprint, request, jsonify, current_app
+from src.utils.report_jobs import REPORTS, DATE_PARAMS, QueueFullError, report_jobs
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('/reports/jobs', methods=['POST'])
+def submit_report_job():
+    """
+    طلب تقرير ثقيل في الخلفية: {"report": "profit-loss" | "sales-summary" | "inventory-valuation", "params": {...}}
+    يعيد معرف المهمة فوراً، والطلب المطابق لمهمة قائمة يعيد نفس المهمة.
+    """
+    data = request.get_json() or {}
+    report = data.get('report')
+    params = data.get('params') or {}
+    
+    if report not in REPORTS:
+        return jsonify({'message': f"التقرير غير معروف، المتاح: {', '.join(REPORTS)}"}), 400
+    if not isinstance(params, dict):
+        return jsonify({'message': 'params يجب أن يكون كائناً'}), 400
+    
+    params = {str(key): str(value) for key, value in params.items() if value is not None and value != ''}
+    try:
+        for name in DATE_PARAMS:
+            if name in params:
+                datetime.strptime(params[name], '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'message': 'صيغة التاريخ غير صالحة'}), 400
+    try:
+        job, created = report_jobs.submit(current_app._get_current_object(), report, params)
+    except QueueFullError:
+        return jsonify({'message': 'عدد التقارير المنتظرة كبير، حاول لاحقاً'}), 503
+    
+    response = job.to_dict()
+    response['created'] = created
+    return jsonify(response), 200 if job.status == 'completed' else 202
+
+@jobs_bp.route('/reports/jobs/<job_id>', methods=['GET'])
+def get_report_job(job_id):
+    """حالة مهمة التقرير"""
+    job = report_jobs.get(job_id)
+    if not job:
+        return jsonify({'message': 'المهمة غير موجودة أو انتهت صلاحيتها'}), 404
+    
+    return jsonify(job.to_dict())
+
+@jobs_bp.route('/reports/jobs/<job_id>/result', methods=['GET'])
+def get_report_job_result(job_id):
+    """ناتج التقرير عند اكتماله (202 مع الحالة إذا لم يكتمل بعد)"""
+    job = report_jobs.get(job_id)
+    if not job:
+        return jsonify({'message': 'المهمة غير موجودة أو انتهت صلاحيتها'}), 404
+    
+    if job.status in ('queued', 'running'):
+        return jsonify(job.to_dict()), 202
+    if job.status == 'failed':
+        return jsonify({'message': job.error}), job.status_code or 500
+    
+    return jsonify(job.result)
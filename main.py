@@ -4,6 +4,7 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from flask import Flask, send_from_directory
+from src.config import get_config, configure_sqlite
 from src.models.models import db
 from src.routes.user import user_bp
 from src.routes.company import company_bp
@@ -13,9 +14,24 @@ from src.routes.customers_suppliers import customers_suppliers_bp
 from src.routes.sales_purchases import sales_purchases_bp
 from src.routes.inventory import inventory_bp
 from src.routes.reports import reports_bp
+from src.routes.exports import exports_bp
+from src.routes.search import search_bp
+from src.routes.jobs import jobs_bp
+from src.routes.monitoring import monitoring_bp
+from src.models.migrations import upgrade, upgrade_command, explain_queries_command
+from src.utils.rollups import rebuild_rollups_command
+from src.utils.search_index import rebuild_search_index_command
+from src.utils.table_versions import track_table_versions
+from src.utils.request_metrics import init_request_metrics
+from src.utils.slow_queries import init_slow_query_log
+from src.utils.invoice_batch import render_invoices_command
+from src.utils.top_products import refresh_top_products_command
+from src.utils.stock_checkpoints import stock_checkpoint_command
+from src.utils.abc_analysis import refresh_classification_command
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+# الإعدادات حسب APP_ENV، ورابط قاعدة البيانات من DATABASE_URL (SQLite المحلية افتراضياً)
+app.config.from_object(get_config())
 
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(company_bp, url_prefix='/api')
@@ -25,13 +41,32 @@ app.register_blueprint(customers_suppliers_bp, url_prefix='/api')
 app.register_blueprint(sales_purchases_bp, url_prefix='/api')
 app.register_blueprint(inventory_bp, url_prefix='/api')
 app.register_blueprint(reports_bp, url_prefix='/api')
+app.register_blueprint(exports_bp, url_prefix='/api')
+app.register_blueprint(search_bp, url_prefix='/api')
+app.register_blueprint(jobs_bp, url_prefix='/api')
+app.register_blueprint(monitoring_bp, url_prefix='/api')
 
-# uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 with app.app_context():
-    db.create_all()
+    configure_sqlite(db.engine, app.config['SQLITE_PRAGMAS'])
+    # تطبيق ترحيلات المخطط المرقمة بدلاً من db.create_all()
+    upgrade()
+# زيادة إصدار الجداول المرجعية مع كل كتابة (لدعم ETag في نقاط GET)
+track_table_versions(db.session)
+# زمن الطلبات وحجم الاستجابات وعدد استعلامات SQL لكل نقطة (تُعرض في /api/metrics)
+# والاستعلامات الأبطأ من SLOW_QUERY_THRESHOLD_MS مع خطط تنفيذها (تُعرض في /api/slow-queries)
+with app.app_context():
+    init_request_metrics(app, db.engine)
+    init_slow_query_log(app, db.engine)
+
+app.cli.add_command(upgrade_command)
+app.cli.add_command(explain_queries_command)
+app.cli.add_command(rebuild_rollups_command)
+app.cli.add_command(rebuild_search_index_command)
+app.cli.add_command(render_invoices_command)
+app.cli.add_command(refresh_top_products_command)
+app.cli.add_command(stock_checkpoint_command)
+app.cli.add_command(refresh_classification_command)
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -51,4 +86,4 @@ def serve(path):
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=5000, debug=app.config['DEBUG'])
@@ -0,0 +1,178 @@
+import click
+from datetime import date, datetime
+from flask.cli import with_appcontext
+from sqlalchemy import func, text
+from src.models.models import (
+    db, Product, Sale, SaleItem, Purchase, StockMovement, SchemaMigration, TopProductMonthly,
+    ProductClassification, SalesDailyRollup, SalesCustomerDailyRollup, SalesProductDailyRollup,
+    PurchasesDailyRollup, PurchasesSupplierDailyRollup, PurchasesProductDailyRollup
+)
+from src.utils.rollups import rebuild_rollups
+from src.utils.search_index import create_search_index
+from src.utils.table_versions import seed_table_versions
+from src.utils.stock_checkpoints import add_quantity_change_column, create_stock_checkpoints_tables
+
+
+def _baseline():
+    """المخطط الأساسي: إنشاء الجداول غير الموجودة (كان يتم سابقاً عبر db.create_all في main.py)"""
+    db.create_all()
+
+
+def _create_indexes(*names):
+    """إنشاء الفهارس المعرفة في النماذج بالأسماء المحددة إذا لم تكن موجودة"""
+    bind = db.session.get_bind()
+    indexes = {index.name: index for table in db.metadata.tables.values() for index in table.indexes}
+    for name in names:
+        indexes[name].create(bind, checkfirst=True)
+
+
+def _report_and_list_indexes():
+    _create_indexes(
+        'ix_sales_status_sale_date',
+        'ix_sales_created_at_id',
+        'ix_sales_customer_id_created_at',
+        'ix_sale_items_sale_id',
+        'ix_sale_items_product_id',
+        'ix_purchases_status_purchase_date',
+        'ix_purchases_created_at_id',
+        'ix_purchases_supplier_id_created_at',
+        'ix_purchase_items_purchase_id',
+        'ix_purchase_items_product_id',
+        'ix_stock_movements_product_id_movement_date',
+        'ix_stock_movements_movement_date',
+        'ix_products_active_stock',
+        'ix_products_category_id'
+    )
+
+
+def _backfill_rollups():
+    """
+    ملء جداول التجميع اليومي من الفواتير السابقة، لأن الفواتير المنشأة قبل إضافة هذه الجداول
+    لم تُسجل فيها وتقارير الملخصات والأرباح كانت ستظهر أصفاراً لتلك الفترة
+    """
+    bind = db.session.get_bind()
+    for model in (SalesDailyRollup, SalesCustomerDailyRollup, SalesProductDailyRollup,
+                  PurchasesDailyRollup, PurchasesSupplierDailyRollup, PurchasesProductDailyRollup):
+        model.__table__.create(bind, checkfirst=True)
+    rebuild_rollups()
+
+
+def _drop_movement_type_index():
+    """
+    حذف فهرس (movement_type, movement_date) لأن الفهرس المغطي ix_stock_movements_demand يبدأ بنفس
+    العمودين فيخدم نفس الاستعلامات، وبقاؤه يضيف كتابة زائدة مع كل حركة مخزون
+    """
+    db.session.execute(text('DROP INDEX IF EXISTS ix_stock_movements_movement_type_movement_date'))
+
+
+# قائمة الترحيلات بالترتيب: (الإصدار، الوصف، الدالة)
+# يجب أن تكون كل دالة قابلة للتكرار بأمان لأن المخطط الأساسي ينشئ أحدث تعريف للجداول
+MIGRATIONS = [
+    (1, 'المخطط الأساسي', _baseline),
+    (2, 'فهارس التقارير والقوائم', _report_and_list_indexes),
+    (3, 'فهرس البحث النصي للأصناف والعملاء والموردين', create_search_index),
+    (4, 'إصدارات جداول البيانات المرجعية', seed_table_versions),
+    (5, 'أفضل الأصناف الشهرية', lambda: TopProductMonthly.__table__.create(db.session.get_bind(), checkfirst=True)),
+    (6, 'التغير بإشارته في حركات المخزون', add_quantity_change_column),
+    (7, 'لقطات المخزون الدورية', create_stock_checkpoints_tables),
+    (8, 'فهرس الطلب الصادر لاقتراحات إعادة الطلب', lambda: _create_indexes('ix_stock_movements_demand')),
+    (9, 'تصنيف ABC/XYZ للأصناف', lambda: ProductClassification.__table__.create(db.session.get_bind(), checkfirst=True)),
+    (10, 'فهرس حداثة أفضل الأصناف الشهرية', lambda: _create_indexes('ix_sales_sale_date_updated_at')),
+    (11, 'ملء جداول التجميع اليومي من الفواتير السابقة', _backfill_rollups),
+    (12, 'حذف فهرس نوع الحركة المكرر', _drop_movement_type_index),
+]
+
+
+def current_version():
+    SchemaMigration.__table__.create(db.session.get_bind(), checkfirst=True)
+    return db.session.query(func.max(SchemaMigration.version)).scalar() or 0
+
+
+def upgrade():
+    """تطبيق الترحيلات غير المطبقة بالترتيب، كل ترحيل في معاملة مستقلة"""
+    applied = current_version()
+    for version, description, migrate in MIGRATIONS:
+        if version <= applied:
+            continue
+        try:
+            migrate()
+            db.session.add(SchemaMigration(version=version, description=description))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+@click.command('db-upgrade')
+@with_appcontext
+def upgrade_command():
+    """تطبيق ترحيلات قاعدة البيانات"""
+    upgrade()
+    click.echo(f'إصدار المخطط الحالي: {current_version()}')
+
+
+def _explain_queries():
+    """الاستعلامات الممثلة لكل نقطة نهاية، بنفس شكل الاستعلامات المستخدمة في المسارات"""
+    today = date.today()
+    now = datetime.utcnow()
+    return {
+        'sales.get_sales': Sale.query.filter(
+            Sale.created_at < now
+        ).order_by(Sale.created_at.desc(), Sale.id.desc()).limit(50),
+        'sales.get_sales (customer)': Sale.query.filter(
+            Sale.customer_id == 1
+        ).order_by(Sale.created_at.desc(), Sale.id.desc()).limit(50),
+        'purchases.get_purchases': Purchase.query.filter(
+            Purchase.created_at < now
+        ).order_by(Purchase.created_at.desc(), Purchase.id.desc()).limit(50),
+        'reports (sales status + date)': db.session.query(func.sum(Sale.net_amount)).filter(
+            Sale.status == 'completed', Sale.sale_date >= today
+        ),
+        'reports (purchases status + date)': db.session.query(func.sum(Purchase.net_amount)).filter(
+            Purchase.status == 'completed', Purchase.purchase_date >= today
+        ),
+        'reports (sale items by period)': db.session.query(
+            SaleItem.product_id, func.sum(SaleItem.quantity)
+        ).join(Sale, SaleItem.sale_id == Sale.id).filter(
+            Sale.status == 'completed', Sale.sale_date >= today
+        ).group_by(SaleItem.product_id),
+        'inventory.get_stock_movements (product)': StockMovement.query.filter(
+            StockMovement.product_id == 1
+        ).order_by(StockMovement.movement_date.desc()).limit(50),
+        'inventory.get_stock_movements (type)': StockMovement.query.filter(
+            StockMovement.movement_type == 'in'
+        ).order_by(StockMovement.movement_date.desc()).limit(50),
+        'inventory.get_stock_movements': StockMovement.query.order_by(
+            StockMovement.movement_date.desc()
+        ).limit(50),
+        'inventory.get_low_stock_products': db.session.query(Product.id).filter(
+            Product.current_stock <= Product.min_stock, Product.is_active == True
+        ),
+    }
+
+
+def explain(query):
+    """إرجاع خطة التنفيذ كسطور نصية (EXPLAIN QUERY PLAN في SQLite و EXPLAIN في PostgreSQL)"""
+    bind = db.session.get_bind()
+    compiled = query.statement.compile(bind, compile_kwargs={'literal_binds': True})
+    prefix = 'EXPLAIN QUERY PLAN ' if bind.dialect.name == 'sqlite' else 'EXPLAIN '
+    rows = db.session.connection().exec_driver_sql(prefix + str(compiled)).fetchall()
+    return [str(row[-1]) for row in rows]
+
+
+@click.command('explain-queries')
+@with_appcontext
+def explain_queries_command():
+    """عرض خطط تنفيذ استعلامات القوائم والتقارير والتأكد من استخدام الفهارس"""
+    missing = []
+    for name, query in _explain_queries().items():
+        plan = explain(query)
+        uses_index = any('index' in line.lower() for line in plan)
+        click.echo(f"{'OK ' if uses_index else 'NO INDEX'} {name}")
+        for line in plan:
+            click.echo(f'    {line}')
+        if not uses_index:
+            missing.append(name)
+
+    if missing:
+        raise click.ClickException(f'استعلامات بدون فهرس: {", ".join(missing)}')
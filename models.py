@@ -53,6 +53,11 @@ class Category(db.Model):
 # جدول الأصناف
 class Product(db.Model):
     __tablename__ = 'products'
+    __table_args__ = (
+        # الأصناف تحت الحد الأدنى (current_stock <= min_stock مع is_active) تُقرأ من الفهرس مباشرة
+        db.Index('ix_products_active_stock', 'is_active', 'current_stock', 'min_stock'),
+        db.Index('ix_products_category_id', 'category_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -111,6 +116,11 @@ class Customer(db.Model):
 # جدول المشتريات
 class Purchase(db.Model):
     __tablename__ = 'purchases'
+    __table_args__ = (
+        db.Index('ix_purchases_status_purchase_date', 'status', 'purchase_date'),
+        db.Index('ix_purchases_created_at_id', 'created_at', 'id'),
+        db.Index('ix_purchases_supplier_id_created_at', 'supplier_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     invoice_number = db.Column(db.String(50), unique=True)
@@ -132,6 +142,10 @@ class Purchase(db.Model):
 # جدول عناصر المشتريات
 class PurchaseItem(db.Model):
     __tablename__ = 'purchase_items'
+    __table_args__ = (
+        db.Index('ix_purchase_items_purchase_id', 'purchase_id'),
+        db.Index('ix_purchase_items_product_id', 'product_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     purchase_id = db.Column(db.Integer, db.ForeignKey('purchases.id'), nullable=False)
@@ -146,6 +160,13 @@ class PurchaseItem(db.Model):
 # جدول المبيعات
 class Sale(db.Model):
     __tablename__ = 'sales'
+    __table_args__ = (
+        db.Index('ix_sales_status_sale_date', 'status', 'sale_date'),
+        db.Index('ix_sales_created_at_id', 'created_at', 'id'),
+        db.Index('ix_sales_customer_id_created_at', 'customer_id', 'created_at'),
+        # آخر تعديل لفواتير الشهر للتحقق من حداثة أفضل الأصناف المحسوبة مسبقاً
+        db.Index('ix_sales_sale_date_updated_at', 'sale_date', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     invoice_number = db.Column(db.String(50), unique=True)
@@ -168,6 +189,10 @@ class Sale(db.Model):
 # جدول عناصر المبيعات
 class SaleItem(db.Model):
     __tablename__ = 'sale_items'
+    __table_args__ = (
+        db.Index('ix_sale_items_sale_id', 'sale_id'),
+        db.Index('ix_sale_items_product_id', 'product_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     sale_id = db.Column(db.Integer, db.ForeignKey('sales.id'), nullable=False)
@@ -182,11 +207,19 @@ class SaleItem(db.Model):
 # جدول حركة المخزون
 class StockMovement(db.Model):
     __tablename__ = 'stock_movements'
+    __table_args__ = (
+        db.Index('ix_stock_movements_product_id_movement_date', 'product_id', 'movement_date'),
+        db.Index('ix_stock_movements_movement_date', 'movement_date'),
+        # فهرس مغطي لقراءة الطلب الصادر في اقتراحات إعادة الطلب دون الرجوع إلى الجدول،
+        # ويخدم أيضاً تصفية الحركات حسب النوع والتاريخ
+        db.Index('ix_stock_movements_demand', 'movement_type', 'movement_date', 'product_id', 'quantity'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
     movement_type = db.Column(db.String(50), nullable=False)  # in, out, adjustment
     quantity = db.Column(db.Integer, nullable=False)
+    quantity_change = db.Column(db.Integer)  # التغير في المخزون بإشارته: موجب للوارد وسالب للصادر
     reference_type = db.Column(db.String(50))  # purchase, sale, adjustment
     reference_id = db.Column(db.Integer)
     notes = db.Column(db.Text)
@@ -226,3 +259,155 @@ class Expense(db.Model):
     
     # العلاقات
     employee = db.relationship('Employee', backref='expenses')
+
+# جداول التجميع اليومي للمبيعات (يتم تحديثها مع كل فاتورة وإعادة بنائها بأمر rebuild-rollups)
+class SalesDailyRollup(db.Model):
+    __tablename__ = 'sales_daily_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, unique=True)
+    sales_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    tax_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    discount_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    net_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+class SalesCustomerDailyRollup(db.Model):
+    __tablename__ = 'sales_customer_daily_rollups'
+    __table_args__ = (db.UniqueConstraint('day', 'customer_id'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=False)
+    sales_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    tax_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    discount_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    net_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+class SalesProductDailyRollup(db.Model):
+    __tablename__ = 'sales_product_daily_rollups'
+    __table_args__ = (db.UniqueConstraint('day', 'product_id'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    lines_count = db.Column(db.Integer, nullable=False, default=0)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+# جداول التجميع اليومي للمشتريات
+class PurchasesDailyRollup(db.Model):
+    __tablename__ = 'purchases_daily_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, unique=True)
+    purchases_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    tax_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    discount_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    net_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+class PurchasesSupplierDailyRollup(db.Model):
+    __tablename__ = 'purchases_supplier_daily_rollups'
+    __table_args__ = (db.UniqueConstraint('day', 'supplier_id'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    supplier_id = db.Column(db.Integer, db.ForeignKey('suppliers.id'), nullable=False)
+    purchases_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    tax_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    discount_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    net_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+class PurchasesProductDailyRollup(db.Model):
+    __tablename__ = 'purchases_product_daily_rollups'
+    __table_args__ = (db.UniqueConstraint('day', 'product_id'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    lines_count = db.Column(db.Integer, nullable=False, default=0)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+# عدادات أرقام الفواتير (INV / PUR مع إمكانية الفصل حسب الفرع أو السنة)
+class InvoiceSequence(db.Model):
+    __tablename__ = 'invoice_sequences'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)  # INV, PUR, INV-2025, INV-B01-2025
+    next_value = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# سجل إصدارات مخطط قاعدة البيانات (الترحيلات المطبقة)
+class SchemaMigration(db.Model):
+    __tablename__ = 'schema_migrations'
+    
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String(200))
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# إصدار كل جدول من البيانات المرجعية: يزداد مع كل كتابة ويُستخدم لبناء ETag و Last-Modified
+class TableVersion(db.Model):
+    __tablename__ = 'table_versions'
+    
+    table_name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# أفضل الأصناف مبيعاً لكل شهر (محسوبة مسبقاً للوحة التحكم)
+class TopProductMonthly(db.Model):
+    __tablename__ = 'top_products_monthly'
+    __table_args__ = (db.UniqueConstraint('month', 'rank_by', 'rank'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.String(7), nullable=False)  # YYYY-MM
+    rank_by = db.Column(db.String(20), nullable=False)  # revenue, quantity
+    rank = db.Column(db.Integer, nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    total_quantity = db.Column(db.Integer, nullable=False, default=0)
+    total_revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# تصنيف ABC (حسب الإيراد والكمية) و XYZ (حسب تذبذب الطلب) لكل صنف في كل شهر
+class ProductClassification(db.Model):
+    __tablename__ = 'product_classifications'
+    __table_args__ = (
+        db.UniqueConstraint('period', 'product_id'),
+        db.Index('ix_product_classifications_period_revenue_class', 'period', 'revenue_class'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(7), nullable=False)  # YYYY-MM
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    total_quantity = db.Column(db.Integer, nullable=False, default=0)
+    total_revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    revenue_share = db.Column(db.Float, nullable=False, default=0)  # النسبة التراكمية من الإيراد حتى هذا الصنف
+    revenue_class = db.Column(db.String(1), nullable=False)  # A, B, C
+    quantity_class = db.Column(db.String(1), nullable=False)  # A, B, C
+    demand_cv = db.Column(db.Float)  # معامل اختلاف الطلب الأسبوعي
+    xyz_class = db.Column(db.String(1))  # X, Y, Z (فارغ للأصناف بدون طلب)
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# لقطات المخزون الدورية: رصيد كل صنف في لحظة محددة لحساب المخزون في تاريخ سابق
+class StockCheckpoint(db.Model):
+    __tablename__ = 'stock_checkpoints'
+    __table_args__ = (db.Index('ix_stock_checkpoints_taken_at', 'taken_at'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    taken_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_movement_id = db.Column(db.Integer, nullable=False, default=0)  # آخر حركة مشمولة في اللقطة
+    
+    # العلاقات
+    items = db.relationship('StockCheckpointItem', backref='checkpoint', lazy=True, cascade='all, delete-orphan')
+
+class StockCheckpointItem(db.Model):
+    __tablename__ = 'stock_checkpoint_items'
+    __table_args__ = (db.UniqueConstraint('checkpoint_id', 'product_id'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    checkpoint_id = db.Column(db.Integer, db.ForeignKey('stock_checkpoints.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    stock = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,23 @@
+from flask import Blueprint, Response, request, jsonify, current_app
+from src.utils.request_metrics import render_metrics
+from src.utils.slow_queries import top_slow_queries
+
+monitoring_bp = Blueprint('monitoring', __name__)
+
+@monitoring_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """مقاييس الطلبات واستعلامات SQL لكل نقطة بصيغة Prometheus النصية"""
+    return Response(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@monitoring_bp.route('/slow-queries', methods=['GET'])
+def get_slow_queries():
+    """أكثر الاستعلامات البطيئة استهلاكاً للوقت من سجل الاستعلامات البطيئة (مع تصفية اختيارية حسب route)"""
+    limit = max(request.args.get('limit', 20, type=int), 1)
+    route = request.args.get('route')
+    
+    return jsonify({
+        'threshold_ms': current_app.config['SLOW_QUERY_THRESHOLD_MS'],
+        'queries': top_slow_queries(
+            current_app.config['SLOW_QUERY_LOG'], current_app.config['SLOW_QUERY_LOG_BACKUPS'], limit, route
+        )
+    })
@@ -0,0 +1,54 @@
+import base64
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(created_at, row_id):
+    """تحويل (تاريخ الإنشاء، المعرف) لآخر صف في الصفحة إلى مؤشر نصي"""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """فك المؤشر النصي إلى (تاريخ الإنشاء، المعرف) - يرفع ValueError عند عدم صحته"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, row_id = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (UnicodeError, TypeError, ValueError) as e:
+        raise ValueError('مؤشر الصفحة غير صالح') from e
+
+
+def get_page_size(value):
+    """تحديد حجم الصفحة ضمن الحدود المسموحة"""
+    if not value or value < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(value, MAX_PAGE_SIZE)
+
+
+def keyset_page(query, created_column, id_column, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    جلب صفحة واحدة بترتيب تنازلي على (created_at, id) باستخدام مؤشر بدلاً من OFFSET،
+    بحيث تبقى تكلفة كل صفحة ثابتة مهما كان عمق المؤشر.
+    يعيد (الصفوف، المؤشر التالي أو None)
+    """
+    if cursor:
+        last_created_at, last_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            created_column < last_created_at,
+            and_(created_column == last_created_at, id_column < last_id)
+        ))
+
+    # جلب صف إضافي لمعرفة وجود صفحة تالية دون الحاجة إلى COUNT(*)
+    rows = query.order_by(created_column.desc(), id_column.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, created_column.key), getattr(last, id_column.key))
+
+    return rows, next_cursor
@@ -0,0 +1,245 @@
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import func, select
+from src.models.models import db, Product, Category, StockMovement
+from src.utils.db_utils import upsert_insert
+
+# عدد الصفوف في كل جملة INSERT متعددة الصفوف
+IMPORT_BATCH_SIZE = 500
+
+# الأعمدة القابلة للاستيراد ونوع كل منها
+_TEXT_FIELDS = ('name', 'code', 'description', 'unit', 'image_path')
+_DECIMAL_FIELDS = ('purchase_price', 'selling_price')
+_INT_FIELDS = ('min_stock', 'max_stock', 'current_stock')
+# الحقول التي يتم تحديثها عند وجود الكود مسبقاً
+_UPDATE_FIELDS = (
+    'name', 'description', 'unit', 'image_path', 'purchase_price', 'selling_price',
+    'min_stock', 'max_stock', 'current_stock', 'category_id'
+)
+
+# القيم الافتراضية للأصناف الجديدة التي لم تحدد هذه القيم
+_INSERT_DEFAULTS = {'min_stock': 0, 'current_stock': 0, 'is_active': True}
+
+
+def read_rows(file_storage=None, body=None, content_type=''):
+    """
+    قراءة الصفوف كمولد من ملف مرفوع أو من جسم الطلب:
+    CSV يُقرأ سطراً بسطر، و NDJSON سطراً بسطر، و JSON (مصفوفة أو {"products": [...]}) دفعة واحدة.
+    """
+    if file_storage is not None:
+        filename = (file_storage.filename or '').lower()
+        stream = io.TextIOWrapper(file_storage.stream, encoding='utf-8-sig')
+        if filename.endswith('.csv'):
+            return csv.DictReader(stream)
+        if filename.endswith('.ndjson') or filename.endswith('.jsonl'):
+            return (json.loads(line) for line in stream if line.strip())
+        return iter(_json_rows(json.load(stream)))
+
+    if 'csv' in content_type:
+        return csv.DictReader(io.StringIO(body.decode('utf-8-sig')))
+    if 'ndjson' in content_type:
+        return (json.loads(line) for line in body.decode('utf-8').splitlines() if line.strip())
+    return iter(_json_rows(json.loads(body.decode('utf-8'))))
+
+
+def _json_rows(data):
+    if isinstance(data, dict):
+        data = data.get('products', [])
+    if not isinstance(data, list):
+        raise ValueError('يجب أن تكون البيانات قائمة من الأصناف')
+    return data
+
+
+def _clean(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _validate(raw):
+    """التحقق من صف واحد وتحويل قيمه؛ يعيد (الصف، قائمة الأخطاء)"""
+    if not isinstance(raw, dict):
+        return None, ['صيغة الصف غير صالحة']
+
+    row = {}
+    errors = []
+
+    for field in _TEXT_FIELDS:
+        value = _clean(raw.get(field))
+        row[field] = str(value) if value is not None else None
+    if not row['name']:
+        errors.append('اسم الصنف مطلوب')
+    if not row['code']:
+        errors.append('كود الصنف مطلوب')
+
+    for field in _DECIMAL_FIELDS:
+        value = _clean(raw.get(field))
+        try:
+            row[field] = Decimal(str(value)) if value is not None else None
+        except InvalidOperation:
+            errors.append(f'قيمة غير صالحة للحقل {field}')
+            continue
+        if row[field] is not None and row[field] < 0:
+            errors.append(f'لا يمكن أن تكون قيمة الحقل {field} سالبة')
+
+    for field in _INT_FIELDS:
+        value = _clean(raw.get(field))
+        try:
+            row[field] = int(value) if value is not None else None
+        except (TypeError, ValueError):
+            errors.append(f'قيمة غير صالحة للحقل {field}')
+            continue
+        if row[field] is not None and row[field] < 0:
+            errors.append(f'لا يمكن أن تكون قيمة الحقل {field} سالبة')
+
+    category_id = _clean(raw.get('category_id'))
+    try:
+        row['category_id'] = int(category_id) if category_id is not None else None
+    except (TypeError, ValueError):
+        errors.append('قيمة غير صالحة للحقل category_id')
+    row['category'] = _clean(raw.get('category'))
+
+    return row, errors
+
+
+def _resolve_categories(rows, categories):
+    """تحويل أسماء الفئات إلى معرفات، مع إنشاء الفئات الجديدة بجملة واحدة"""
+    missing = {row['category'] for row in rows if row['category'] and row['category'] not in categories}
+    if missing:
+        now = datetime.utcnow()
+        db.session.execute(Category.__table__.insert(), [{'name': name, 'created_at': now} for name in missing])
+        for category_id, name in db.session.execute(
+            select(Category.id, Category.name).where(Category.name.in_(missing))
+        ):
+            categories.setdefault(name, category_id)
+
+    for row in rows:
+        if row['category_id'] is None and row['category']:
+            row['category_id'] = categories[row['category']]
+
+
+def _stock_adjustments(rows, existing, now):
+    """
+    حركات تعديل للأصناف الموجودة التي يغير الملف رصيدها، حتى يبقى سجل الحركات
+    مطابقاً للرصيد الحالي (الرصيد في تاريخ سابق يُحسب من الحركات)
+    """
+    movements = []
+    for row in rows:
+        if row['code'] not in existing or row['current_stock'] is None:
+            continue
+        product_id, old_stock = existing[row['code']]
+        difference = row['current_stock'] - (old_stock or 0)
+        if difference:
+            movements.append({
+                'product_id': product_id, 'movement_type': 'adjustment', 'quantity': abs(difference),
+                'quantity_change': difference, 'reference_type': 'adjustment', 'movement_date': now,
+                'notes': f'استيراد الأصناف: تعديل المخزون من {old_stock or 0} إلى {row["current_stock"]}'
+            })
+    return movements
+
+
+def _upsert_batch(rows):
+    """إدراج أو تحديث دفعة من الأصناف حسب الكود؛ يعيد (عدد الجديد، عدد المحدث)"""
+    codes = [row['code'] for row in rows]
+    existing = {
+        code: (product_id, current_stock)
+        for code, product_id, current_stock in db.session.execute(
+            select(Product.code, Product.id, Product.current_stock).where(Product.code.in_(codes))
+        )
+    }
+
+    table = Product.__table__
+    now = datetime.utcnow()
+    values = []
+    for row in rows:
+        value = {field: row[field] for field in ('code',) + _UPDATE_FIELDS}
+        value.update(created_at=now, updated_at=now, is_active=None)
+        # القيم الافتراضية تُطبق على الأصناف الجديدة فقط حتى لا تمسح القيم الموجودة
+        if row['code'] not in existing:
+            for field, default in _INSERT_DEFAULTS.items():
+                if value[field] is None:
+                    value[field] = default
+        values.append(value)
+
+    movements = _stock_adjustments(rows, existing, now)
+
+    stmt = upsert_insert(table)
+    if stmt is not None:
+        # القيم الفارغة في الملف لا تمسح القيم الموجودة؛
+        # تمرير القائمة كمعاملات يجعل الجملة تُترجم مرة واحدة وتُنفذ على دفعات متعددة الصفوف
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['code'],
+            set_={
+                **{field: func.coalesce(stmt.excluded[field], table.c[field]) for field in _UPDATE_FIELDS},
+                'updated_at': stmt.excluded.updated_at
+            }
+        )
+        db.session.execute(stmt, values)
+    else:
+        for value in values:
+            if value['code'] in existing:
+                changes = {field: value[field] for field in _UPDATE_FIELDS if value[field] is not None}
+                db.session.execute(table.update().where(table.c.code == value['code']).values(
+                    **changes, updated_at=now
+                ))
+            else:
+                db.session.execute(table.insert().values(**value))
+
+    if movements:
+        db.session.execute(StockMovement.__table__.insert(), movements)
+
+    return len(set(codes) - set(existing)), len(existing)
+
+
+def import_products(rows):
+    """
+    استيراد الأصناف على دفعات داخل معاملة واحدة (يتولى المستدعي commit/rollback).
+    الصفوف غير الصالحة لا توقف الاستيراد وتُعاد في تقرير الأخطاء مع رقم الصف.
+    """
+    started = time.perf_counter()
+    categories = dict(db.session.execute(select(Category.name, Category.id)).all())
+    report = {'total_rows': 0, 'created': 0, 'updated': 0, 'failed': 0, 'errors': []}
+
+    batch = {}
+
+    def flush():
+        if not batch:
+            return
+        batch_rows = list(batch.values())
+        _resolve_categories(batch_rows, categories)
+        created, updated = _upsert_batch(batch_rows)
+        report['created'] += created
+        report['updated'] += updated
+        batch.clear()
+
+    for row_number, raw in enumerate(rows, start=1):
+        report['total_rows'] += 1
+        row, errors = _validate(raw)
+        if errors:
+            report['failed'] += 1
+            report['errors'].append({
+                'row': row_number,
+                'code': row.get('code') if row else None,
+                'errors': errors
+            })
+            continue
+
+        # نفس الكود مرتين في نفس الدفعة: آخر صف هو المعتمد
+        if row['code'] in batch:
+            flush()
+        batch[row['code']] = row
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            flush()
+    flush()
+
+    elapsed = time.perf_counter() - started
+    report['elapsed_seconds'] = round(elapsed, 3)
+    report['rows_per_second'] = round(report['total_rows'] / elapsed, 1) if elapsed > 0 else None
+    return report
@@ -1,58 +1,27 @@
 from flask import Blueprint, request, jsonify
 from src.models.models import db, Product, Category
+from src.models.serializers import product_serializer, category_serializer
+from src.utils.product_import import read_rows, import_products
+from src.utils.table_versions import conditional_get
+from src.utils.cache import category_names_cache
 from datetime import datetime
 
 products_bp = Blueprint('products', __name__)
 
 @products_bp.route('/products', methods=['GET'])
+@conditional_get('products', 'categories')
 def get_products():
     """الحصول على قائمة الأصناف"""
-    products = Product.query.filter_by(is_active=True).all()
+    products = product_serializer.apply(Product.query).filter_by(is_active=True).all()
     
-    products_list = []
-    for product in products:
-        products_list.append({
-            'id': product.id,
-            'name': product.name,
-            'code': product.code,
-            'description': product.description,
-            'unit': product.unit,
-            'purchase_price': float(product.purchase_price) if product.purchase_price else None,
-            'selling_price': float(product.selling_price) if product.selling_price else None,
-            'min_stock': product.min_stock,
-            'max_stock': product.max_stock,
-            'current_stock': product.current_stock,
-            'image_path': product.image_path,
-            'category_id': product.category_id,
-            'category_name': product.category.name if product.category else None,
-            'is_active': product.is_active,
-            'created_at': product.created_at.isoformat() if product.created_at else None
-        })
-    
-    return jsonify(products_list)
+    return jsonify(product_serializer.many(products))
 
 @products_bp.route('/products/<int:product_id>', methods=['GET'])
 def get_product(product_id):
     """الحصول على بيانات صنف محدد"""
-    product = Product.query.get_or_404(product_id)
+    product = product_serializer.apply(Product.query).get_or_404(product_id)
     
-    return jsonify({
-        'id': product.id,
-        'name': product.name,
-        'code': product.code,
-        'description': product.description,
-        'unit': product.unit,
-        'purchase_price': float(product.purchase_price) if product.purchase_price else None,
-        'selling_price': float(product.selling_price) if product.selling_price else None,
-        'min_stock': product.min_stock,
-        'max_stock': product.max_stock,
-        'current_stock': product.current_stock,
-        'image_path': product.image_path,
-        'category_id': product.category_id,
-        'category_name': product.category.name if product.category else None,
-        'is_active': product.is_active,
-        'created_at': product.created_at.isoformat() if product.created_at else None
-    })
+    return jsonify(product_serializer.dump(product))
 
 @products_bp.route('/products', methods=['POST'])
 def create_product():
@@ -87,6 +56,29 @@ def create_product():
         db.session.rollback()
         return jsonify({'message': 'حدث خطأ أثناء إضافة الصنف'}), 500
 
+@products_bp.route('/products/import', methods=['POST'])
+def bulk_import_products():
+    """استيراد مجمع للأصناف من CSV أو JSON مع التحديث حسب الكود"""
+    try:
+        rows = read_rows(
+            file_storage=request.files.get('file'),
+            body=request.get_data(),
+            content_type=request.content_type or ''
+        )
+        report = import_products(rows)
+        db.session.commit()
+        # الاستيراد قد ينشئ فئات جديدة
+        category_names_cache.invalidate()
+    except (ValueError, UnicodeDecodeError) as e:
+        db.session.rollback()
+        return jsonify({'message': f'ملف الاستيراد غير صالح: {str(e)}'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'حدث خطأ أثناء استيراد الأصناف: {str(e)}'}), 500
+    
+    report['message'] = 'تم استيراد الأصناف بنجاح'
+    return jsonify(report)
+
 @products_bp.route('/products/<int:product_id>', methods=['PUT'])
 def update_product(product_id):
     """تحديث بيانات صنف"""
@@ -136,20 +128,12 @@ def delete_product(product_id):
 
 # فئات الأصناف
 @products_bp.route('/categories', methods=['GET'])
+@conditional_get('categories')
 def get_categories():
     """الحصول على قائمة فئات الأصناف"""
     categories = Category.query.all()
     
-    categories_list = []
-    for category in categories:
-        categories_list.append({
-            'id': category.id,
-            'name': category.name,
-            'description': category.description,
-            'created_at': category.created_at.isoformat() if category.created_at else None
-        })
-    
-    return jsonify(categories_list)
+    return jsonify(category_serializer.many(categories))
 
 @products_bp.route('/categories', methods=['POST'])
 def create_category():
@@ -164,6 +148,7 @@ def create_category():
     try:
         db.session.add(category)
         db.session.commit()
+        category_names_cache.invalidate()
         return jsonify({'message': 'تم إضافة الفئة بنجاح', 'id': category.id}), 201
     except Exception as e:
         db.session.rollback()
@@ -0,0 +1,127 @@
+import math
+from datetime import datetime, timedelta
+from statistics import NormalDist
+from sqlalchemy import Float, func, select
+from src.models.models import db, Product, StockMovement
+from src.utils.cache import category_names_cache
+
+# NumPy اختيارية: بدونها يعود مسار اقتراحات إعادة الطلب إلى قاعدة الحد الأدنى البسيطة
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# أطول فترة مراجعة مسموحة بالأيام (عشر سنوات)؛ القيم الأكبر تتجاوز حدود التواريخ
+MAX_LOOKBACK_DAYS = 3650
+
+
+def _outbound_movements(start, days):
+    """
+    حركات الصادر في الأيام [start, start + days) كأعمدة (الصنف، اليوم، الكمية) دون تجميع في قاعدة البيانات؛
+    الفهرس المغطي ix_stock_movements_demand يكفي لقراءتها دون الرجوع إلى صفوف الجدول.
+    الحد الأعلى يستبعد الحركات بتاريخ لاحق، فلا يتجاوز ترتيب اليوم طول الفترة ولا يختلط بيوم صنف آخر.
+    """
+    rows = db.session.connection().execute(select(
+        StockMovement.product_id, func.date(StockMovement.movement_date), StockMovement.quantity
+    ).where(
+        StockMovement.movement_type == 'out',
+        StockMovement.movement_date >= datetime.combine(start, datetime.min.time()),
+        StockMovement.movement_date < datetime.combine(start + timedelta(days=days), datetime.min.time())
+    )).all()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    product_ids, days, quantities = zip(*rows)
+    offsets = (np.array(days, dtype='datetime64[D]') - np.datetime64(start, 'D')).astype(np.int64)
+    return np.array(product_ids, dtype=np.int64), offsets, np.array(quantities, dtype=np.float64)
+
+
+def reorder_suggestions(lookback_days=90, recent_days=28, lead_time_days=7, review_days=7,
+                        service_level=0.95, include_all=False):
+    """
+    اقتراحات إعادة الطلب لكامل الأصناف النشطة في تمريرة متجهة واحدة:
+    متوسط الطلب اليومي وانحرافه خلال فترة المراجعة، مخزون الأمان = z × الانحراف × √مدة التوريد،
+    نقطة إعادة الطلب = الطلب خلال مدة التوريد + مخزون الأمان،
+    والكمية المقترحة تصل بالرصيد إلى طلب (مدة التوريد + فترة المراجعة) + مخزون الأمان.
+    """
+    # تواريخ الحركات مسجلة بتوقيت UTC (datetime.utcnow)، فاليوم الحالي يُحدد بنفس التوقيت
+    start = datetime.utcnow().date() - timedelta(days=lookback_days - 1)
+    z = NormalDist().inv_cdf(service_level)
+
+    # الأعمدة الرقمية فقط لكامل الأصناف، والأسماء تُقرأ لاحقاً للأصناف المختارة
+    products = db.session.connection().execute(select(
+        Product.id, func.coalesce(Product.current_stock, 0), func.coalesce(Product.min_stock, 0),
+        func.coalesce(Product.max_stock, 0), func.coalesce(Product.purchase_price, 0, type_=Float)
+    ).where(Product.is_active == True).order_by(Product.id)).all()
+    if not products:
+        return []
+
+    ids, current, min_stock, max_stock, price = zip(*products)
+    count = len(products)
+    ids = np.array(ids, dtype=np.int64)
+    current = np.array(current, dtype=np.float64)
+    min_stock = np.array(min_stock, dtype=np.float64)
+    max_stock = np.array(max_stock, dtype=np.float64)
+    price = np.array(price, dtype=np.float64)
+
+    product_ids, offsets, quantities = _outbound_movements(start, lookback_days)
+    positions = np.searchsorted(ids, product_ids)
+    # حركات الأصناف غير النشطة لا تقابل أي صنف في القائمة
+    valid = (positions < count) & (ids[np.minimum(positions, count - 1)] == product_ids)
+    positions, offsets, quantities = positions[valid], offsets[valid], quantities[valid]
+
+    # الطلب اليومي لكل (صنف، يوم) ثم مجموعه ومجموع مربعاته لكل صنف
+    product_days, inverse = np.unique(positions * lookback_days + offsets, return_inverse=True)
+    daily = np.bincount(inverse, weights=quantities)
+    day_products = product_days // lookback_days
+    totals = np.bincount(day_products, weights=daily, minlength=count)
+    squares = np.bincount(day_products, weights=daily ** 2, minlength=count)
+    recent = np.bincount(positions, weights=quantities * (offsets >= lookback_days - recent_days), minlength=count)
+
+    # الأيام بدون حركة تُحسب بطلب صفر
+    average = totals / lookback_days
+    deviation = np.sqrt(np.maximum(squares / lookback_days - average ** 2, 0))
+    recent_average = recent / recent_days
+
+    safety_stock = z * deviation * math.sqrt(lead_time_days)
+    reorder_point = np.maximum(average * lead_time_days + safety_stock, min_stock)
+    target = np.maximum(average * (lead_time_days + review_days) + safety_stock, min_stock)
+    target = np.where(max_stock > 0, np.minimum(target, max_stock), target)
+
+    needs_reorder = current <= reorder_point
+    suggested = np.where(needs_reorder, np.maximum(np.ceil(target - current), 0), 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days_of_cover = np.where(average > 0, current / average, np.inf)
+
+    selected = np.arange(count) if include_all else np.flatnonzero(needs_reorder & (suggested > 0))
+    # الأقل تغطية أولاً
+    selected = selected[np.argsort(days_of_cover[selected], kind='stable')]
+
+    details = select(Product.id, Product.name, Product.code, Product.category_id)
+    if not include_all:
+        details = details.where(Product.id.in_(ids[selected].tolist()))
+    details = {row.id: row for row in db.session.execute(details)}
+    category_names = category_names_cache.get()
+
+    suggestions = []
+    for i in selected.tolist():
+        product = details[int(ids[i])]
+        suggestions.append({
+            'product_id': product.id,
+            'product_name': product.name,
+            'product_code': product.code,
+            'current_stock': int(current[i]),
+            'min_stock': int(min_stock[i]),
+            'max_stock': int(max_stock[i]),
+            'avg_daily_demand': round(float(average[i]), 3),
+            'recent_daily_demand': round(float(recent_average[i]), 3),
+            'demand_std': round(float(deviation[i]), 3),
+            'days_of_cover': round(float(days_of_cover[i]), 1) if np.isfinite(days_of_cover[i]) else None,
+            'safety_stock': round(float(safety_stock[i]), 2),
+            'reorder_point': round(float(reorder_point[i]), 2),
+            'needs_reorder': bool(needs_reorder[i]),
+            'suggested_quantity': int(suggested[i]),
+            'estimated_cost': round(float(suggested[i] * price[i]), 2),
+            'category_name': category_names.get(product.category_id)
+        })
+    return suggestions
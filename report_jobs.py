@@ -0,0 +1,138 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# التقارير المتاحة كمهام في الخلفية: الاسم ← (نقطة Flask، مسار الطلب المقابل)
+REPORTS = {
+    'profit-loss': ('reports.get_profit_loss', '/api/reports/profit-loss'),
+    'sales-summary': ('reports.get_sales_summary', '/api/reports/sales-summary'),
+    'inventory-valuation': ('inventory.get_inventory_valuation', '/api/inventory/valuation'),
+}
+
+# معاملات التاريخ (YYYY-MM-DD) التي يُتحقق من صيغتها عند طلب المهمة
+DATE_PARAMS = ('start_date', 'end_date')
+
+
+def _job_key(report, params):
+    return report, tuple(sorted(params.items()))
+
+
+class QueueFullError(Exception):
+    """عدد المهام المنتظرة وصل إلى الحد الأقصى"""
+
+
+class ReportJob:
+    def __init__(self, report, params):
+        self.id = uuid.uuid4().hex
+        self.report = report
+        self.params = params
+        self.status = 'queued'  # queued, running, completed, failed
+        self.status_code = None
+        self.result = None
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self.expires_at = None  # بتوقيت time.monotonic بعد انتهاء المهمة
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'report': self.report,
+            'params': self.params,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class ReportJobQueue:
+    """
+    تنفيذ التقارير الثقيلة في مجمع خيوط محدود داخل العملية.
+    المهام تُوحَّد حسب (التقرير، المعاملات): الطلب المطابق لمهمة منتظرة أو جارية أو منتهية لم تنتهِ صلاحيتها
+    يعيد نفس المهمة بدلاً من حساب التقرير مرة أخرى. المهام الفاشلة لا تُعاد لتسمح بإعادة المحاولة.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._jobs = {}
+        self._by_key = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self, app):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=app.config['REPORT_JOB_WORKERS'], thread_name_prefix='report-job'
+            )
+        return self._executor
+
+    def _purge(self):
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if job.expires_at is not None and job.expires_at <= now:
+                del self._jobs[job_id]
+                key = _job_key(job.report, job.params)
+                if self._by_key.get(key) is job:
+                    del self._by_key[key]
+
+    def submit(self, app, report, params):
+        """إضافة مهمة أو إعادة المهمة المطابقة؛ يعيد (المهمة، هل أُنشئت الآن)"""
+        key = _job_key(report, params)
+        with self._lock:
+            self._purge()
+            job = self._by_key.get(key)
+            if job and job.status != 'failed':
+                return job, False
+
+            waiting = sum(1 for existing in self._jobs.values() if existing.status == 'queued')
+            if waiting >= app.config['REPORT_JOB_MAX_QUEUED']:
+                raise QueueFullError()
+
+            job = ReportJob(report, params)
+            self._jobs[job.id] = job
+            self._by_key[key] = job
+            self._get_executor(app).submit(self._run, app, job)
+            return job, True
+
+    def get(self, job_id):
+        with self._lock:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def _run(self, app, job):
+        """تنفيذ نقطة التقرير نفسها داخل سياق طلب مصطنع بنفس المعاملات، وحفظ ناتج JSON"""
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        endpoint, path = REPORTS[job.report]
+        try:
+            # سياق الطلب يفتح جلسة قاعدة بيانات خاصة بهذا الخيط وتُغلق عند الخروج منه
+            with app.test_request_context(path, query_string=job.params):
+                response = app.make_response(app.view_functions[endpoint]())
+                data = response.get_json()
+            job.status_code = response.status_code
+            if response.status_code >= 400:
+                job.status = 'failed'
+                job.error = (data or {}).get('message', 'تعذر إعداد التقرير')
+            else:
+                job.result = data
+                job.status = 'completed'
+        except ValueError:
+            # معاملات غير صالحة لم يكتشفها التحقق عند الطلب: خطأ من الطلب وليس من الخادم
+            job.status = 'failed'
+            job.status_code = 400
+            job.error = 'قيم المعاملات غير صالحة'
+        except Exception:
+            app.logger.exception('فشل تنفيذ مهمة التقرير %s', job.report)
+            job.status = 'failed'
+            job.status_code = 500
+            job.error = 'حدث خطأ أثناء إعداد التقرير'
+        finally:
+            job.finished_at = datetime.utcnow()
+            job.expires_at = time.monotonic() + app.config['REPORT_JOB_TTL']
+
+
+report_jobs = ReportJobQueue()
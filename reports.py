@@ -1,68 +1,101 @@
-from flask import Blueprint, request, jsonify, make_response
-from src.models.models import db, Sale, Purchase, Product, Customer, Supplier, StockMovement, Company
+from flask import Blueprint, request, jsonify, make_response, current_app, send_file, abort
+from src.models.models import (
+    db, Sale, Purchase, Product, Customer, Supplier, StockMovement,
+    SalesDailyRollup, SalesCustomerDailyRollup, SalesProductDailyRollup,
+    PurchasesDailyRollup, PurchasesSupplierDailyRollup
+)
+from src.models.serializers import sale_detail_serializer, purchase_detail_serializer
+from src.utils.cache import company_cache
+from src.utils.invoices import (
+    PDF_AVAILABLE, sale_invoice_data, purchase_invoice_data, find_font, company_images,
+    cache_path, write_cached, render_invoice_pdf
+)
+from src.utils.top_products import RANK_COLUMNS, top_products_query, month_bounds, materialized_top_products
+from src.utils.invoice_batch import (
+    INVOICE_KINDS, count_invoices, load_invoices, render_invoices, write_zip, parse_ids
+)
 from datetime import datetime, date
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, select, true
 from decimal import Decimal
 import json
+import os
+import tempfile
 
 reports_bp = Blueprint('reports', __name__)
 
+def _day_filters(rollup, start_date, end_date):
+    """شروط الفترة الزمنية على عمود اليوم في جداول التجميع"""
+    filters = []
+    if start_date:
+        filters.append(rollup.day >= datetime.strptime(start_date, '%Y-%m-%d').date())
+    if end_date:
+        filters.append(rollup.day <= datetime.strptime(end_date, '%Y-%m-%d').date())
+    return filters
+
 @reports_bp.route('/reports/sales-summary', methods=['GET'])
 def get_sales_summary():
-    """تقرير ملخص المبيعات"""
+    """تقرير ملخص المبيعات (من جداول التجميع اليومي)"""
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query = Sale.query.filter_by(status='completed')
-    
-    if start_date:
-        query = query.filter(Sale.sale_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-    if end_date:
-        query = query.filter(Sale.sale_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+    daily_filters = _day_filters(SalesDailyRollup, start_date, end_date)
+    customer_filters = _day_filters(SalesCustomerDailyRollup, start_date, end_date)
     
-    sales = query.all()
-    
-    total_sales = len(sales)
-    total_amount = sum(sale.total_amount for sale in sales if sale.total_amount)
-    total_tax = sum(sale.tax_amount for sale in sales if sale.tax_amount)
-    total_discount = sum(sale.discount_amount for sale in sales if sale.discount_amount)
-    net_amount = sum(sale.net_amount for sale in sales if sale.net_amount)
+    # الإجماليات في استعلام تجميعي واحد
+    totals = db.session.query(
+        func.coalesce(func.sum(SalesDailyRollup.sales_count), 0),
+        func.coalesce(func.sum(SalesDailyRollup.total_amount), 0),
+        func.coalesce(func.sum(SalesDailyRollup.tax_amount), 0),
+        func.coalesce(func.sum(SalesDailyRollup.discount_amount), 0),
+        func.coalesce(func.sum(SalesDailyRollup.net_amount), 0)
+    ).filter(*daily_filters).one()
     
     # تجميع حسب العميل
+    customer_rows = db.session.query(
+        Customer.name,
+        func.sum(SalesCustomerDailyRollup.sales_count),
+        func.coalesce(func.sum(SalesCustomerDailyRollup.total_amount), 0),
+        func.coalesce(func.sum(SalesCustomerDailyRollup.net_amount), 0)
+    ).select_from(SalesCustomerDailyRollup).outerjoin(
+        Customer, SalesCustomerDailyRollup.customer_id == Customer.id
+    ).filter(*customer_filters).group_by(SalesCustomerDailyRollup.customer_id, Customer.name).all()
+    
     customer_sales = {}
-    for sale in sales:
-        customer_name = sale.customer.name if sale.customer else 'عميل نقدي'
+    for customer_name, count, total_amount, net_amount in customer_rows:
+        customer_name = customer_name or 'عميل نقدي'
         if customer_name not in customer_sales:
             customer_sales[customer_name] = {
                 'count': 0,
                 'total_amount': 0,
                 'net_amount': 0
             }
-        customer_sales[customer_name]['count'] += 1
-        customer_sales[customer_name]['total_amount'] += float(sale.total_amount or 0)
-        customer_sales[customer_name]['net_amount'] += float(sale.net_amount or 0)
+        customer_sales[customer_name]['count'] += count
+        customer_sales[customer_name]['total_amount'] += float(total_amount)
+        customer_sales[customer_name]['net_amount'] += float(net_amount)
     
     # تجميع حسب التاريخ
+    daily_rows = db.session.query(
+        SalesDailyRollup.day,
+        SalesDailyRollup.sales_count,
+        SalesDailyRollup.total_amount,
+        SalesDailyRollup.net_amount
+    ).filter(*daily_filters).order_by(SalesDailyRollup.day).all()
+    
     daily_sales = {}
-    for sale in sales:
-        date_str = sale.sale_date.strftime('%Y-%m-%d') if sale.sale_date else 'غير محدد'
-        if date_str not in daily_sales:
-            daily_sales[date_str] = {
-                'count': 0,
-                'total_amount': 0,
-                'net_amount': 0
-            }
-        daily_sales[date_str]['count'] += 1
-        daily_sales[date_str]['total_amount'] += float(sale.total_amount or 0)
-        daily_sales[date_str]['net_amount'] += float(sale.net_amount or 0)
+    for day, count, total_amount, net_amount in daily_rows:
+        daily_sales[day.strftime('%Y-%m-%d')] = {
+            'count': count,
+            'total_amount': float(total_amount),
+            'net_amount': float(net_amount)
+        }
     
     return jsonify({
         'summary': {
-            'total_sales': total_sales,
-            'total_amount': float(total_amount),
-            'total_tax': float(total_tax),
-            'total_discount': float(total_discount),
-            'net_amount': float(net_amount)
+            'total_sales': totals[0],
+            'total_amount': float(totals[1]),
+            'total_tax': float(totals[2]),
+            'total_discount': float(totals[3]),
+            'net_amount': float(totals[4])
         },
         'customer_breakdown': customer_sales,
         'daily_breakdown': daily_sales
@@ -70,82 +103,88 @@ def get_sales_summary():
 
 @reports_bp.route('/reports/purchases-summary', methods=['GET'])
 def get_purchases_summary():
-    """تقرير ملخص المشتريات"""
+    """تقرير ملخص المشتريات (من جداول التجميع اليومي)"""
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query = Purchase.query.filter_by(status='completed')
-    
-    if start_date:
-        query = query.filter(Purchase.purchase_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-    if end_date:
-        query = query.filter(Purchase.purchase_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+    daily_filters = _day_filters(PurchasesDailyRollup, start_date, end_date)
+    supplier_filters = _day_filters(PurchasesSupplierDailyRollup, start_date, end_date)
     
-    purchases = query.all()
-    
-    total_purchases = len(purchases)
-    total_amount = sum(purchase.total_amount for purchase in purchases if purchase.total_amount)
-    total_tax = sum(purchase.tax_amount for purchase in purchases if purchase.tax_amount)
-    total_discount = sum(purchase.discount_amount for purchase in purchases if purchase.discount_amount)
-    net_amount = sum(purchase.net_amount for purchase in purchases if purchase.net_amount)
+    # الإجماليات في استعلام تجميعي واحد
+    totals = db.session.query(
+        func.coalesce(func.sum(PurchasesDailyRollup.purchases_count), 0),
+        func.coalesce(func.sum(PurchasesDailyRollup.total_amount), 0),
+        func.coalesce(func.sum(PurchasesDailyRollup.tax_amount), 0),
+        func.coalesce(func.sum(PurchasesDailyRollup.discount_amount), 0),
+        func.coalesce(func.sum(PurchasesDailyRollup.net_amount), 0)
+    ).filter(*daily_filters).one()
     
     # تجميع حسب المورد
+    supplier_rows = db.session.query(
+        Supplier.name,
+        func.sum(PurchasesSupplierDailyRollup.purchases_count),
+        func.coalesce(func.sum(PurchasesSupplierDailyRollup.total_amount), 0),
+        func.coalesce(func.sum(PurchasesSupplierDailyRollup.net_amount), 0)
+    ).select_from(PurchasesSupplierDailyRollup).outerjoin(
+        Supplier, PurchasesSupplierDailyRollup.supplier_id == Supplier.id
+    ).filter(*supplier_filters).group_by(PurchasesSupplierDailyRollup.supplier_id, Supplier.name).all()
+    
     supplier_purchases = {}
-    for purchase in purchases:
-        supplier_name = purchase.supplier.name if purchase.supplier else 'مورد غير محدد'
+    for supplier_name, count, total_amount, net_amount in supplier_rows:
+        supplier_name = supplier_name or 'مورد غير محدد'
         if supplier_name not in supplier_purchases:
             supplier_purchases[supplier_name] = {
                 'count': 0,
                 'total_amount': 0,
                 'net_amount': 0
             }
-        supplier_purchases[supplier_name]['count'] += 1
-        supplier_purchases[supplier_name]['total_amount'] += float(purchase.total_amount or 0)
-        supplier_purchases[supplier_name]['net_amount'] += float(purchase.net_amount or 0)
+        supplier_purchases[supplier_name]['count'] += count
+        supplier_purchases[supplier_name]['total_amount'] += float(total_amount)
+        supplier_purchases[supplier_name]['net_amount'] += float(net_amount)
     
     return jsonify({
         'summary': {
-            'total_purchases': total_purchases,
-            'total_amount': float(total_amount),
-            'total_tax': float(total_tax),
-            'total_discount': float(total_discount),
-            'net_amount': float(net_amount)
+            'total_purchases': totals[0],
+            'total_amount': float(totals[1]),
+            'total_tax': float(totals[2]),
+            'total_discount': float(totals[3]),
+            'net_amount': float(totals[4])
         },
         'supplier_breakdown': supplier_purchases
     })
 
 @reports_bp.route('/reports/profit-loss', methods=['GET'])
 def get_profit_loss():
-    """تقرير الأرباح والخسائر"""
+    """تقرير الأرباح والخسائر (من جداول التجميع اليومي)"""
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    # المبيعات
-    sales_query = Sale.query.filter_by(status='completed')
-    if start_date:
-        sales_query = sales_query.filter(Sale.sale_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-    if end_date:
-        sales_query = sales_query.filter(Sale.sale_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
-    
-    sales = sales_query.all()
-    total_sales_revenue = sum(sale.net_amount for sale in sales if sale.net_amount)
-    
-    # المشتريات
-    purchases_query = Purchase.query.filter_by(status='completed')
-    if start_date:
-        purchases_query = purchases_query.filter(Purchase.purchase_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-    if end_date:
-        purchases_query = purchases_query.filter(Purchase.purchase_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
-    
-    purchases = purchases_query.all()
-    total_purchases_cost = sum(purchase.net_amount for purchase in purchases if purchase.net_amount)
-    
-    # حساب تكلفة البضاعة المباعة
-    cost_of_goods_sold = 0
-    for sale in sales:
-        for item in sale.items:
-            if item.product and item.product.purchase_price:
-                cost_of_goods_sold += item.quantity * item.product.purchase_price
+    sales_totals = db.session.query(
+        func.coalesce(func.sum(SalesDailyRollup.net_amount), 0).label('net_amount'),
+        func.coalesce(func.sum(SalesDailyRollup.sales_count), 0).label('count')
+    ).filter(*_day_filters(SalesDailyRollup, start_date, end_date)).subquery()
+    
+    purchases_totals = db.session.query(
+        func.coalesce(func.sum(PurchasesDailyRollup.net_amount), 0).label('net_amount'),
+        func.coalesce(func.sum(PurchasesDailyRollup.purchases_count), 0).label('count')
+    ).filter(*_day_filters(PurchasesDailyRollup, start_date, end_date)).subquery()
+    
+    # حساب تكلفة البضاعة المباعة: SUM(الكمية المباعة يومياً * سعر الشراء) لكل منتج في الفترة
+    cogs = db.session.query(
+        func.coalesce(func.sum(SalesProductDailyRollup.quantity * Product.purchase_price), 0).label('amount')
+    ).select_from(SalesProductDailyRollup).join(
+        Product, SalesProductDailyRollup.product_id == Product.id
+    ).filter(*_day_filters(SalesProductDailyRollup, start_date, end_date)).subquery()
+    
+    # جميع القيم في رحلة واحدة إلى قاعدة البيانات (كل استعلام فرعي يعيد صفاً واحداً)
+    row = db.session.query(
+        sales_totals.c.net_amount,
+        sales_totals.c.count,
+        purchases_totals.c.net_amount,
+        purchases_totals.c.count,
+        cogs.c.amount
+    ).select_from(sales_totals).join(purchases_totals, true()).join(cogs, true()).one()
+    total_sales_revenue, sales_count, total_purchases_cost, purchases_count, cost_of_goods_sold = row
     
     # الأرباح الإجمالية
     gross_profit = float(total_sales_revenue) - float(cost_of_goods_sold)
@@ -159,12 +198,12 @@ def get_profit_loss():
     return jsonify({
         'revenue': {
             'total_sales': float(total_sales_revenue),
-            'sales_count': len(sales)
+            'sales_count': sales_count
         },
         'costs': {
             'total_purchases': float(total_purchases_cost),
             'cost_of_goods_sold': float(cost_of_goods_sold),
-            'purchases_count': len(purchases)
+            'purchases_count': purchases_count
         },
         'profit': {
             'gross_profit': gross_profit,
@@ -175,183 +214,174 @@ def get_profit_loss():
 
 @reports_bp.route('/reports/top-products', methods=['GET'])
 def get_top_products():
-    """تقرير أفضل المنتجات مبيعاً"""
+    """
+    تقرير أفضل المنتجات مبيعاً حسب الإيراد أو الكمية (rank_by).
+    عند تحديد month=YYYY-MM تُقرأ القائمة المحسوبة مسبقاً إن وجدت ولم تتغير فواتير الشهر بعد تحديثها
+    (الأمر refresh-top-products)، وإلا يُحسب التقرير مباشرة.
+    """
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
+    month = request.args.get('month')
     limit = request.args.get('limit', 10, type=int)
+    rank_by = request.args.get('rank_by', 'revenue')
     
-    # استعلام للحصول على أفضل المنتجات
-    query = db.session.query(
-        Product.id,
-        Product.name,
-        Product.code,
-        func.sum(db.session.query(Sale).join(Sale.items).filter(
-            Sale.status == 'completed'
-        ).subquery().c.quantity).label('total_quantity'),
-        func.sum(db.session.query(Sale).join(Sale.items).filter(
-            Sale.status == 'completed'
-        ).subquery().c.total_price).label('total_revenue')
-    ).join(Product.sale_items).join(Sale).filter(Sale.status == 'completed')
+    if rank_by not in RANK_COLUMNS:
+        return jsonify({'message': 'قيمة rank_by غير صالحة (revenue أو quantity)'}), 400
     
-    if start_date:
-        query = query.filter(Sale.sale_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-    if end_date:
-        query = query.filter(Sale.sale_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+    try:
+        if month:
+            products = materialized_top_products(month, rank_by, limit)
+            start, end = month_bounds(month)
+        else:
+            products = None
+            start = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+            end = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+    except ValueError:
+        return jsonify({'message': 'صيغة التاريخ غير صالحة'}), 400
     
-    products = query.group_by(Product.id).order_by(
-        func.sum(db.session.query(Sale).join(Sale.items).subquery().c.total_price).desc()
-    ).limit(limit).all()
+    if products is None:
+        products = top_products_query(start, end, rank_by, limit).all()
     
     result = []
     for product in products:
         result.append({
-            'product_id': product.id,
+            'product_id': product.product_id,
             'product_name': product.name,
             'product_code': product.code,
-            'total_quantity': product.total_quantity or 0,
+            'total_quantity': int(product.total_quantity or 0),
             'total_revenue': float(product.total_revenue or 0)
         })
     
     return jsonify(result)
 
+def _invoice_pdf_response(kind, model, invoice_id, load_invoice, build_data):
+    """
+    إرجاع الفاتورة كملف PDF من ذاكرة القرص إن وجد (حسب المعرف و updated_at وبيانات الشركة)،
+    وإلا تحميل الفاتورة وتوليد الملف وحفظه.
+    """
+    if not PDF_AVAILABLE:
+        return jsonify({'message': 'توليد PDF غير متاح: يجب تثبيت reportlab و arabic-reshaper و python-bidi'}), 501
+    font_path = find_font(current_app.config.get('INVOICE_PDF_FONT'))
+    if not font_path:
+        return jsonify({'message': 'لم يتم العثور على خط يدعم العربية، حدد المسار في INVOICE_PDF_FONT'}), 501
+
+    header = db.session.query(model.updated_at, model.invoice_number).filter(model.id == invoice_id).first()
+    if header is None:
+        abort(404)
+
+    company = company_cache.get()
+    images = company_images(company, current_app.static_folder)
+    path = cache_path(
+        current_app.config['INVOICE_PDF_CACHE_DIR'], kind, invoice_id, header.updated_at, company, images
+    )
+
+    if not os.path.exists(path):
+        try:
+            invoice_data = build_data(load_invoice(), company)
+            write_cached(path, render_invoice_pdf(invoice_data, font_path, images))
+        except Exception as e:
+            return jsonify({'message': f'حدث خطأ أثناء توليد ملف PDF: {str(e)}'}), 500
+
+    return send_file(path, mimetype='application/pdf', download_name=f'{header.invoice_number or kind}.pdf')
+
 @reports_bp.route('/reports/invoice/<int:sale_id>/print', methods=['GET'])
 def print_sale_invoice(sale_id):
-    """طباعة فاتورة مبيعات"""
-    sale = Sale.query.get_or_404(sale_id)
-    company = Company.query.first()
-    
-    invoice_data = {
-        'company': {
-            'name': company.name if company else 'اسم الشركة',
-            'address': company.address if company else 'عنوان الشركة',
-            'phone': company.phone if company else 'رقم الهاتف',
-            'email': company.email if company else 'البريد الإلكتروني',
-            'tax_number': company.tax_number if company else 'الرقم الضريبي'
-        },
-        'invoice': {
-            'number': sale.invoice_number,
-            'date': sale.sale_date.strftime('%Y-%m-%d') if sale.sale_date else '',
-            'type': 'فاتورة ضريبية' if sale.invoice_type == 'tax' else 'فاتورة عادية'
-        },
-        'customer': {
-            'name': sale.customer.name if sale.customer else 'عميل نقدي',
-            'address': sale.customer.address if sale.customer else '',
-            'phone': sale.customer.phone if sale.customer else '',
-            'tax_number': sale.customer.tax_number if sale.customer else ''
-        },
-        'items': [],
-        'totals': {
-            'subtotal': float(sale.total_amount or 0),
-            'discount': float(sale.discount_amount or 0),
-            'tax': float(sale.tax_amount or 0),
-            'total': float(sale.net_amount or 0)
-        },
-        'notes': sale.notes or ''
-    }
-    
-    for item in sale.items:
-        invoice_data['items'].append({
-            'name': item.product.name if item.product else 'منتج محذوف',
-            'quantity': item.quantity,
-            'unit_price': float(item.unit_price),
-            'total_price': float(item.total_price)
-        })
+    """طباعة فاتورة مبيعات (JSON، أو ملف PDF عند format=pdf)"""
+    load_sale = lambda: sale_detail_serializer.apply(Sale.query).get_or_404(sale_id)
+    if request.args.get('format') == 'pdf':
+        return _invoice_pdf_response('sale', Sale, sale_id, load_sale, sale_invoice_data)
     
-    return jsonify(invoice_data)
+    return jsonify(sale_invoice_data(load_sale(), company_cache.get()))
 
 @reports_bp.route('/reports/invoice/<int:purchase_id>/purchase-print', methods=['GET'])
 def print_purchase_invoice(purchase_id):
-    """طباعة فاتورة مشتريات"""
-    purchase = Purchase.query.get_or_404(purchase_id)
-    company = Company.query.first()
-    
-    invoice_data = {
-        'company': {
-            'name': company.name if company else 'اسم الشركة',
-            'address': company.address if company else 'عنوان الشركة',
-            'phone': company.phone if company else 'رقم الهاتف',
-            'email': company.email if company else 'البريد الإلكتروني',
-            'tax_number': company.tax_number if company else 'الرقم الضريبي'
-        },
-        'invoice': {
-            'number': purchase.invoice_number,
-            'date': purchase.purchase_date.strftime('%Y-%m-%d') if purchase.purchase_date else '',
-            'type': 'فاتورة مشتريات'
-        },
-        'supplier': {
-            'name': purchase.supplier.name if purchase.supplier else 'مورد غير محدد',
-            'address': purchase.supplier.address if purchase.supplier else '',
-            'phone': purchase.supplier.phone if purchase.supplier else '',
-            'tax_number': purchase.supplier.tax_number if purchase.supplier else ''
-        },
-        'items': [],
-        'totals': {
-            'subtotal': float(purchase.total_amount or 0),
-            'discount': float(purchase.discount_amount or 0),
-            'tax': float(purchase.tax_amount or 0),
-            'total': float(purchase.net_amount or 0)
-        },
-        'notes': purchase.notes or ''
-    }
-    
-    for item in purchase.items:
-        invoice_data['items'].append({
-            'name': item.product.name if item.product else 'منتج محذوف',
-            'quantity': item.quantity,
-            'unit_price': float(item.unit_price),
-            'total_price': float(item.total_price)
-        })
+    """طباعة فاتورة مشتريات (JSON، أو ملف PDF عند format=pdf)"""
+    load_purchase = lambda: purchase_detail_serializer.apply(Purchase.query).get_or_404(purchase_id)
+    if request.args.get('format') == 'pdf':
+        return _invoice_pdf_response('purchase', Purchase, purchase_id, load_purchase, purchase_invoice_data)
     
-    return jsonify(invoice_data)
+    return jsonify(purchase_invoice_data(load_purchase(), company_cache.get()))
+
+@reports_bp.route('/reports/invoices/batch', methods=['POST'])
+def render_invoice_batch():
+    """توليد فواتير PDF لفترة أو لقائمة معرفات وإرجاعها في ملف ZIP"""
+    data = request.get_json() or {}
+    kind = data.get('type', 'sale')
+    if kind not in INVOICE_KINDS:
+        return jsonify({'message': 'نوع الفواتير غير مدعوم (sale أو purchase)'}), 400
+    
+    try:
+        ids = parse_ids(data.get('ids'))
+        start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date() if data.get('start_date') else None
+        end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date() if data.get('end_date') else None
+    except (TypeError, ValueError):
+        return jsonify({'message': 'قيم المعرفات أو التواريخ غير صالحة'}), 400
+    
+    if not ids and not (start_date or end_date):
+        return jsonify({'message': 'يجب تحديد المعرفات أو فترة زمنية'}), 400
+    
+    # الطلب يولد الملفات ويحتفظ بها حتى إرسال الأرشيف، فحجم الدفعة محدود
+    max_invoices = current_app.config['INVOICE_BATCH_MAX']
+    count = len(ids) if ids else count_invoices(kind, start_date=start_date, end_date=end_date)
+    if count > max_invoices:
+        return jsonify({
+            'message': f'عدد الفواتير ({count}) يتجاوز الحد المسموح ({max_invoices})، '
+                       'قسّم الفترة أو استخدم الأمر flask render-invoices'
+        }), 400
+    
+    invoices = load_invoices(kind, ids, start_date, end_date)
+    if not invoices:
+        return jsonify({'message': 'لا توجد فواتير مطابقة'}), 404
+    
+    try:
+        # التوليد داخل عملية الخادم: عمليات المجمع تعيد استيراد __main__ (انظر _pool_context)،
+        # والدفعة محدودة بـ INVOICE_BATCH_MAX والملفات الموجودة لا يُعاد توليدها
+        files = render_invoices(kind, invoices, workers=0)
+    except RuntimeError as e:
+        return jsonify({'message': str(e)}), 501
+    
+    archive = tempfile.NamedTemporaryFile(suffix='.zip', delete=False)
+    archive.close()
+    write_zip(files, archive.name)
+    
+    response = send_file(archive.name, mimetype='application/zip', download_name=f'{kind}_invoices.zip')
+    response.headers['X-Invoice-Count'] = str(len(files))
+    response.call_on_close(lambda: os.remove(archive.name))
+    return response
 
 @reports_bp.route('/reports/financial-summary', methods=['GET'])
 def get_financial_summary():
-    """ملخص مالي شامل"""
+    """ملخص مالي شامل في استعلام واحد من استعلامات فرعية تجميعية (جداول التجميع اليومي وجدول الأصناف)"""
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    # المبيعات
-    sales_query = Sale.query.filter_by(status='completed')
-    if start_date:
-        sales_query = sales_query.filter(Sale.sale_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-    if end_date:
-        sales_query = sales_query.filter(Sale.sale_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
-    
-    sales = sales_query.all()
+    sales_filters = _day_filters(SalesDailyRollup, start_date, end_date)
+    purchases_filters = _day_filters(PurchasesDailyRollup, start_date, end_date)
     
-    # المشتريات
-    purchases_query = Purchase.query.filter_by(status='completed')
-    if start_date:
-        purchases_query = purchases_query.filter(Purchase.purchase_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-    if end_date:
-        purchases_query = purchases_query.filter(Purchase.purchase_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+    def aggregate(expression, *filters):
+        return select(func.coalesce(expression, 0)).where(*filters).scalar_subquery()
     
-    purchases = purchases_query.all()
-    
-    # حساب القيم
-    total_sales = sum(sale.net_amount for sale in sales if sale.net_amount)
-    total_purchases = sum(purchase.net_amount for purchase in purchases if purchase.net_amount)
-    
-    # قيمة المخزون الحالي
-    products = Product.query.filter_by(is_active=True).all()
-    inventory_value = sum(
-        (product.current_stock * product.purchase_price) 
-        for product in products 
-        if product.purchase_price
-    )
+    summary = db.session.execute(select(
+        aggregate(func.sum(SalesDailyRollup.net_amount), *sales_filters).label('total_sales'),
+        aggregate(func.sum(SalesDailyRollup.sales_count), *sales_filters).label('sales_count'),
+        aggregate(func.sum(PurchasesDailyRollup.net_amount), *purchases_filters).label('total_purchases'),
+        aggregate(func.sum(PurchasesDailyRollup.purchases_count), *purchases_filters).label('purchases_count'),
+        aggregate(func.sum(Product.current_stock * Product.purchase_price), Product.is_active == True).label('inventory_value'),
+        aggregate(func.count(Product.id), Product.is_active == True).label('total_products')
+    )).one()
     
     return jsonify({
         'sales': {
-            'total_amount': float(total_sales),
-            'count': len(sales)
+            'total_amount': float(summary.total_sales),
+            'count': int(summary.sales_count)
         },
         'purchases': {
-            'total_amount': float(total_purchases),
-            'count': len(purchases)
+            'total_amount': float(summary.total_purchases),
+            'count': int(summary.purchases_count)
         },
         'inventory': {
-            'total_value': float(inventory_value),
-            'total_products': len(products)
+            'total_value': float(summary.inventory_value),
+            'total_products': summary.total_products
         },
-        'net_flow': float(total_sales) - float(total_purchases)
+        'net_flow': float(summary.total_sales) - float(summary.total_purchases)
     })
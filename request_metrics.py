@@ -0,0 +1,159 @@
+import threading
+import time
+from bisect import bisect_left
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from src.utils.cache import cache_stats
+
+# حدود فئات المدرجات التكرارية (بنفس أسلوب Prometheus: كل فئة تشمل القيم الأقل من أو تساوي حدها)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+LABELS = ('blueprint', 'endpoint', 'method')
+
+_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, name, description, buckets, labels=LABELS):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.labels = labels
+        self.series = {}  # قيم التسميات ← [عدد كل فئة (غير تراكمي)، المجموع، العدد]
+
+    def observe(self, label_values, value):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        for label_values, (counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels + ('le',), label_values + (_format_number(bound),))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f'{self.name}_sum{labels} {_format_number(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, description, labels=LABELS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.series = {}
+
+    def inc(self, label_values, value=1):
+        self.series[label_values] = self.series.get(label_values, 0) + value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} counter']
+        for label_values, value in sorted(self.series.items()):
+            lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {_format_number(value)}')
+        return lines
+
+
+requests_total = Counter(
+    'http_requests_total', 'عدد الطلبات حسب النقطة وحالة الاستجابة', LABELS + ('status',)
+)
+request_duration = Histogram(
+    'http_request_duration_seconds', 'زمن معالجة الطلب بالثواني', LATENCY_BUCKETS
+)
+response_size = Histogram(
+    'http_response_size_bytes', 'حجم جسم الاستجابة بالبايت', SIZE_BUCKETS
+)
+# مجموع هذا المدرج (_sum) هو إجمالي عدد الاستعلامات للنقطة
+request_queries = Histogram(
+    'http_request_sql_queries', 'عدد استعلامات SQL في الطلب الواحد', SQL_COUNT_BUCKETS
+)
+sql_duration_total = Counter(
+    'http_request_sql_duration_seconds_total', 'إجمالي زمن تنفيذ استعلامات SQL بالثواني'
+)
+
+METRICS = (requests_total, request_duration, response_size, request_queries, sql_duration_total)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['metrics_query_start'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('metrics_query_start', None)
+    # الاستعلامات خارج الطلبات (أوامر CLI، الترحيلات) لا تُحسب
+    if started is not None and has_request_context() and 'metrics_started' in g:
+        g.metrics_sql_count += 1
+        g.metrics_sql_time += time.perf_counter() - started
+
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_sql_count = 0
+    g.metrics_sql_time = 0.0
+
+
+def _record_request(response):
+    if 'metrics_started' not in g:
+        return response
+    elapsed = time.perf_counter() - g.metrics_started
+    # الطلبات غير المطابقة لأي مسار تُجمع تحت تسمية واحدة حتى لا يتضخم عدد السلاسل
+    labels = (request.blueprint or '', request.endpoint or 'unmatched', request.method)
+    size = response.calculate_content_length()
+
+    with _lock:
+        requests_total.inc(labels + (str(response.status_code),))
+        request_duration.observe(labels, elapsed)
+        if size is not None:
+            response_size.observe(labels, size)
+        request_queries.observe(labels, g.metrics_sql_count)
+        sql_duration_total.inc(labels, g.metrics_sql_time)
+    return response
+
+
+def init_request_metrics(app, engine):
+    """
+    تسجيل مقاييس كل طلب: الزمن وحجم الاستجابة وعدد وزمن استعلامات SQL (من أحداث محرك SQLAlchemy).
+    المقاييس في ذاكرة العملية، فكل عملية في النشر بعدة عمليات تعرض مقاييسها فقط.
+    """
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_record_request)
+
+
+def render_metrics():
+    """جميع المقاييس بصيغة Prometheus النصية، مع عدادات البيانات المخزنة في الذاكرة"""
+    with _lock:
+        lines = []
+        for metric in METRICS:
+            lines.extend(metric.render())
+
+    stats = cache_stats()
+    for kind, description in (('hits', 'عدد مرات الإصابة'), ('misses', 'عدد مرات الإخفاق')):
+        lines.append(f'# HELP cache_{kind}_total {description} في البيانات المخزنة في الذاكرة')
+        lines.append(f'# TYPE cache_{kind}_total counter')
+        for name, values in sorted(stats.items()):
+            lines.append(f'cache_{kind}_total{_format_labels(("cache",), (name,))} {values[kind]}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,155 @@
+import click
+from collections import defaultdict
+from decimal import Decimal
+from flask.cli import with_appcontext
+from sqlalchemy import func, insert
+from src.models.models import (
+    db, Sale, SaleItem, Purchase, PurchaseItem,
+    SalesDailyRollup, SalesCustomerDailyRollup, SalesProductDailyRollup,
+    PurchasesDailyRollup, PurchasesSupplierDailyRollup, PurchasesProductDailyRollup
+)
+from src.utils.db_utils import upsert_insert
+
+
+def _increment(model, keys, amounts):
+    """إضافة القيم إلى صف التجميع المحدد بالمفاتيح، وإنشاؤه إذا لم يكن موجوداً"""
+    table = model.__table__
+    stmt = upsert_insert(table)
+
+    if stmt is not None:
+        stmt = stmt.values(**keys, **amounts)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: table.c[name] + stmt.excluded[name] for name in amounts}
+        )
+        db.session.execute(stmt)
+        return
+
+    # قواعد بيانات أخرى: تحديث ثم إدراج عند عدم وجود الصف
+    conditions = [table.c[name] == value for name, value in keys.items()]
+    result = db.session.execute(
+        table.update().where(*conditions).values(
+            {name: table.c[name] + value for name, value in amounts.items()}
+        )
+    )
+    if result.rowcount == 0:
+        db.session.execute(table.insert().values(**keys, **amounts))
+
+
+def record_sale(sale, items):
+    """تحديث جداول تجميع المبيعات بفاتورة مكتملة (داخل نفس المعاملة)"""
+    amounts = {
+        'sales_count': 1,
+        'total_amount': sale.total_amount or Decimal('0'),
+        'tax_amount': sale.tax_amount or Decimal('0'),
+        'discount_amount': sale.discount_amount or Decimal('0'),
+        'net_amount': sale.net_amount or Decimal('0')
+    }
+    _increment(SalesDailyRollup, {'day': sale.sale_date}, amounts)
+    _increment(SalesCustomerDailyRollup, {'day': sale.sale_date, 'customer_id': sale.customer_id}, amounts)
+
+    for product_id, product_amounts in _group_items(items).items():
+        _increment(SalesProductDailyRollup, {'day': sale.sale_date, 'product_id': product_id}, product_amounts)
+
+
+def record_purchase(purchase, items):
+    """تحديث جداول تجميع المشتريات بفاتورة مكتملة (داخل نفس المعاملة)"""
+    amounts = {
+        'purchases_count': 1,
+        'total_amount': purchase.total_amount or Decimal('0'),
+        'tax_amount': purchase.tax_amount or Decimal('0'),
+        'discount_amount': purchase.discount_amount or Decimal('0'),
+        'net_amount': purchase.net_amount or Decimal('0')
+    }
+    _increment(PurchasesDailyRollup, {'day': purchase.purchase_date}, amounts)
+    _increment(PurchasesSupplierDailyRollup, {'day': purchase.purchase_date, 'supplier_id': purchase.supplier_id}, amounts)
+
+    for product_id, product_amounts in _group_items(items).items():
+        _increment(PurchasesProductDailyRollup, {'day': purchase.purchase_date, 'product_id': product_id}, product_amounts)
+
+
+def _group_items(items):
+    """تجميع عناصر الفاتورة حسب المنتج حتى يتم تحديث كل صف مرة واحدة"""
+    grouped = defaultdict(lambda: {'lines_count': 0, 'quantity': 0, 'total_amount': Decimal('0')})
+    for item in items:
+        grouped[item.product_id]['lines_count'] += 1
+        grouped[item.product_id]['quantity'] += item.quantity
+        grouped[item.product_id]['total_amount'] += item.total_price
+    return grouped
+
+
+def _rebuild(model, query):
+    """إعادة بناء جدول تجميع بالكامل بجملة INSERT ... SELECT ... GROUP BY واحدة"""
+    db.session.query(model).delete(synchronize_session=False)
+    statement = query.statement
+    columns = [model.__table__.c[column.name] for column in statement.selected_columns]
+    db.session.execute(insert(model.__table__).from_select(columns, statement))
+
+
+def _invoice_aggregates(model, count_label):
+    return (
+        func.count(model.id).label(count_label),
+        func.coalesce(func.sum(model.total_amount), 0).label('total_amount'),
+        func.coalesce(func.sum(model.tax_amount), 0).label('tax_amount'),
+        func.coalesce(func.sum(model.discount_amount), 0).label('discount_amount'),
+        func.coalesce(func.sum(model.net_amount), 0).label('net_amount')
+    )
+
+
+def _item_aggregates(item_model):
+    return (
+        func.count(item_model.id).label('lines_count'),
+        func.coalesce(func.sum(item_model.quantity), 0).label('quantity'),
+        func.coalesce(func.sum(item_model.total_price), 0).label('total_amount')
+    )
+
+
+def rebuild_rollups():
+    """إعادة بناء جميع جداول التجميع من الفواتير المكتملة السابقة"""
+    sales_filters = [Sale.status == 'completed', Sale.sale_date.isnot(None)]
+    purchases_filters = [Purchase.status == 'completed', Purchase.purchase_date.isnot(None)]
+
+    _rebuild(SalesDailyRollup, db.session.query(
+        Sale.sale_date.label('day'), *_invoice_aggregates(Sale, 'sales_count')
+    ).filter(*sales_filters).group_by(Sale.sale_date))
+
+    _rebuild(SalesCustomerDailyRollup, db.session.query(
+        Sale.sale_date.label('day'), Sale.customer_id.label('customer_id'),
+        *_invoice_aggregates(Sale, 'sales_count')
+    ).filter(*sales_filters).group_by(Sale.sale_date, Sale.customer_id))
+
+    _rebuild(SalesProductDailyRollup, db.session.query(
+        Sale.sale_date.label('day'), SaleItem.product_id.label('product_id'),
+        *_item_aggregates(SaleItem)
+    ).join(Sale, SaleItem.sale_id == Sale.id).filter(*sales_filters).group_by(
+        Sale.sale_date, SaleItem.product_id
+    ))
+
+    _rebuild(PurchasesDailyRollup, db.session.query(
+        Purchase.purchase_date.label('day'), *_invoice_aggregates(Purchase, 'purchases_count')
+    ).filter(*purchases_filters).group_by(Purchase.purchase_date))
+
+    _rebuild(PurchasesSupplierDailyRollup, db.session.query(
+        Purchase.purchase_date.label('day'), Purchase.supplier_id.label('supplier_id'),
+        *_invoice_aggregates(Purchase, 'purchases_count')
+    ).filter(*purchases_filters).group_by(Purchase.purchase_date, Purchase.supplier_id))
+
+    _rebuild(PurchasesProductDailyRollup, db.session.query(
+        Purchase.purchase_date.label('day'), PurchaseItem.product_id.label('product_id'),
+        *_item_aggregates(PurchaseItem)
+    ).join(Purchase, PurchaseItem.purchase_id == Purchase.id).filter(*purchases_filters).group_by(
+        Purchase.purchase_date, PurchaseItem.product_id
+    ))
+
+
+@click.command('rebuild-rollups')
+@with_appcontext
+def rebuild_rollups_command():
+    """إعادة بناء جداول التجميع اليومي للمبيعات والمشتريات من السجل الكامل"""
+    try:
+        rebuild_rollups()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    click.echo('تمت إعادة بناء جداول التجميع بنجاح')
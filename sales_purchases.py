@@ -1,85 +1,102 @@
 from flask import Blueprint, request, jsonify
 from src.models.models import db, Sale, SaleItem, Purchase, PurchaseItem, Product, Customer, Supplier, StockMovement
+from src.models.serializers import sale_serializer, sale_detail_serializer, purchase_serializer, purchase_detail_serializer
+from src.utils.pagination import keyset_page, get_page_size
+from src.utils.rollups import record_sale, record_purchase
+from src.utils.sequences import allocate_invoice_number
 from datetime import datetime, date
 from decimal import Decimal
 
 sales_purchases_bp = Blueprint('sales_purchases', __name__)
 
+def _load_products(items_data):
+    """جلب جميع أصناف الفاتورة باستعلام IN واحد بدلاً من استعلام لكل عنصر"""
+    product_ids = set()
+    for item_data in items_data:
+        try:
+            product_ids.add(int(item_data['product_id']))
+        except (TypeError, ValueError):
+            pass
+    if not product_ids:
+        return {}
+    # المفتاح نصي لأن الواجهة قد ترسل معرف المنتج كنص
+    return {str(product.id): product for product in Product.query.filter(Product.id.in_(product_ids)).all()}
+
 # المبيعات
 @sales_purchases_bp.route('/sales', methods=['GET'])
 def get_sales():
-    """الحصول على قائمة المبيعات"""
-    sales = Sale.query.order_by(Sale.created_at.desc()).all()
+    """الحصول على قائمة المبيعات (ترقيم بالمؤشر مع الفلترة)"""
+    cursor = request.args.get('cursor')
+    limit = get_page_size(request.args.get('limit', type=int))
+    customer_id = request.args.get('customer_id', type=int)
+    status = request.args.get('status')
+    invoice_type = request.args.get('invoice_type')
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    min_amount = request.args.get('min_amount', type=float)
+    max_amount = request.args.get('max_amount', type=float)
+    include_total = request.args.get('include_total', 'false').lower() == 'true'
+    
+    query = sale_serializer.apply(Sale.query)
+    
+    if customer_id:
+        query = query.filter(Sale.customer_id == customer_id)
+    if status:
+        query = query.filter(Sale.status == status)
+    if invoice_type:
+        query = query.filter(Sale.invoice_type == invoice_type)
+    try:
+        if start_date:
+            query = query.filter(Sale.sale_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
+        if end_date:
+            query = query.filter(Sale.sale_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+    except ValueError:
+        return jsonify({'message': 'صيغة التاريخ غير صالحة'}), 400
+    if min_amount is not None:
+        query = query.filter(Sale.net_amount >= min_amount)
+    if max_amount is not None:
+        query = query.filter(Sale.net_amount <= max_amount)
+    
+    try:
+        sales, next_cursor = keyset_page(query, Sale.created_at, Sale.id, cursor, limit)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     
-    sales_list = []
-    for sale in sales:
-        sales_list.append({
-            'id': sale.id,
-            'invoice_number': sale.invoice_number,
-            'customer_id': sale.customer_id,
-            'customer_name': sale.customer.name if sale.customer else None,
-            'employee_id': sale.employee_id,
-            'sale_date': sale.sale_date.isoformat() if sale.sale_date else None,
-            'total_amount': float(sale.total_amount) if sale.total_amount else 0,
-            'tax_amount': float(sale.tax_amount) if sale.tax_amount else 0,
-            'discount_amount': float(sale.discount_amount) if sale.discount_amount else 0,
-            'net_amount': float(sale.net_amount) if sale.net_amount else 0,
-            'invoice_type': sale.invoice_type,
-            'status': sale.status,
-            'notes': sale.notes,
-            'created_at': sale.created_at.isoformat() if sale.created_at else None
-        })
+    sales_list = sale_serializer.many(sales)
     
-    return jsonify(sales_list)
+    result = {
+        'sales': sales_list,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    }
+    # العد الكلي مكلف على الجداول الكبيرة لذا لا يتم إلا عند طلبه صراحة
+    if include_total:
+        result['total'] = query.order_by(None).count()
+    
+    return jsonify(result)
 
 @sales_purchases_bp.route('/sales/<int:sale_id>', methods=['GET'])
 def get_sale(sale_id):
     """الحصول على بيانات مبيعة محددة مع العناصر"""
-    sale = Sale.query.get_or_404(sale_id)
-    
-    items = []
-    for item in sale.items:
-        items.append({
-            'id': item.id,
-            'product_id': item.product_id,
-            'product_name': item.product.name if item.product else None,
-            'quantity': item.quantity,
-            'unit_price': float(item.unit_price),
-            'total_price': float(item.total_price)
-        })
+    sale = sale_detail_serializer.apply(Sale.query).get_or_404(sale_id)
     
-    return jsonify({
-        'id': sale.id,
-        'invoice_number': sale.invoice_number,
-        'customer_id': sale.customer_id,
-        'customer_name': sale.customer.name if sale.customer else None,
-        'employee_id': sale.employee_id,
-        'sale_date': sale.sale_date.isoformat() if sale.sale_date else None,
-        'total_amount': float(sale.total_amount) if sale.total_amount else 0,
-        'tax_amount': float(sale.tax_amount) if sale.tax_amount else 0,
-        'discount_amount': float(sale.discount_amount) if sale.discount_amount else 0,
-        'net_amount': float(sale.net_amount) if sale.net_amount else 0,
-        'invoice_type': sale.invoice_type,
-        'status': sale.status,
-        'notes': sale.notes,
-        'items': items,
-        'created_at': sale.created_at.isoformat() if sale.created_at else None
-    })
+    return jsonify(sale_detail_serializer.dump(sale))
 
 @sales_purchases_bp.route('/sales', methods=['POST'])
 def create_sale():
     """إنشاء مبيعة جديدة"""
     data = request.get_json()
     
-    # إنشاء رقم فاتورة تلقائي
-    last_sale = Sale.query.order_by(Sale.id.desc()).first()
-    invoice_number = f"INV-{(last_sale.id + 1) if last_sale else 1:06d}"
+    sale_date = datetime.strptime(data.get('sale_date'), '%Y-%m-%d').date() if data.get('sale_date') else date.today()
+    
+    # إنشاء رقم فاتورة تلقائي من عداد ذري
+    invoice_number = allocate_invoice_number('INV', Sale, branch=data.get('branch'), invoice_date=sale_date)
     
     sale = Sale(
         invoice_number=invoice_number,
         customer_id=data.get('customer_id'),
         employee_id=data.get('employee_id'),
-        sale_date=datetime.strptime(data.get('sale_date'), '%Y-%m-%d').date() if data.get('sale_date') else date.today(),
+        sale_date=sale_date,
         invoice_type=data.get('invoice_type', 'regular'),
         status='pending',
         notes=data.get('notes')
@@ -90,19 +107,29 @@ def create_sale():
         db.session.flush()  # للحصول على ID
         
         total_amount = Decimal('0')
+        sale_items = []
+        items_data = data.get('items', [])
+        products = _load_products(items_data)
         
         # إضافة عناصر المبيعة
-        for item_data in data.get('items', []):
-            product = Product.query.get(item_data['product_id'])
+        for item_data in items_data:
+            product = products.get(str(item_data['product_id']))
             if not product:
+                db.session.rollback()
                 return jsonify({'message': f'المنتج غير موجود: {item_data["product_id"]}'}), 400
             
             quantity = int(item_data['quantity'])
             unit_price = Decimal(str(item_data['unit_price']))
             total_price = quantity * unit_price
             
-            # التحقق من توفر المخزون
-            if product.current_stock < quantity:
+            # التحقق من توفر المخزون وخصمه في جملة UPDATE واحدة مشروطة
+            # حتى لا يتم البيع بأكثر من المخزون عند تزامن عدة فواتير على نفس الصنف
+            updated = Product.query.filter(
+                Product.id == product.id,
+                Product.current_stock >= quantity
+            ).update({Product.current_stock: Product.current_stock - quantity}, synchronize_session=False)
+            if not updated:
+                db.session.rollback()
                 return jsonify({'message': f'المخزون غير كافي للمنتج: {product.name}'}), 400
             
             sale_item = SaleItem(
@@ -114,16 +141,15 @@ def create_sale():
             )
             
             db.session.add(sale_item)
+            sale_items.append(sale_item)
             total_amount += total_price
             
-            # تحديث المخزون
-            product.current_stock -= quantity
-            
             # تسجيل حركة المخزون
             stock_movement = StockMovement(
                 product_id=product.id,
                 movement_type='out',
                 quantity=quantity,
+                quantity_change=-quantity,
                 reference_type='sale',
                 reference_id=sale.id,
                 employee_id=data.get('employee_id')
@@ -144,6 +170,9 @@ def create_sale():
         sale.net_amount = net_amount
         sale.status = 'completed'
         
+        # تحديث جداول التجميع اليومي في نفس المعاملة
+        record_sale(sale, sale_items)
+        
         db.session.commit()
         return jsonify({'message': 'تم إنشاء المبيعة بنجاح', 'id': sale.id, 'invoice_number': sale.invoice_number}), 201
         
@@ -154,76 +183,75 @@ def create_sale():
 # المشتريات
 @sales_purchases_bp.route('/purchases', methods=['GET'])
 def get_purchases():
-    """الحصول على قائمة المشتريات"""
-    purchases = Purchase.query.order_by(Purchase.created_at.desc()).all()
+    """الحصول على قائمة المشتريات (ترقيم بالمؤشر مع الفلترة)"""
+    cursor = request.args.get('cursor')
+    limit = get_page_size(request.args.get('limit', type=int))
+    supplier_id = request.args.get('supplier_id', type=int)
+    status = request.args.get('status')
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    min_amount = request.args.get('min_amount', type=float)
+    max_amount = request.args.get('max_amount', type=float)
+    include_total = request.args.get('include_total', 'false').lower() == 'true'
     
-    purchases_list = []
-    for purchase in purchases:
-        purchases_list.append({
-            'id': purchase.id,
-            'invoice_number': purchase.invoice_number,
-            'supplier_id': purchase.supplier_id,
-            'supplier_name': purchase.supplier.name if purchase.supplier else None,
-            'employee_id': purchase.employee_id,
-            'purchase_date': purchase.purchase_date.isoformat() if purchase.purchase_date else None,
-            'total_amount': float(purchase.total_amount) if purchase.total_amount else 0,
-            'tax_amount': float(purchase.tax_amount) if purchase.tax_amount else 0,
-            'discount_amount': float(purchase.discount_amount) if purchase.discount_amount else 0,
-            'net_amount': float(purchase.net_amount) if purchase.net_amount else 0,
-            'status': purchase.status,
-            'notes': purchase.notes,
-            'created_at': purchase.created_at.isoformat() if purchase.created_at else None
-        })
+    query = purchase_serializer.apply(Purchase.query)
     
-    return jsonify(purchases_list)
+    if supplier_id:
+        query = query.filter(Purchase.supplier_id == supplier_id)
+    if status:
+        query = query.filter(Purchase.status == status)
+    try:
+        if start_date:
+            query = query.filter(Purchase.purchase_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
+        if end_date:
+            query = query.filter(Purchase.purchase_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+    except ValueError:
+        return jsonify({'message': 'صيغة التاريخ غير صالحة'}), 400
+    if min_amount is not None:
+        query = query.filter(Purchase.net_amount >= min_amount)
+    if max_amount is not None:
+        query = query.filter(Purchase.net_amount <= max_amount)
+    
+    try:
+        purchases, next_cursor = keyset_page(query, Purchase.created_at, Purchase.id, cursor, limit)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    purchases_list = purchase_serializer.many(purchases)
+    
+    result = {
+        'purchases': purchases_list,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    }
+    # العد الكلي مكلف على الجداول الكبيرة لذا لا يتم إلا عند طلبه صراحة
+    if include_total:
+        result['total'] = query.order_by(None).count()
+    
+    return jsonify(result)
 
 @sales_purchases_bp.route('/purchases/<int:purchase_id>', methods=['GET'])
 def get_purchase(purchase_id):
     """الحصول على بيانات مشترى محدد مع العناصر"""
-    purchase = Purchase.query.get_or_404(purchase_id)
+    purchase = purchase_detail_serializer.apply(Purchase.query).get_or_404(purchase_id)
     
-    items = []
-    for item in purchase.items:
-        items.append({
-            'id': item.id,
-            'product_id': item.product_id,
-            'product_name': item.product.name if item.product else None,
-            'quantity': item.quantity,
-            'unit_price': float(item.unit_price),
-            'total_price': float(item.total_price)
-        })
-    
-    return jsonify({
-        'id': purchase.id,
-        'invoice_number': purchase.invoice_number,
-        'supplier_id': purchase.supplier_id,
-        'supplier_name': purchase.supplier.name if purchase.supplier else None,
-        'employee_id': purchase.employee_id,
-        'purchase_date': purchase.purchase_date.isoformat() if purchase.purchase_date else None,
-        'total_amount': float(purchase.total_amount) if purchase.total_amount else 0,
-        'tax_amount': float(purchase.tax_amount) if purchase.tax_amount else 0,
-        'discount_amount': float(purchase.discount_amount) if purchase.discount_amount else 0,
-        'net_amount': float(purchase.net_amount) if purchase.net_amount else 0,
-        'status': purchase.status,
-        'notes': purchase.notes,
-        'items': items,
-        'created_at': purchase.created_at.isoformat() if purchase.created_at else None
-    })
+    return jsonify(purchase_detail_serializer.dump(purchase))
 
 @sales_purchases_bp.route('/purchases', methods=['POST'])
 def create_purchase():
     """إنشاء مشترى جديد"""
     data = request.get_json()
     
-    # إنشاء رقم فاتورة تلقائي
-    last_purchase = Purchase.query.order_by(Purchase.id.desc()).first()
-    invoice_number = f"PUR-{(last_purchase.id + 1) if last_purchase else 1:06d}"
+    purchase_date = datetime.strptime(data.get('purchase_date'), '%Y-%m-%d').date() if data.get('purchase_date') else date.today()
+    
+    # إنشاء رقم فاتورة تلقائي من عداد ذري
+    invoice_number = allocate_invoice_number('PUR', Purchase, branch=data.get('branch'), invoice_date=purchase_date)
     
     purchase = Purchase(
         invoice_number=invoice_number,
         supplier_id=data.get('supplier_id'),
         employee_id=data.get('employee_id'),
-        purchase_date=datetime.strptime(data.get('purchase_date'), '%Y-%m-%d').date() if data.get('purchase_date') else date.today(),
+        purchase_date=purchase_date,
         status='pending',
         notes=data.get('notes')
     )
@@ -233,11 +261,16 @@ def create_purchase():
         db.session.flush()  # للحصول على ID
         
         total_amount = Decimal('0')
+        purchase_items = []
+        
+        items_data = data.get('items', [])
+        products = _load_products(items_data)
         
         # إضافة عناصر المشترى
-        for item_data in data.get('items', []):
-            product = Product.query.get(item_data['product_id'])
+        for item_data in items_data:
+            product = products.get(str(item_data['product_id']))
             if not product:
+                db.session.rollback()
                 return jsonify({'message': f'المنتج غير موجود: {item_data["product_id"]}'}), 400
             
             quantity = int(item_data['quantity'])
@@ -253,16 +286,20 @@ def create_purchase():
             )
             
             db.session.add(purchase_item)
+            purchase_items.append(purchase_item)
             total_amount += total_price
             
-            # تحديث المخزون
-            product.current_stock += quantity
+            # تحديث المخزون (زيادة ذرية على مستوى قاعدة البيانات)
+            Product.query.filter(Product.id == product.id).update(
+                {Product.current_stock: Product.current_stock + quantity}, synchronize_session=False
+            )
             
             # تسجيل حركة المخزون
             stock_movement = StockMovement(
                 product_id=product.id,
                 movement_type='in',
                 quantity=quantity,
+                quantity_change=quantity,
                 reference_type='purchase',
                 reference_id=purchase.id,
                 employee_id=data.get('employee_id')
@@ -281,6 +318,9 @@ def create_purchase():
         purchase.net_amount = net_amount
         purchase.status = 'completed'
         
+        # تحديث جداول التجميع اليومي في نفس المعاملة
+        record_purchase(purchase, purchase_items)
+        
         db.session.commit()
         return jsonify({'message': 'تم إنشاء المشترى بنجاح', 'id': purchase.id, 'invoice_number': purchase.invoice_number}), 201
         
@@ -0,0 +1,77 @@
+from flask import Blueprint, request, jsonify
+from sqlalchemy import and_, or_, literal_column, table, column
+from src.models.models import Product, Customer, Supplier
+from src.models.serializers import product_serializer, customer_serializer, supplier_serializer
+from src.utils.search_index import SEARCH_INDEXES, is_supported, match_expression
+
+search_bp = Blueprint('search', __name__)
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+_ENTITIES = {
+    'products': (Product, product_serializer),
+    'customers': (Customer, customer_serializer),
+    'suppliers': (Supplier, supplier_serializer),
+}
+
+
+def _fts_search(entity, expression, limit):
+    """البحث في فهرس FTS5 مع ترتيب النتائج حسب الصلة (bm25) وربطها بالصفوف النشطة"""
+    model, serializer = _ENTITIES[entity]
+    fts_table = SEARCH_INDEXES[entity][0]
+    fts = table(fts_table, column('rowid'), column('rank'))
+    return serializer.apply(model.query).join(fts, fts.c.rowid == model.id).filter(
+        literal_column(fts_table).op('MATCH')(expression),
+        model.is_active == True
+    ).order_by(fts.c.rank).limit(limit).all()
+
+
+def _like_search(entity, query, limit):
+    """بديل لقواعد البيانات الأخرى: ILIKE على نفس الأعمدة لكل كلمة"""
+    model, serializer = _ENTITIES[entity]
+    columns = [getattr(model, name) for name in SEARCH_INDEXES[entity][2]]
+    conditions = [
+        or_(*[field.ilike(f'%{term}%') for field in columns])
+        for term in query.split()
+    ]
+    return serializer.apply(model.query).filter(
+        and_(*conditions), model.is_active == True
+    ).order_by(model.name).limit(limit).all()
+
+
+@search_bp.route('/search', methods=['GET'])
+def search():
+    """
+    البحث في الأصناف (الاسم، الكود، الوصف) والعملاء والموردين (الاسم، الهاتف، الرقم الضريبي).
+    يدعم البحث بالبادئة أثناء الكتابة، مع توحيد أشكال الحروف العربية وحذف التشكيل.
+    """
+    query = (request.args.get('q') or '').strip()
+    types = request.args.get('type', ','.join(_ENTITIES)).split(',')
+
+    try:
+        limit = min(max(int(request.args.get('limit', DEFAULT_SEARCH_LIMIT)), 1), MAX_SEARCH_LIMIT)
+    except ValueError:
+        return jsonify({'message': 'قيمة limit غير صالحة'}), 400
+
+    invalid = [entity for entity in types if entity not in _ENTITIES]
+    if invalid:
+        return jsonify({'message': f'نوع بحث غير مدعوم: {", ".join(invalid)}'}), 400
+
+    results = {entity: [] for entity in types}
+    if not query:
+        return jsonify(results)
+
+    use_fts = is_supported()
+    expression = match_expression(query) if use_fts else None
+
+    for entity in types:
+        if use_fts:
+            if expression is None:
+                continue
+            objects = _fts_search(entity, expression, limit)
+        else:
+            objects = _like_search(entity, query, limit)
+        results[entity] = _ENTITIES[entity][1].many(objects)
+
+    return jsonify(results)
@@ -0,0 +1,104 @@
+import click
+from flask.cli import with_appcontext
+from src.models.models import db
+
+# جداول الفهرس النصي: (جدول FTS5، الجدول الأصلي، الأعمدة المفهرسة)
+# معرف الصف في الفهرس (rowid) هو نفس معرف الصف الأصلي حتى يكون الحذف والتحديث عبر المفتاح الأساسي
+SEARCH_INDEXES = {
+    'products': ('products_fts', 'products', ('name', 'code', 'description')),
+    'customers': ('customers_fts', 'customers', ('name', 'phone', 'tax_number')),
+    'suppliers': ('suppliers_fts', 'suppliers', ('name', 'phone', 'tax_number')),
+}
+
+# توحيد الكتابة العربية: أشكال الألف والتاء المربوطة والألف المقصورة والهمزات، وحذف التطويل والتشكيل
+_ARABIC_REPLACEMENTS = [
+    ('أ', 'ا'), ('إ', 'ا'), ('آ', 'ا'), ('ٱ', 'ا'),
+    ('ة', 'ه'), ('ى', 'ي'), ('ؤ', 'و'), ('ئ', 'ي'),
+    ('ـ', ''),
+] + [(chr(code), '') for code in range(0x064B, 0x0653)] + [('ٰ', '')]
+
+_TRANSLATION = str.maketrans({source: target for source, target in _ARABIC_REPLACEMENTS})
+
+
+def normalize_arabic(text):
+    """توحيد النص العربي بنفس القواعد المستخدمة عند بناء الفهرس"""
+    return (text or '').translate(_TRANSLATION).lower()
+
+
+def _sql_normalize(expression):
+    """نفس قواعد normalize_arabic كسلسلة replace() داخل SQLite حتى تعمل من المشغلات (triggers)"""
+    expression = f"coalesce({expression}, '')"
+    for source, target in _ARABIC_REPLACEMENTS:
+        expression = f"replace({expression}, '{source}', '{target}')"
+    return expression
+
+
+def _index_statements(fts_table, source_table, columns):
+    column_list = ', '.join(columns)
+    new_values = ', '.join(_sql_normalize(f'new.{column}') for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"{column_list}, tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {source_table} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {source_table} BEGIN "
+        f"DELETE FROM {fts_table} WHERE rowid = old.id; END",
+        # تحديث المخزون والأسعار لا يعيد الفهرسة، فقط الأعمدة المفهرسة
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column_list} ON {source_table} BEGIN "
+        f"DELETE FROM {fts_table} WHERE rowid = old.id; "
+        f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+    ]
+
+
+def is_supported():
+    return db.session.get_bind().dialect.name == 'sqlite'
+
+
+def create_search_index():
+    """إنشاء جداول FTS5 ومشغلات المزامنة وتعبئتها من البيانات الحالية (SQLite فقط)"""
+    if not is_supported():
+        return
+    connection = db.session.connection()
+    for fts_table, source_table, columns in SEARCH_INDEXES.values():
+        for statement in _index_statements(fts_table, source_table, columns):
+            connection.exec_driver_sql(statement)
+    rebuild_search_index()
+
+
+def rebuild_search_index():
+    """إعادة تعبئة الفهرس بالكامل من الجداول الأصلية"""
+    connection = db.session.connection()
+    for fts_table, source_table, columns in SEARCH_INDEXES.values():
+        column_list = ', '.join(columns)
+        values = ', '.join(_sql_normalize(column) for column in columns)
+        connection.exec_driver_sql(f'DELETE FROM {fts_table}')
+        connection.exec_driver_sql(
+            f'INSERT INTO {fts_table}(rowid, {column_list}) SELECT id, {values} FROM {source_table}'
+        )
+        connection.exec_driver_sql(f"INSERT INTO {fts_table}({fts_table}) VALUES ('optimize')")
+
+
+def match_expression(query):
+    """
+    تحويل نص البحث إلى تعبير MATCH: كل كلمة عبارة بين علامتي تنصيص مع بحث بالبادئة،
+    والكلمات مجتمعة بـ AND. يعيد None إذا لم يتبق نص بعد التوحيد.
+    """
+    terms = normalize_arabic(query).split()
+    if not terms:
+        return None
+    return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """إعادة بناء فهرس البحث النصي للأصناف والعملاء والموردين"""
+    if not is_supported():
+        raise click.ClickException('فهرس البحث النصي متاح فقط مع SQLite')
+    try:
+        create_search_index()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    click.echo('تمت إعادة بناء فهرس البحث بنجاح')
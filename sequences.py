@@ -0,0 +1,100 @@
+import threading
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import func, select
+from src.models.models import db, InvoiceSequence
+from src.utils.db_utils import upsert_insert
+
+# الكتل المحجوزة مسبقاً في هذه العملية: اسم العداد -> [القيمة التالية، نهاية الكتلة]
+_blocks = {}
+_blocks_lock = threading.Lock()
+
+
+def _sequence_name(prefix, branch=None, invoice_date=None):
+    """اسم العداد حسب البادئة والفرع والسنة (حسب الإعدادات)"""
+    parts = [prefix]
+    if branch:
+        parts.append(str(branch))
+    if current_app.config.get('INVOICE_SEQUENCE_PER_YEAR'):
+        parts.append(str((invoice_date or datetime.utcnow().date()).year))
+    return '-'.join(parts)
+
+
+def _reserve(executor, name, count, seed_model):
+    """
+    حجز count قيمة متتالية من العداد بجملة UPDATE ذرية وإرجاع أول قيمة.
+    يتم إنشاء العداد عند أول استخدام، ويبدأ بعد أكبر معرف في seed_model إن وجد
+    حتى لا يتعارض مع الأرقام القديمة المبنية على المعرف.
+    """
+    table = InvoiceSequence.__table__
+    update = table.update().where(table.c.name == name).values(
+        next_value=table.c.next_value + count,
+        updated_at=datetime.utcnow()
+    )
+
+    for _ in range(2):
+        if executor.get_bind().dialect.update_returning:
+            next_value = executor.execute(update.returning(table.c.next_value)).scalar()
+        elif executor.execute(update).rowcount:
+            next_value = executor.execute(select(table.c.next_value).where(table.c.name == name)).scalar()
+        else:
+            next_value = None
+
+        if next_value is not None:
+            return next_value - count
+
+        seed = 1
+        if seed_model is not None:
+            seed = (executor.execute(select(func.max(seed_model.id))).scalar() or 0) + 1
+
+        stmt = upsert_insert(table)
+        if stmt is not None:
+            executor.execute(stmt.values(name=name, next_value=seed).on_conflict_do_nothing(index_elements=['name']))
+        else:
+            executor.execute(table.insert().values(name=name, next_value=seed))
+
+    raise RuntimeError(f'تعذر حجز رقم من العداد {name}')
+
+
+def _next_value(name, seed_model):
+    block_size = current_app.config.get('INVOICE_SEQUENCE_BLOCK_SIZE', 1)
+
+    # بدون كتل: الحجز داخل معاملة الفاتورة نفسها فلا تضيع أرقام عند التراجع
+    if block_size <= 1:
+        return _reserve(db.session, name, 1, seed_model)
+
+    # مع الكتل: حجز كتلة في معاملة مستقلة ثم توزيعها من الذاكرة دون الرجوع لقاعدة البيانات
+    # (قد تظهر فجوات في الترقيم عند إعادة تشغيل العملية)
+    with _blocks_lock:
+        block = _blocks.get(name)
+        if block is None or block[0] >= block[1]:
+            with db.engine.begin() as connection:
+                start = _reserve(_ConnectionExecutor(connection), name, block_size, seed_model)
+            block = _blocks[name] = [start, start + block_size]
+        value = block[0]
+        block[0] += 1
+        return value
+
+
+class _ConnectionExecutor:
+    """واجهة موحدة مع الجلسة (execute/get_bind) لاستخدام اتصال مستقل"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, statement):
+        return self.connection.execute(statement)
+
+    def get_bind(self):
+        return self.connection
+
+
+def allocate_invoice_number(prefix, seed_model, branch=None, invoice_date=None):
+    """
+    تخصيص رقم فاتورة فريد بشكل ذري (مثل INV-000123 أو INV-2025-000123).
+    seed_model هو نموذج الفاتورة (Sale أو Purchase) المستخدم لتهيئة العداد أول مرة.
+    """
+    name = _sequence_name(prefix, branch, invoice_date)
+    if name != prefix:
+        seed_model = None
+    return f"{name}-{_next_value(name, seed_model):06d}"
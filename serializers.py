@@ -0,0 +1,221 @@
+from sqlalchemy.orm import joinedload, selectinload, configure_mappers
+from src.models.models import (
+    Employee, Category, Product, Supplier, Customer, Purchase, PurchaseItem,
+    Sale, SaleItem, StockMovement
+)
+from src.utils.cache import category_names_cache
+
+# العلاقات المعرفة عبر backref (مثل Sale.customer) لا تظهر على الصنف إلا بعد تهيئة الـ mappers
+configure_mappers()
+
+
+class Serializer:
+    """
+    طبقة تحويل موحدة لنماذج قاعدة البيانات:
+    كل مُحوِّل يعرّف دالة التحويل إلى dict والعلاقات التي يحتاجها،
+    ويتم تحميل هذه العلاقات مسبقاً (joined/selectin) لتجنب مشكلة N+1.
+    context (اختياري) يجلب بيانات مشتركة مرة واحدة لكل استدعاء dump/many وتُمرر لدالة التحويل كمعامل ثانٍ.
+    """
+
+    def __init__(self, dump, load=(), context=None):
+        self._dump = dump
+        self.load = tuple(load)
+        self.context = context
+
+    def apply(self, query):
+        """إضافة خيارات التحميل المسبق إلى الاستعلام"""
+        return query.options(*self.load) if self.load else query
+
+    def dump(self, obj):
+        if self.context is None:
+            return self._dump(obj)
+        return self._dump(obj, self.context())
+
+    def many(self, objects):
+        if self.context is None:
+            return [self._dump(obj) for obj in objects]
+        context = self.context()
+        return [self._dump(obj, context) for obj in objects]
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+# الموظفين
+def _dump_employee(employee):
+    return {
+        'id': employee.id,
+        'name': employee.name,
+        'position': employee.position,
+        'phone': employee.phone,
+        'email': employee.email,
+        'salary': float(employee.salary) if employee.salary else None,
+        'username': employee.username,
+        'role': employee.role,
+        'is_active': employee.is_active,
+        'created_at': _isoformat(employee.created_at)
+    }
+
+
+# فئات الأصناف
+def _dump_category(category):
+    return {
+        'id': category.id,
+        'name': category.name,
+        'description': category.description,
+        'created_at': _isoformat(category.created_at)
+    }
+
+
+# الأصناف
+def _dump_product(product, category_names):
+    return {
+        'id': product.id,
+        'name': product.name,
+        'code': product.code,
+        'description': product.description,
+        'unit': product.unit,
+        'purchase_price': float(product.purchase_price) if product.purchase_price else None,
+        'selling_price': float(product.selling_price) if product.selling_price else None,
+        'min_stock': product.min_stock,
+        'max_stock': product.max_stock,
+        'current_stock': product.current_stock,
+        'image_path': product.image_path,
+        'category_id': product.category_id,
+        'category_name': category_names.get(product.category_id),
+        'is_active': product.is_active,
+        'created_at': _isoformat(product.created_at)
+    }
+
+
+# العملاء والموردين
+def _dump_customer(customer):
+    return {
+        'id': customer.id,
+        'name': customer.name,
+        'contact_person': customer.contact_person,
+        'address': customer.address,
+        'phone': customer.phone,
+        'email': customer.email,
+        'tax_number': customer.tax_number,
+        'customer_type': customer.customer_type,
+        'is_active': customer.is_active,
+        'created_at': _isoformat(customer.created_at)
+    }
+
+
+def _dump_supplier(supplier):
+    return {
+        'id': supplier.id,
+        'name': supplier.name,
+        'contact_person': supplier.contact_person,
+        'address': supplier.address,
+        'phone': supplier.phone,
+        'email': supplier.email,
+        'tax_number': supplier.tax_number,
+        'commercial_register': supplier.commercial_register,
+        'is_active': supplier.is_active,
+        'created_at': _isoformat(supplier.created_at)
+    }
+
+
+# المبيعات والمشتريات
+def _dump_invoice_item(item):
+    return {
+        'id': item.id,
+        'product_id': item.product_id,
+        'product_name': item.product.name if item.product else None,
+        'quantity': item.quantity,
+        'unit_price': float(item.unit_price),
+        'total_price': float(item.total_price)
+    }
+
+
+def _dump_sale(sale):
+    return {
+        'id': sale.id,
+        'invoice_number': sale.invoice_number,
+        'customer_id': sale.customer_id,
+        'customer_name': sale.customer.name if sale.customer else None,
+        'employee_id': sale.employee_id,
+        'sale_date': _isoformat(sale.sale_date),
+        'total_amount': float(sale.total_amount) if sale.total_amount else 0,
+        'tax_amount': float(sale.tax_amount) if sale.tax_amount else 0,
+        'discount_amount': float(sale.discount_amount) if sale.discount_amount else 0,
+        'net_amount': float(sale.net_amount) if sale.net_amount else 0,
+        'invoice_type': sale.invoice_type,
+        'status': sale.status,
+        'notes': sale.notes,
+        'created_at': _isoformat(sale.created_at)
+    }
+
+
+def _dump_sale_detail(sale):
+    data = _dump_sale(sale)
+    data['items'] = [_dump_invoice_item(item) for item in sale.items]
+    return data
+
+
+def _dump_purchase(purchase):
+    return {
+        'id': purchase.id,
+        'invoice_number': purchase.invoice_number,
+        'supplier_id': purchase.supplier_id,
+        'supplier_name': purchase.supplier.name if purchase.supplier else None,
+        'employee_id': purchase.employee_id,
+        'purchase_date': _isoformat(purchase.purchase_date),
+        'total_amount': float(purchase.total_amount) if purchase.total_amount else 0,
+        'tax_amount': float(purchase.tax_amount) if purchase.tax_amount else 0,
+        'discount_amount': float(purchase.discount_amount) if purchase.discount_amount else 0,
+        'net_amount': float(purchase.net_amount) if purchase.net_amount else 0,
+        'status': purchase.status,
+        'notes': purchase.notes,
+        'created_at': _isoformat(purchase.created_at)
+    }
+
+
+def _dump_purchase_detail(purchase):
+    data = _dump_purchase(purchase)
+    data['items'] = [_dump_invoice_item(item) for item in purchase.items]
+    return data
+
+
+# حركات المخزون
+def _dump_stock_movement(movement):
+    return {
+        'id': movement.id,
+        'product_id': movement.product_id,
+        'product_name': movement.product.name if movement.product else None,
+        'movement_type': movement.movement_type,
+        'quantity': movement.quantity,
+        'reference_type': movement.reference_type,
+        'reference_id': movement.reference_id,
+        'notes': movement.notes,
+        'movement_date': _isoformat(movement.movement_date),
+        'employee_name': movement.employee.name if movement.employee else None
+    }
+
+
+employee_serializer = Serializer(_dump_employee)
+category_serializer = Serializer(_dump_category)
+# اسم الفئة من ذاكرة أسماء الفئات بدلاً من ربط جدول الفئات (قراءة واحدة من الذاكرة لكل استدعاء)
+product_serializer = Serializer(_dump_product, context=category_names_cache.get)
+customer_serializer = Serializer(_dump_customer)
+supplier_serializer = Serializer(_dump_supplier)
+
+sale_serializer = Serializer(_dump_sale, load=[joinedload(Sale.customer)])
+sale_detail_serializer = Serializer(_dump_sale_detail, load=[
+    joinedload(Sale.customer),
+    selectinload(Sale.items).joinedload(SaleItem.product)
+])
+purchase_serializer = Serializer(_dump_purchase, load=[joinedload(Purchase.supplier)])
+purchase_detail_serializer = Serializer(_dump_purchase_detail, load=[
+    joinedload(Purchase.supplier),
+    selectinload(Purchase.items).joinedload(PurchaseItem.product)
+])
+
+stock_movement_serializer = Serializer(_dump_stock_movement, load=[
+    joinedload(StockMovement.product),
+    joinedload(StockMovement.employee)
+])
@@ -0,0 +1,171 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from flask import has_request_context, request
+from sqlalchemy import event
+from src.models.models import db
+
+# الجمل التي تُحفظ خطة تنفيذها مع السجل
+_EXPLAINABLE = ('select', 'with', 'update', 'delete')
+# خطط التنفيذ المحفوظة حسب نص الجملة حتى لا يتكرر EXPLAIN لنفس الاستعلام البطيء
+_PLAN_CACHE_SIZE = 500
+# لاحقة الأسماء البديلة التي يولدها SQLAlchemy للجداول (products_1)
+_ALIAS_SUFFIX = re.compile(r'_\d+$')
+
+logger = logging.getLogger('slow_queries')
+
+_plans = {}
+_plans_lock = threading.Lock()
+
+
+def _redact(parameters, executemany):
+    """المعاملات بأنواعها فقط بدون القيم (قد تحتوي على بيانات العملاء أو كلمات المرور)"""
+    if executemany:
+        return f'<{len(parameters)} sets>'
+    if isinstance(parameters, dict):
+        return {key: 'NULL' if value is None else type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return ['NULL' if value is None else type(value).__name__ for value in parameters]
+    return None
+
+
+def _explain(cursor, dialect, statement, parameters):
+    with _plans_lock:
+        if statement in _plans:
+            return _plans[statement]
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+    try:
+        # مؤشر منفصل على نفس الاتصال حتى لا تتأثر نتائج الاستعلام الأصلي
+        explain_cursor = cursor.connection.cursor()
+        try:
+            explain_cursor.execute(prefix + statement, parameters)
+            plan = [str(row[-1]) for row in explain_cursor.fetchall()]
+        finally:
+            explain_cursor.close()
+    except Exception as e:
+        plan = [f'تعذر الحصول على الخطة: {e}']
+    with _plans_lock:
+        if len(_plans) >= _PLAN_CACHE_SIZE:
+            _plans.clear()
+        _plans[statement] = plan
+    return plan
+
+
+def is_full_scan(plan, tables=None):
+    """
+    هل تحتوي الخطة على قراءة كاملة لجدول بدون فهرس. في SQLite يظهر الاستعلام الفرعي و CTE المجسد
+    أيضاً كـ SCAN باسمه (anon_1)، فتُحسب فقط أسماء جداول قاعدة البيانات (tables، افتراضياً جداول النماذج).
+    في PostgreSQL تختلف عقدة الجدول (Seq Scan) عن عقد الاستعلامات الفرعية (Subquery Scan و CTE Scan).
+    """
+    tables = db.metadata.tables if tables is None else tables
+    for line in plan or []:
+        text = line.strip()
+        if text.startswith('SCAN ') and 'USING' not in text:
+            name = text[len('SCAN '):].split(' ', 1)[0]
+            if name in tables or _ALIAS_SUFFIX.sub('', name) in tables:
+                return True
+        if 'Seq Scan' in text:
+            return True
+    return False
+
+
+def init_slow_query_log(app, engine):
+    """
+    تسجيل الاستعلامات الأبطأ من SLOW_QUERY_THRESHOLD_MS في ملف دوار بصيغة JSON (سطر لكل استعلام):
+    نص الجملة، المعاملات بعد إخفاء قيمها، النقطة التي نفذتها، وخطة التنفيذ. القيمة 0 تعطل التسجيل.
+    """
+    threshold = app.config['SLOW_QUERY_THRESHOLD_MS'] / 1000
+    if threshold <= 0:
+        return
+
+    path = app.config['SLOW_QUERY_LOG']
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if not logger.handlers:
+        handler = RotatingFileHandler(
+            path, maxBytes=app.config['SLOW_QUERY_LOG_MAX_BYTES'],
+            backupCount=app.config['SLOW_QUERY_LOG_BACKUPS'], encoding='utf-8'
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    dialect = engine.dialect.name
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info['slow_query_start'] = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop('slow_query_start', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        if elapsed < threshold:
+            return
+
+        plan = None
+        if not executemany and statement.lstrip().lower().startswith(_EXPLAINABLE):
+            plan = _explain(cursor, dialect, statement, parameters)
+        logger.info(json.dumps({
+            'time': datetime.utcnow().isoformat(),
+            'duration_ms': round(elapsed * 1000, 2),
+            # خارج الطلبات: أوامر CLI والترحيلات
+            'route': request.endpoint if has_request_context() else None,
+            'statement': statement,
+            'parameters': _redact(parameters, executemany),
+            'plan': plan
+        }, ensure_ascii=False))
+
+
+def _log_files(path, backups):
+    """الملف الحالي والملفات المدورة الموجودة (path.1 ... path.N)"""
+    files = [path] + [f'{path}.{index}' for index in range(1, backups + 1)]
+    return [name for name in files if os.path.exists(name)]
+
+
+def top_slow_queries(path, backups, limit=20, route=None):
+    """
+    أكثر الاستعلامات البطيئة استهلاكاً للوقت الإجمالي من ملفات السجل، مجمعة حسب (النقطة، نص الجملة).
+    حجم الملفات محدود بإعدادات التدوير، فقراءتها كاملة عند الطلب مقبولة.
+    """
+    groups = {}
+    for name in _log_files(path, backups):
+        with open(name, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if route and entry.get('route') != route:
+                    continue
+                key = (entry.get('route'), entry['statement'])
+                group = groups.get(key)
+                if group is None:
+                    group = groups[key] = {
+                        'route': entry.get('route'),
+                        'statement': entry['statement'],
+                        'count': 0,
+                        'total_ms': 0.0,
+                        'max_ms': 0.0,
+                        'last_seen': None,
+                        'plan': None
+                    }
+                group['count'] += 1
+                group['total_ms'] += entry['duration_ms']
+                group['max_ms'] = max(group['max_ms'], entry['duration_ms'])
+                if group['last_seen'] is None or entry['time'] > group['last_seen']:
+                    group['last_seen'] = entry['time']
+                    group['plan'] = entry.get('plan') or group['plan']
+
+    offenders = sorted(groups.values(), key=lambda group: group['total_ms'], reverse=True)[:limit]
+    for group in offenders:
+        group['total_ms'] = round(group['total_ms'], 2)
+        group['avg_ms'] = round(group['total_ms'] / group['count'], 2)
+        group['full_scan'] = is_full_scan(group['plan'])
+    return offenders
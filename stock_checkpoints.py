@@ -0,0 +1,147 @@
+import re
+from datetime import datetime, timedelta
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, insert, inspect, literal, select
+from src.models.models import db, Product, StockMovement, StockCheckpoint, StockCheckpointItem
+
+# نص الملاحظة الافتراضي لحركات التعديل القديمة التي سُجلت بدون إشارة
+_ADJUSTMENT_NOTE = re.compile(r'من (-?\d+) إلى (-?\d+)')
+
+
+def add_quantity_change_column():
+    """
+    ترحيل: إضافة عمود التغير بإشارته إلى حركات المخزون وتعبئته للحركات السابقة.
+    حركات التعديل القديمة تُستنتج إشارتها من الملاحظة الافتراضية إن وجدت.
+    """
+    bind = db.session.get_bind()
+    columns = {column['name'] for column in inspect(bind).get_columns('stock_movements')}
+    if 'quantity_change' not in columns:
+        db.session.execute(db.text('ALTER TABLE stock_movements ADD COLUMN quantity_change INTEGER'))
+
+    table = StockMovement.__table__
+    db.session.execute(table.update().where(
+        table.c.quantity_change.is_(None), table.c.movement_type == 'in'
+    ).values(quantity_change=table.c.quantity))
+    db.session.execute(table.update().where(
+        table.c.quantity_change.is_(None), table.c.movement_type == 'out'
+    ).values(quantity_change=-table.c.quantity))
+
+    adjustments = db.session.execute(select(table.c.id, table.c.notes).where(
+        table.c.quantity_change.is_(None), table.c.movement_type == 'adjustment'
+    )).all()
+    for movement_id, notes in adjustments:
+        match = _ADJUSTMENT_NOTE.search(notes or '')
+        if match:
+            db.session.execute(table.update().where(table.c.id == movement_id).values(
+                quantity_change=int(match.group(2)) - int(match.group(1))
+            ))
+
+
+def create_stock_checkpoints_tables():
+    bind = db.session.get_bind()
+    StockCheckpoint.__table__.create(bind, checkfirst=True)
+    StockCheckpointItem.__table__.create(bind, checkfirst=True)
+
+
+def create_checkpoint():
+    """
+    تسجيل لقطة برصيد جميع الأصناف الحالي بجملة INSERT ... SELECT واحدة (داخل المعاملة الحالية).
+    رقم آخر حركة يحدد الحركات المشمولة في اللقطة بدلاً من التاريخ، حتى لا تضيع حركة سُجل تاريخها قبل اللقطة
+    وتم حفظها بعدها.
+    """
+    last_movement_id = db.session.query(func.coalesce(func.max(StockMovement.id), 0)).scalar()
+    checkpoint = StockCheckpoint(taken_at=datetime.utcnow(), last_movement_id=last_movement_id)
+    db.session.add(checkpoint)
+    db.session.flush()
+
+    db.session.execute(insert(StockCheckpointItem.__table__).from_select(
+        ['checkpoint_id', 'product_id', 'stock'],
+        select(literal(checkpoint.id), Product.id, func.coalesce(Product.current_stock, 0))
+    ))
+    return checkpoint
+
+
+def _movement_sums(*conditions):
+    return dict(db.session.query(
+        StockMovement.product_id, func.sum(func.coalesce(StockMovement.quantity_change, 0))
+    ).filter(*conditions).group_by(StockMovement.product_id).all())
+
+
+def stock_as_of(at, product_ids=None):
+    """
+    رصيد الأصناف في لحظة محددة: من أقرب لقطة سابقة مع إضافة الحركات التالية لها فقط حتى تلك اللحظة.
+    الأصناف غير الموجودة في اللقطة (أو عند عدم وجود لقطة) تُحسب رجوعاً من الرصيد الحالي بطرح الحركات اللاحقة.
+    يعيد (اللقطة المستخدمة أو None، {معرف الصنف: الرصيد}).
+    """
+    checkpoint = StockCheckpoint.query.filter(
+        StockCheckpoint.taken_at <= at
+    ).order_by(StockCheckpoint.taken_at.desc()).first()
+
+    product_filter = [StockMovement.product_id.in_(product_ids)] if product_ids else []
+    stock = {}
+
+    if checkpoint:
+        items = db.session.query(StockCheckpointItem.product_id, StockCheckpointItem.stock).filter(
+            StockCheckpointItem.checkpoint_id == checkpoint.id
+        )
+        if product_ids:
+            items = items.filter(StockCheckpointItem.product_id.in_(product_ids))
+        stock = dict(items.all())
+
+        after_checkpoint = _movement_sums(
+            StockMovement.id > checkpoint.last_movement_id, StockMovement.movement_date <= at, *product_filter
+        )
+        for product_id in stock:
+            stock[product_id] += after_checkpoint.get(product_id, 0)
+
+    # الأصناف المضافة بعد اللقطة: الرصيد الحالي ناقص ما حدث بعد اللحظة المطلوبة
+    products = db.session.query(Product.id, Product.current_stock).filter(
+        Product.created_at <= at
+    )
+    if product_ids:
+        products = products.filter(Product.id.in_(product_ids))
+    if stock:
+        products = products.filter(Product.id.notin_(list(stock)))
+    current = dict(products.all())
+
+    if current:
+        after_moment = _movement_sums(
+            StockMovement.movement_date > at, StockMovement.product_id.in_(list(current))
+        )
+        for product_id, current_stock in current.items():
+            stock[product_id] = (current_stock or 0) - after_moment.get(product_id, 0)
+
+    return checkpoint, stock
+
+
+def prune_checkpoints(keep_days):
+    """حذف اللقطات الأقدم من المدة المحددة مع الإبقاء على أحدث لقطة دائماً"""
+    cutoff = datetime.utcnow() - timedelta(days=keep_days)
+    latest_id = db.session.query(func.max(StockCheckpoint.id)).scalar()
+    old_ids = [row.id for row in db.session.query(StockCheckpoint.id).filter(
+        StockCheckpoint.taken_at < cutoff, StockCheckpoint.id != latest_id
+    )]
+    if old_ids:
+        db.session.query(StockCheckpointItem).filter(
+            StockCheckpointItem.checkpoint_id.in_(old_ids)
+        ).delete(synchronize_session=False)
+        db.session.query(StockCheckpoint).filter(
+            StockCheckpoint.id.in_(old_ids)
+        ).delete(synchronize_session=False)
+    return len(old_ids)
+
+
+@click.command('stock-checkpoint')
+@click.option('--keep-days', type=int, help='حذف اللقطات الأقدم من هذا العدد من الأيام')
+@with_appcontext
+def stock_checkpoint_command(keep_days):
+    """تسجيل لقطة لرصيد المخزون الحالي (تُجدول يومياً، مثلاً عبر cron)"""
+    try:
+        checkpoint = create_checkpoint()
+        pruned = prune_checkpoints(keep_days) if keep_days is not None else 0
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    click.echo(f'تم تسجيل لقطة المخزون رقم {checkpoint.id} (حذف {pruned} لقطة قديمة)')
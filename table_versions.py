@@ -0,0 +1,119 @@
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from itertools import chain
+from flask import g, request, make_response, current_app
+from sqlalchemy import event, select
+from src.models.models import db, TableVersion
+
+# جداول البيانات المرجعية التي يتم تتبع إصدارها
+TRACKED_TABLES = ('products', 'categories', 'customers', 'suppliers', 'employees')
+
+
+def _bump(connection, names):
+    """زيادة إصدار الجداول المحددة داخل نفس معاملة الكتابة (تُلغى مع rollback)"""
+    table = TableVersion.__table__
+    now = datetime.utcnow()
+    for name in sorted(names):
+        result = connection.execute(table.update().where(table.c.table_name == name).values(
+            version=table.c.version + 1, updated_at=now
+        ))
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(table_name=name, version=1, updated_at=now))
+
+
+def _after_flush(session, flush_context):
+    """الكتابات عبر ORM (إضافة، تعديل، حذف كائنات)"""
+    names = {
+        obj.__table__.name for obj in chain(session.new, session.dirty, session.deleted)
+        if obj.__table__.name in TRACKED_TABLES
+    }
+    if names:
+        _bump(session.connection(), names)
+
+
+def _do_orm_execute(state):
+    """الكتابات المجمعة عبر session.execute (مثل Query.update في البيع والاستيراد المجمع)"""
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    table = getattr(state.statement, 'table', None)
+    name = getattr(table, 'name', None)
+    if name in TRACKED_TABLES:
+        _bump(state.session.connection(), {name})
+
+
+def track_table_versions(session):
+    """تسجيل مستمعي الجلسة الذين يزيدون إصدار الجداول المتتبعة مع كل كتابة"""
+    event.listen(session, 'after_flush', _after_flush)
+    event.listen(session, 'do_orm_execute', _do_orm_execute)
+
+
+def seed_table_versions():
+    """إنشاء جدول الإصدارات وصف لكل جدول متتبع (ترحيل)"""
+    bind = db.session.get_bind()
+    TableVersion.__table__.create(bind, checkfirst=True)
+    existing = set(db.session.execute(select(TableVersion.table_name)).scalars())
+    for name in TRACKED_TABLES:
+        if name not in existing:
+            db.session.add(TableVersion(table_name=name, version=0))
+
+
+def table_version(name):
+    """
+    إصدار الجدول الحالي في قاعدة البيانات. داخل نقطة تستخدم conditional_get يُعاد الإصدار
+    الذي بُني عليه ETag نفسه دون استعلام إضافي.
+    """
+    versions = g.get('table_versions', {})
+    if name in versions:
+        return versions[name]
+    return db.session.execute(
+        select(TableVersion.version).where(TableVersion.table_name == name)
+    ).scalar() or 0
+
+
+def conditional_get(*tables):
+    """
+    دعم الطلبات الشرطية لنقاط GET التي تعتمد على الجداول المحددة:
+    ETag قوي مبني على إصدارات الجداول و Last-Modified من آخر كتابة،
+    والطلب المطابق (If-None-Match / If-Modified-Since) يحصل على 304 باستعلام واحد للإصدارات فقط.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # قراءة الإصدار قبل البيانات حتى لا تُوسم بيانات قديمة بإصدار أحدث
+            versions = {
+                row.table_name: row for row in db.session.execute(
+                    select(TableVersion.table_name, TableVersion.version, TableVersion.updated_at)
+                    .where(TableVersion.table_name.in_(tables))
+                )
+            }
+            g.table_versions = {name: row.version for name, row in versions.items()}
+            parts = [request.full_path]
+            for name in tables:
+                row = versions.get(name)
+                parts.append(f'{name}:{row.version}:{row.updated_at.isoformat()}' if row else f'{name}:0')
+            etag = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+            updated = [row.updated_at for row in versions.values() if row.updated_at]
+            last_modified = max(updated).replace(microsecond=0, tzinfo=timezone.utc) if updated else None
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = bool(since and last_modified and last_modified <= since)
+
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            # المتصفح يحتفظ بالنسخة لكن يتحقق من الخادم في كل مرة
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
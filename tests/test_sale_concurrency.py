@@ -0,0 +1,81 @@
+"""
+اختبار تزامن البيع: عدة خيوط تبيع نفس الصنف في نفس الوقت عبر POST /api/sales
+ويجب ألا يصبح الرصيد سالباً وأن يساوي عدد المبيعات الناجحة الرصيد الابتدائي.
+
+في SQLite تُنفذ معاملات الكتابة واحدة تلو الأخرى، فالبيع الزائد يظهر فعلياً على قواعد تسمح بكتابات متزامنة:
+يمكن تشغيل الاختبار على قاعدة PostgreSQL فارغة مخصصة للاختبار بتحديد TEST_DATABASE_URL.
+
+التشغيل من جذر المشروع (المجلد الذي يحتوي على src):
+    python -m pytest tests
+    TEST_DATABASE_URL=postgresql://localhost/hra_test python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+import threading
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# قاعدة SQLite في ملف (وليست في الذاكرة) حتى تعمل الخيوط على اتصالات منفصلة كما في الإنتاج،
+# ويجب تحديدها قبل استيراد التطبيق لأن الترحيلات تُطبق عند الاستيراد
+os.environ['DATABASE_URL'] = os.environ.get('TEST_DATABASE_URL') or (
+    'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='sale-concurrency-'), 'test.db')
+)
+os.environ['SLOW_QUERY_THRESHOLD_MS'] = '0'
+
+import pytest
+from src.main import app
+from src.models.models import db, Customer, Product, Sale, StockMovement
+
+INITIAL_STOCK = 10
+THREADS = 20
+
+
+@pytest.fixture
+def customer_and_product():
+    """عميل وصنف جديدان في كل تشغيل حتى لا يتأثر الاختبار ببيانات سابقة في قاعدة TEST_DATABASE_URL"""
+    with app.app_context():
+        customer = Customer(name='عميل الاختبار')
+        product = Product(
+            name='صنف سريع الحركة', code=f'FAST-{uuid.uuid4().hex[:8]}',
+            selling_price=10, current_stock=INITIAL_STOCK, is_active=True
+        )
+        db.session.add_all([customer, product])
+        db.session.commit()
+        return customer.id, product.id
+
+
+def test_parallel_sales_never_oversell(customer_and_product):
+    customer_id, product_id = customer_and_product
+    barrier = threading.Barrier(THREADS)
+    statuses = []
+    lock = threading.Lock()
+
+    def sell():
+        client = app.test_client()
+        barrier.wait()
+        response = client.post('/api/sales', json={
+            'customer_id': customer_id,
+            'items': [{'product_id': product_id, 'quantity': 1, 'unit_price': 10}]
+        })
+        with lock:
+            statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=sell) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        stock = db.session.get(Product, product_id).current_stock
+        sales = Sale.query.filter_by(customer_id=customer_id).count()
+        movements = StockMovement.query.filter_by(product_id=product_id).count()
+
+    # الطلبات الزائدة عن الرصيد ترفض بـ 400 ولا يظهر أي خطأ آخر
+    assert sorted(set(statuses)) == [201, 400]
+    assert stock >= 0
+    assert statuses.count(201) == INITIAL_STOCK
+    assert stock == 0
+    assert sales == movements == INITIAL_STOCK
@@ -0,0 +1,146 @@
+import calendar
+from datetime import date, datetime
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func
+from src.models.models import db, Sale, SaleItem, Product, TopProductMonthly
+
+RANK_COLUMNS = ('revenue', 'quantity')
+
+
+def top_products_query(start_date=None, end_date=None, rank_by='revenue', limit=10):
+    """
+    أفضل الأصناف في الفترة بتجميع واحد على عناصر الفواتير المكتملة:
+    GROUP BY على product_id فقط ثم ربط بيانات الصنف بعد الترتيب والحد.
+    """
+    total_quantity = func.coalesce(func.sum(SaleItem.quantity), 0).label('total_quantity')
+    total_revenue = func.coalesce(func.sum(SaleItem.total_price), 0).label('total_revenue')
+
+    query = db.session.query(
+        SaleItem.product_id.label('product_id'), total_quantity, total_revenue
+    ).join(Sale, SaleItem.sale_id == Sale.id).filter(Sale.status == 'completed')
+
+    if start_date:
+        query = query.filter(Sale.sale_date >= start_date)
+    if end_date:
+        query = query.filter(Sale.sale_date <= end_date)
+
+    def ranking(quantity, revenue):
+        if rank_by == 'quantity':
+            return quantity.desc(), revenue.desc()
+        return revenue.desc(), quantity.desc()
+
+    ranked = query.group_by(SaleItem.product_id).order_by(
+        *ranking(total_quantity, total_revenue), SaleItem.product_id
+    ).limit(limit).subquery()
+
+    return db.session.query(
+        ranked.c.product_id, Product.name, Product.code, ranked.c.total_quantity, ranked.c.total_revenue
+    ).outerjoin(Product, Product.id == ranked.c.product_id).order_by(
+        *ranking(ranked.c.total_quantity, ranked.c.total_revenue), ranked.c.product_id
+    )
+
+
+def month_bounds(month):
+    """أول وآخر يوم في الشهر بصيغة YYYY-MM (ValueError إذا كانت الصيغة غير صالحة)"""
+    first = datetime.strptime(month, '%Y-%m').date()
+    last = first.replace(day=calendar.monthrange(first.year, first.month)[1])
+    return first, last
+
+
+def month_sales_changed_at(start_date, end_date):
+    """آخر إنشاء أو تعديل لفواتير المبيعات في الفترة (من الفهرس ix_sales_sale_date_updated_at)"""
+    return db.session.query(func.max(Sale.updated_at)).filter(
+        Sale.sale_date >= start_date, Sale.sale_date <= end_date
+    ).scalar()
+
+
+def materialized_top_products(month, rank_by, limit):
+    """
+    القائمة المحسوبة مسبقاً للشهر، أو None إذا لم تُحسب أو كان الحد أكبر من المحفوظ
+    أو تغيرت فواتير الشهر بعد آخر تحديث (فيُحسب التقرير مباشرة بدلاً من إرجاع قائمة قديمة).
+    القوائم لا تُحدث تلقائياً عند البيع: يجب جدولة الأمر refresh-top-products للشهر الحالي
+    (مثلاً كل ساعة عبر cron)، وإلا يُحسب تقرير الشهر الحالي مباشرة مع كل طلب بعد أول فاتورة جديدة.
+    """
+    if limit > current_app.config['TOP_PRODUCTS_K']:
+        return None
+    query = db.session.query(
+        TopProductMonthly.product_id, Product.name, Product.code,
+        TopProductMonthly.total_quantity, TopProductMonthly.total_revenue, TopProductMonthly.refreshed_at
+    ).outerjoin(Product, Product.id == TopProductMonthly.product_id).filter(
+        TopProductMonthly.month == month, TopProductMonthly.rank_by == rank_by
+    )
+    rows = query.order_by(TopProductMonthly.rank).limit(limit).all()
+    if not rows:
+        return None
+
+    # refreshed_at و updated_at كلاهما بتوقيت UTC من datetime.utcnow
+    changed_at = month_sales_changed_at(*month_bounds(month))
+    if changed_at is not None and changed_at > rows[0].refreshed_at:
+        return None
+    return rows
+
+
+def refresh_top_products(month):
+    """
+    إعادة حساب أفضل K صنف للشهر حسب الإيراد وحسب الكمية (داخل المعاملة الحالية).
+    وقت التحديث يُسجل قبل القراءة حتى تُعد الفواتير المحفوظة أثناء الحساب تغييراً بعده.
+    """
+    start_date, end_date = month_bounds(month)
+    k = current_app.config['TOP_PRODUCTS_K']
+    now = datetime.utcnow()
+
+    db.session.query(TopProductMonthly).filter(TopProductMonthly.month == month).delete(synchronize_session=False)
+    for rank_by in RANK_COLUMNS:
+        rows = top_products_query(start_date, end_date, rank_by, k).all()
+        if not rows:
+            continue
+        db.session.execute(TopProductMonthly.__table__.insert(), [{
+            'month': month,
+            'rank_by': rank_by,
+            'rank': rank,
+            'product_id': row.product_id,
+            'total_quantity': row.total_quantity,
+            'total_revenue': row.total_revenue,
+            'refreshed_at': now
+        } for rank, row in enumerate(rows, start=1)])
+
+
+def sales_months():
+    """الأشهر التي تحتوي على مبيعات مكتملة"""
+    first, last = db.session.query(func.min(Sale.sale_date), func.max(Sale.sale_date)).filter(
+        Sale.status == 'completed'
+    ).one()
+    if not first:
+        return []
+    months = []
+    current = date(first.year, first.month, 1)
+    while current <= last:
+        months.append(current.strftime('%Y-%m'))
+        current = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+    return months
+
+
+@click.command('refresh-top-products')
+@click.option('--month', 'months', multiple=True, help='YYYY-MM (الافتراضي الشهر الحالي)')
+@click.option('--all', 'all_months', is_flag=True, help='جميع الأشهر التي تحتوي على مبيعات')
+@with_appcontext
+def refresh_top_products_command(months, all_months):
+    """تحديث قوائم أفضل الأصناف الشهرية المحسوبة مسبقاً"""
+    if all_months:
+        months = sales_months()
+    elif not months:
+        months = [date.today().strftime('%Y-%m')]
+
+    try:
+        for month in months:
+            refresh_top_products(month)
+        db.session.commit()
+    except ValueError:
+        db.session.rollback()
+        raise click.BadParameter('صيغة الشهر يجب أن تكون YYYY-MM')
+    except Exception:
+        db.session.rollback()
+        raise
+    click.echo(f'تم تحديث أفضل الأصناف لعدد {len(months)} شهر')